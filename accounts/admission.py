@@ -0,0 +1,127 @@
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from accounts import metrics
+
+CRITICAL, NORMAL, BULK = "critical", "normal", "bulk"
+
+# Share of the concurrency limit each priority may fill: under pressure bulk
+# calls are shed first and interactive lookups and signups last.
+PRIORITY_SHARES = {CRITICAL: 1.0, NORMAL: 0.8, BULK: 0.5}
+
+# WatchAccounts is left out: its streams live for hours and ACCOUNTS_MAX_WATCHERS bounds them.
+METHOD_PRIORITIES = {
+    "GetAccount": CRITICAL,
+    "CreateAccount": CRITICAL,
+    "UpdateAccount": NORMAL,
+    "DeleteAccount": NORMAL,
+    "BatchGetAccounts": BULK,
+    "BatchCreateAccounts": BULK,
+    "ListAccounts": BULK,
+    "ListAccountsChangedSince": BULK,
+}
+
+
+def method_priority(method: str) -> Optional[str]:
+    """Priority of a gRPC method path ("/accounts.AccountService/GetAccount"), None if it is not limited."""
+    return METHOD_PRIORITIES.get(method.rsplit("/", 1)[-1])
+
+
+class AdaptiveLimiter:
+    """Concurrency limit adjusted by AIMD on observed latency.
+
+    A call is timed from when the server received it, so time spent queued for
+    a worker thread counts. Each call slower than ``latency_target`` cuts the
+    limit by ``backoff``, at most once per round trip: only calls that arrived
+    after the previous cut can cut it again. Each call on time while the limit
+    is at least half used raises it by 1/limit, about one per limit's worth of calls.
+
+    A call is rejected when its priority's share of the limit is in use, or
+    when it already waited longer than ``max_queue_time`` for a thread, since
+    it would be late whatever happens next.
+
+    The decision is made once a worker thread picks the call up, so a rejected
+    call has still held a place in the queue and costs a thread briefly; it only
+    saves the handler's work. The server's ``maximum_concurrent_rpcs`` is what
+    bounds the queue itself, rejecting calls before they are dispatched.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 10,
+        min_limit: float = 1,
+        max_limit: float = 100,
+        latency_target: float = 0.25,
+        max_queue_time: Optional[float] = None,
+        backoff: float = 0.9,
+        shares: Optional[Dict[str, float]] = None,
+        clock=time.monotonic,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.max_queue_time = latency_target if max_queue_time is None else max_queue_time
+        self.backoff = backoff
+        self.shares = dict(PRIORITY_SHARES if shares is None else shares)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_cut = float("-inf")
+        metrics.ADMISSION_LIMIT.set(self._limit)
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self, priority: str, arrived: float) -> Optional[str]:
+        """Admit a call received at ``arrived``; returns None when admitted, otherwise why it was rejected."""
+        with self._lock:
+            if self._clock() - arrived > self.max_queue_time:
+                return "queued"
+            if self._in_flight >= math.floor(self._limit * self.shares[priority]):
+                return "limit"
+            self._in_flight += 1
+            return None
+
+    def release(self, priority: str, arrived: float, latency: Optional[float] = None) -> None:
+        """Finish an admitted call; ``latency`` (None for streams) feeds the limit.
+
+        Bulk calls take as long as their batch is big whatever the load, so
+        only the latency of other priorities moves the limit.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if latency is None or priority == BULK:
+                return
+            if latency > self.latency_target:
+                if arrived > self._last_cut:
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_cut = self._clock()
+            elif self._in_flight + 1 >= self._limit / 2:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            limit = self._limit
+        metrics.ADMISSION_LIMIT.set(limit)
+
+
+def limiter_from_env(capacity: int) -> Optional[AdaptiveLimiter]:
+    """An AdaptiveLimiter starting at ``capacity`` calls at once, or None when ACCOUNTS_ADMISSION=0.
+
+    ``capacity`` is what the server can run concurrently: its worker threads in
+    sync mode, its concurrent RPC cap in aio mode, which has no thread pool.
+    """
+    if os.getenv("ACCOUNTS_ADMISSION", "1") != "1":
+        return None
+    return AdaptiveLimiter(
+        initial_limit=capacity,
+        min_limit=int(os.getenv("ACCOUNTS_ADMISSION_MIN_LIMIT", "1")),
+        max_limit=int(os.getenv("ACCOUNTS_ADMISSION_MAX_LIMIT", str(capacity))),
+        latency_target=float(os.getenv("ACCOUNTS_ADMISSION_LATENCY_MS", "250")) / 1000,
+    )
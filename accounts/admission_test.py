@@ -0,0 +1,201 @@
+import heapq
+import random
+import unittest
+from collections import deque
+from typing import Optional
+
+from accounts import admission
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = admission.AdaptiveLimiter(
+            initial_limit=4, min_limit=1, max_limit=8, latency_target=0.1, clock=self.clock
+        )
+
+    def test_rejects_past_the_limit(self):
+        for _ in range(4):
+            self.assertIsNone(self.limiter.try_acquire(admission.CRITICAL, arrived=0))
+
+        self.assertEqual(self.limiter.try_acquire(admission.CRITICAL, arrived=0), "limit")
+        self.limiter.release(admission.CRITICAL, arrived=0, latency=0.01)
+        self.assertIsNone(self.limiter.try_acquire(admission.CRITICAL, arrived=0))
+
+    def test_bulk_calls_get_a_smaller_share(self):
+        self.assertIsNone(self.limiter.try_acquire(admission.BULK, arrived=0))
+        self.assertIsNone(self.limiter.try_acquire(admission.BULK, arrived=0))
+
+        self.assertEqual(self.limiter.try_acquire(admission.BULK, arrived=0), "limit")
+        self.assertIsNone(self.limiter.try_acquire(admission.NORMAL, arrived=0))
+        self.assertIsNone(self.limiter.try_acquire(admission.CRITICAL, arrived=0))
+
+    def test_rejects_calls_that_queued_too_long(self):
+        self.clock.now = 0.5
+        self.assertEqual(self.limiter.try_acquire(admission.CRITICAL, arrived=0.3), "queued")
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    def test_slow_calls_cut_the_limit_once_per_round_trip(self):
+        for _ in range(3):
+            self.limiter.try_acquire(admission.CRITICAL, arrived=0)
+        self.clock.now = 1.0
+
+        self.limiter.release(admission.CRITICAL, arrived=0, latency=1.0)
+        self.limiter.release(admission.CRITICAL, arrived=0, latency=1.0)
+        self.assertAlmostEqual(self.limiter.limit, 3.6)
+
+        self.limiter.try_acquire(admission.CRITICAL, arrived=1.1)
+        self.clock.now = 1.5
+        self.limiter.release(admission.CRITICAL, arrived=1.1, latency=0.4)
+        self.assertAlmostEqual(self.limiter.limit, 3.24)
+
+    def test_fast_calls_raise_a_busy_limit(self):
+        self.limiter.try_acquire(admission.CRITICAL, arrived=0)
+        self.limiter.release(admission.CRITICAL, arrived=0, latency=0.01)
+        self.assertEqual(self.limiter.limit, 4)
+
+        for _ in range(3):
+            self.limiter.try_acquire(admission.CRITICAL, arrived=0)
+        self.limiter.release(admission.CRITICAL, arrived=0, latency=0.01)
+        self.assertAlmostEqual(self.limiter.limit, 4.25)
+
+    def test_limit_stays_within_bounds(self):
+        for _ in range(100):
+            self.limiter.try_acquire(admission.CRITICAL, arrived=self.clock.now)
+            self.clock.now += 1
+            self.limiter.release(admission.CRITICAL, arrived=self.clock.now - 1, latency=1)
+        self.assertEqual(self.limiter.limit, 1)
+
+    def test_method_priority(self):
+        self.assertEqual(admission.method_priority("/accounts.AccountService/GetAccount"), admission.CRITICAL)
+        self.assertEqual(admission.method_priority("/accounts.AccountService/BatchCreateAccounts"), admission.BULK)
+        self.assertIsNone(admission.method_priority("/accounts.AccountService/WatchAccounts"))
+
+
+class OverloadSimulation:
+    """Discrete-event model of the sync server: a FIFO queue in front of ``threads`` workers.
+
+    Admitted calls contend for ``db_slots`` database connections, so a call's
+    service time grows with the number of calls running beside it. Rejections
+    cost ``reject_cost`` of a worker's time. Arrivals are Poisson at ``rate``.
+    """
+
+    SERVICE_TIMES = {admission.CRITICAL: 0.02, admission.BULK: 0.1}
+    BULK_FRACTION = 0.2
+
+    def __init__(self, limiter: Optional[admission.AdaptiveLimiter], clock: FakeClock, threads=8, db_slots=2):
+        self.limiter = limiter
+        self.clock = clock
+        self.threads = threads
+        self.db_slots = db_slots
+        self.reject_cost = 0.0002
+        self.latencies = {admission.CRITICAL: [], admission.BULK: []}
+        self.rejected = {admission.CRITICAL: 0, admission.BULK: 0}
+
+    @classmethod
+    def capacity(cls, db_slots=2) -> float:
+        mean = (1 - cls.BULK_FRACTION) * cls.SERVICE_TIMES[admission.CRITICAL]
+        mean += cls.BULK_FRACTION * cls.SERVICE_TIMES[admission.BULK]
+        return db_slots / mean
+
+    def run(self, rate: float, duration: float, seed: int = 7) -> None:
+        rng = random.Random(seed)
+        events, queue, sequence = [], deque(), 0
+        free, running = self.threads, 0
+
+        def push(at, kind, data=None):
+            nonlocal sequence
+            sequence += 1
+            heapq.heappush(events, (at, sequence, kind, data))
+
+        push(rng.expovariate(rate), "arrival")
+        while events:
+            now, _, kind, data = heapq.heappop(events)
+            self.clock.now = now
+            if kind == "arrival":
+                priority = admission.BULK if rng.random() < self.BULK_FRACTION else admission.CRITICAL
+                queue.append((now, priority))
+                if now < duration:
+                    push(now + rng.expovariate(rate), "arrival")
+            elif kind == "done":
+                arrived, priority = data
+                free += 1
+                running -= 1
+                self.latencies[priority].append(now - arrived)
+                if self.limiter is not None:
+                    self.limiter.release(priority, arrived, now - arrived)
+            else:
+                free += 1
+            while free and queue:
+                arrived, priority = queue.popleft()
+                free -= 1
+                if self.limiter is not None and self.limiter.try_acquire(priority, arrived) is not None:
+                    self.rejected[priority] += 1
+                    push(now + self.reject_cost, "rejected")
+                    continue
+                running += 1
+                service = self.SERVICE_TIMES[priority] * max(1.0, running / self.db_slots)
+                push(now + service, "done", (arrived, priority))
+
+    def p99(self, priority=None) -> float:
+        latencies = sorted(
+            latency for name, values in self.latencies.items() if priority in (None, name) for latency in values
+        )
+        return latencies[int(0.99 * (len(latencies) - 1))]
+
+    def served(self, priority) -> float:
+        """Fraction of the calls of ``priority`` that were admitted."""
+        served = len(self.latencies[priority])
+        return served / (served + self.rejected[priority])
+
+
+class OverloadSimulationTest(unittest.TestCase):
+    TARGET = 0.25
+    DURATION = 30.0
+
+    def _simulate(self, limited: bool, load: float) -> OverloadSimulation:
+        clock = FakeClock()
+        limiter = (
+            admission.AdaptiveLimiter(initial_limit=8, max_limit=8, latency_target=self.TARGET, clock=clock)
+            if limited
+            else None
+        )
+        simulation = OverloadSimulation(limiter, clock)
+        simulation.run(rate=load * OverloadSimulation.capacity(), duration=self.DURATION)
+        return simulation
+
+    def test_p99_stays_bounded_under_10x_overload(self):
+        simulation = self._simulate(limited=True, load=10)
+
+        self.assertLess(simulation.p99(), 2 * self.TARGET)
+        served = sum(len(latencies) for latencies in simulation.latencies.values())
+        self.assertGreater(served / self.DURATION, 0.7 * OverloadSimulation.capacity())
+
+    def test_critical_calls_are_shed_last(self):
+        simulation = self._simulate(limited=True, load=10)
+
+        self.assertGreater(simulation.served(admission.CRITICAL), 2 * simulation.served(admission.BULK))
+
+    def test_unlimited_queue_grows_without_bound(self):
+        simulation = self._simulate(limited=False, load=10)
+
+        self.assertGreater(simulation.p99(), 10 * self.TARGET)
+
+    def test_nothing_is_shed_below_capacity(self):
+        simulation = self._simulate(limited=True, load=0.5)
+
+        self.assertEqual(simulation.rejected[admission.CRITICAL], 0)
+        self.assertGreater(simulation.served(admission.BULK), 0.9)
+        self.assertLess(simulation.p99(admission.CRITICAL), self.TARGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
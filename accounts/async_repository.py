@@ -0,0 +1,129 @@
+from typing import Dict, Optional
+
+import structlog
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from accounts.db import AsyncSessionFactory
+from accounts.models import outbox
+from accounts.models.users import User
+from accounts.repository import (
+    AccountNotFoundError,
+    DatabaseError,
+    DuplicateEmailError,
+    changed_fields_update,
+    check_updatable,
+    email_lookup,
+    is_duplicate_email,
+    outbox_insert,
+)
+from accounts.utils import creds_utils
+
+logger = structlog.get_logger()
+
+
+class AsyncAccountRepository:
+    """Asyncio counterpart of AccountRepository with the same error semantics."""
+
+    def __init__(self, session_factory: AsyncSessionFactory):
+        self.session_factory = session_factory
+
+    async def create_account(
+        self,
+        email: str,
+        first_name: str,
+        last_name: str,
+        hashed_password: str,
+    ) -> User:
+        new_account = User(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            hashed_password=hashed_password,
+        )
+        async with self.session_factory() as session:
+            session.add(new_account)
+            try:
+                await session.flush()
+                await session.execute(outbox_insert(outbox.CREATED, new_account.id, email))
+                await session.commit()
+            except IntegrityError as exc:
+                await session.rollback()
+                if is_duplicate_email(exc):
+                    logger.warning("User already exists", email=email)
+                    raise DuplicateEmailError("Email already exists") from exc
+                logger.error("Failed to create account", error=str(exc), email=email)
+                raise DatabaseError("Database error during create") from exc
+        return new_account
+
+    async def get_account_by_email(self, email: str):
+        try:
+            async with self.session_factory() as session:
+                account = await session.scalar(email_lookup(email))
+        except SQLAlchemyError as exc:
+            logger.error("Database error while fetching account", error=str(exc), email=email)
+            raise DatabaseError("Database error") from exc
+        return account
+
+    async def update_account(self, id, email, first_name, last_name, hashed_password) -> User:
+        return await self.update_account_fields(
+            id, email=email, first_name=first_name, last_name=last_name, hashed_password=hashed_password
+        )
+
+    async def update_account_fields(self, account_id: int, **changes: str) -> User:
+        check_updatable(changes)
+        async with self.session_factory() as session:
+            try:
+                previous_email = await self._current_email(session, account_id) if "email" in changes else None
+                account = await self._write_changes(session, account_id, changes) if changes else None
+                written = account is not None
+                if account is None:
+                    account = await session.get(User, account_id)
+                if account is None:
+                    logger.error("Account not found for update", account_id=account_id)
+                    raise AccountNotFoundError("Account not found")
+                if written:
+                    await session.execute(outbox_insert(outbox.UPDATED, account_id, account.email, previous_email))
+
+                await session.commit()
+            except SQLAlchemyError as exc:
+                await session.rollback()
+                logger.error("Failed to update account", error=str(exc), account_id=account_id)
+                raise DatabaseError("Database error during update") from exc
+        if written:
+            creds_utils.invalidate_token(previous_email or account.email, account.email)
+        return account
+
+    async def _write_changes(self, session, account_id: int, changes: Dict[str, str]) -> Optional[User]:
+        statement = changed_fields_update(account_id, changes)
+        if session.get_bind().dialect.update_returning:
+            return (await session.scalars(statement.returning(User))).one_or_none()
+        if (await session.execute(statement)).rowcount:
+            return await session.get(User, account_id)
+        return None
+
+    async def delete_account(self, account_id: int) -> bool:
+        statement = delete(User).where(User.id == account_id).execution_options(synchronize_session=False)
+        async with self.session_factory() as session:
+            try:
+                if session.get_bind().dialect.delete_returning:
+                    email = (await session.scalars(statement.returning(User.email))).one_or_none()
+                    deleted = email is not None
+                else:
+                    email = await self._current_email(session, account_id)
+                    deleted = bool((await session.execute(statement)).rowcount)
+                if not deleted:
+                    logger.error("Account not found for deletion", account_id=account_id)
+                    raise AccountNotFoundError("Account not found")
+                await session.execute(outbox_insert(outbox.DELETED, account_id, email))
+
+                await session.commit()
+                creds_utils.invalidate_token(email)
+                return True
+            except SQLAlchemyError as exc:
+                await session.rollback()
+                logger.error("Failed to delete account", error=str(exc), account_id=account_id)
+                raise DatabaseError("Database error during deletion") from exc
+
+    async def _current_email(self, session, account_id: int):
+        return await session.scalar(select(User.email).where(User.id == account_id))
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from accounts import async_repository, db, repository
+from accounts.models import base
+
+
+class TestAsyncAccountRepository(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.engine = create_async_engine("sqlite+aiosqlite:///" + db_path)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(base.Base.metadata.create_all)
+
+        self.repo = async_repository.AsyncAccountRepository(db.get_async_session_factory(self.engine))
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def _create(self, email="test@example.com"):
+        return await self.repo.create_account(
+            email=email,
+            first_name="Test",
+            last_name="User",
+            hashed_password="Test",
+        )
+
+    async def test_create_and_get_account(self):
+        new_account = await self._create()
+
+        account = await self.repo.get_account_by_email("test@example.com")
+        self.assertEqual(account.id, new_account.id)
+        self.assertEqual(account.first_name, "Test")
+        self.assertTrue(account.is_active)
+
+    @mock.patch.object(async_repository.logger, "warning")
+    async def test_create_account_duplicate_email(self, mock_warning_logger):
+        await self._create()
+        with self.assertRaises(repository.DuplicateEmailError):
+            await self._create()
+        mock_warning_logger.assert_called_once_with("User already exists", email="test@example.com")
+
+    async def test_get_account_by_email_not_found(self):
+        self.assertIsNone(await self.repo.get_account_by_email("missing@example.com"))
+
+    async def test_update_account(self):
+        account = await self._create()
+
+        updated = await self.repo.update_account(account.id, "updated@mail.com", "Updated", "User", "pw")
+
+        self.assertEqual(updated.email, "updated@mail.com")
+        self.assertEqual(updated.first_name, "Updated")
+        self.assertIsNone(await self.repo.get_account_by_email("test@example.com"))
+
+    @mock.patch.object(async_repository.logger, "error")
+    async def test_update_account_not_found(self, mock_error_logger):
+        with self.assertRaises(repository.AccountNotFoundError):
+            await self.repo.update_account(999, "a@mail.com", "First", "Last", "pw")
+        mock_error_logger.assert_called_once_with("Account not found for update", account_id=999)
+
+    async def test_delete_account(self):
+        account = await self._create()
+
+        self.assertTrue(await self.repo.delete_account(account.id))
+        self.assertIsNone(await self.repo.get_account_by_email("test@example.com"))
+
+    @mock.patch("accounts.utils.creds_utils.invalidate_token")
+    async def test_email_change_invalidates_tokens_for_both_emails(self, mock_invalidate_token):
+        account = await self._create("old@example.com")
+
+        await self.repo.update_account_fields(account.id, email="new@example.com")
+        mock_invalidate_token.assert_called_once_with("old@example.com", "new@example.com")
+
+        mock_invalidate_token.reset_mock()
+        await self.repo.delete_account(account.id)
+        mock_invalidate_token.assert_called_once_with("new@example.com")
+
+    @mock.patch.object(async_repository.logger, "error")
+    async def test_delete_account_not_found(self, mock_error_logger):
+        with self.assertRaises(repository.AccountNotFoundError):
+            await self.repo.delete_account(999)
+        mock_error_logger.assert_called_once_with("Account not found for deletion", account_id=999)
@@ -0,0 +1,105 @@
+import grpc
+import structlog
+from codegen.accounts import service_pb2, service_pb2_grpc
+
+from accounts import service_utils
+from accounts.async_repository import AsyncAccountRepository
+from accounts.repository import AccountNotFoundError, DuplicateEmailError
+from accounts.utils import creds_utils
+
+logger = structlog.get_logger()
+
+
+class AsyncAccountService(service_pb2_grpc.AccountServiceServicer):
+    """AccountService for the grpc.aio server, backed by AsyncAccountRepository."""
+
+    def __init__(self, repo: AsyncAccountRepository):
+        self.repo = repo
+
+    async def CreateAccount(
+        self, request: service_pb2.CreateAccountRequest, context: grpc.aio.ServicerContext
+    ) -> service_pb2.CreateAccountResponse:
+        required_fields = ["email", "first_name", "last_name", "hashed_password"]
+        await service_utils.validate_required_async(context, request, required_fields)
+
+        try:
+            account = await self.repo.create_account(
+                email=request.email,
+                first_name=request.first_name,
+                last_name=request.last_name,
+                hashed_password=request.hashed_password,
+            )
+            logger.info("Account created", account_id=account.id)
+        except DuplicateEmailError as e:
+            await context.abort(grpc.StatusCode.ALREADY_EXISTS, str(e))
+
+        return service_pb2.CreateAccountResponse(
+            account=service_utils.to_account_message(account),
+            token=creds_utils.generate_token(
+                account.email,
+                account.first_name,
+                account.last_name,
+            ),
+        )
+
+    async def GetAccount(
+        self, request: service_pb2.GetAccountRequest, context: grpc.aio.ServicerContext
+    ) -> service_pb2.GetAccountResponse:
+        required_fields = ["email"]
+        await service_utils.validate_required_async(context, request, required_fields)
+
+        account = await self.repo.get_account_by_email(email=request.email)
+        if not account:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Account not found")
+
+        return service_pb2.GetAccountResponse(
+            account=service_utils.to_account_message(account),
+            token=creds_utils.generate_token(
+                account.email,
+                account.first_name,
+                account.last_name,
+            ),
+        )
+
+    async def UpdateAccount(
+        self, request: service_pb2.UpdateAccountRequest, context: grpc.aio.ServicerContext
+    ) -> service_pb2.UpdateAccountResponse:
+        if request.update_mask.paths:
+            await service_utils.validate_required_async(context, request, ["account_id"])
+            try:
+                changes = service_utils.masked_changes(request)
+            except ValueError as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        else:
+            required_fields = ["account_id", "email", "first_name", "last_name", "hashed_password"]
+            await service_utils.validate_required_async(context, request, required_fields)
+            changes = None
+
+        try:
+            if changes is None:
+                updated_account = await self.repo.update_account(
+                    request.account_id,
+                    request.email,
+                    request.first_name,
+                    request.last_name,
+                    request.hashed_password,
+                )
+            else:
+                updated_account = await self.repo.update_account_fields(request.account_id, **changes)
+        except AccountNotFoundError as e:
+            await context.abort(grpc.StatusCode.NOT_FOUND, str(e))
+
+        return service_pb2.UpdateAccountResponse(account=service_utils.to_account_message(updated_account))
+
+    async def DeleteAccount(
+        self, request: service_pb2.DeleteAccountRequest, context: grpc.aio.ServicerContext
+    ) -> service_pb2.DeleteAccountResponse:
+        required_fields = ["account_id"]
+        await service_utils.validate_required_async(context, request, required_fields)
+
+        try:
+            await self.repo.delete_account(account_id=request.account_id)
+        except AccountNotFoundError as e:
+            await context.abort(grpc.StatusCode.NOT_FOUND, str(e))
+        logger.info("Account deleted", account_id=request.account_id)
+        return service_pb2.DeleteAccountResponse(success=True)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+import grpc
+from codegen.accounts import service_pb2, service_pb2_grpc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from accounts import async_repository, db, main
+from accounts.models import base
+
+
+class AsyncAccountServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.engine = create_async_engine("sqlite+aiosqlite:///" + db_path)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(base.Base.metadata.create_all)
+
+        repo = async_repository.AsyncAccountRepository(db.get_async_session_factory(self.engine))
+        self.server = main.create_aio_server(repo)
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        await self.server.start()
+        self.channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        self.stub = service_pb2_grpc.AccountServiceStub(self.channel)
+
+    async def asyncTearDown(self):
+        await self.channel.close()
+        await self.server.stop(None)
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def _create(self, email="test@example.com"):
+        return await self.stub.CreateAccount(
+            service_pb2.CreateAccountRequest(
+                email=email,
+                first_name="Test",
+                last_name="User",
+                hashed_password="hashed",
+            )
+        )
+
+    async def test_create_then_get_account(self):
+        created = await self._create()
+
+        response = await self.stub.GetAccount(service_pb2.GetAccountRequest(email="test@example.com"))
+
+        self.assertEqual(response.account.account_id, created.account.account_id)
+        self.assertEqual(response.account.first_name, "Test")
+        self.assertTrue(response.token)
+
+    async def test_create_duplicate_email_aborts(self):
+        await self._create()
+
+        with self.assertRaises(grpc.aio.AioRpcError) as error:
+            await self._create()
+        self.assertEqual(error.exception.code(), grpc.StatusCode.ALREADY_EXISTS)
+
+    async def test_get_missing_email_is_invalid_argument(self):
+        with self.assertRaises(grpc.aio.AioRpcError) as error:
+            await self.stub.GetAccount(service_pb2.GetAccountRequest())
+        self.assertEqual(error.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        self.assertEqual(error.exception.details(), "Email is required")
+
+    async def test_get_unknown_account_is_not_found(self):
+        with self.assertRaises(grpc.aio.AioRpcError) as error:
+            await self.stub.GetAccount(service_pb2.GetAccountRequest(email="missing@example.com"))
+        self.assertEqual(error.exception.code(), grpc.StatusCode.NOT_FOUND)
+
+    async def test_update_and_delete_account(self):
+        created = await self._create()
+
+        updated = await self.stub.UpdateAccount(
+            service_pb2.UpdateAccountRequest(
+                account_id=created.account.account_id,
+                email="updated@example.com",
+                first_name="Updated",
+                last_name="User",
+                hashed_password="hashed",
+            )
+        )
+        self.assertEqual(updated.account.email, "updated@example.com")
+
+        request = service_pb2.UpdateAccountRequest(account_id=created.account.account_id, last_name="Renamed")
+        request.update_mask.paths.append("last_name")
+        renamed = await self.stub.UpdateAccount(request)
+        self.assertEqual(renamed.account.last_name, "Renamed")
+        self.assertEqual(renamed.account.first_name, "Updated")
+
+        deleted = await self.stub.DeleteAccount(service_pb2.DeleteAccountRequest(account_id=created.account.account_id))
+        self.assertTrue(deleted.success)
+        with self.assertRaises(grpc.aio.AioRpcError) as error:
+            await self.stub.DeleteAccount(service_pb2.DeleteAccountRequest(account_id=created.account.account_id))
+        self.assertEqual(error.exception.code(), grpc.StatusCode.NOT_FOUND)
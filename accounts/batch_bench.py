@@ -0,0 +1,72 @@
+"""Compare N single-item RPCs against one batch RPC for gets and creates.
+
+python -m accounts.batch_bench --sizes 1 100 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import grpc
+from codegen.accounts import service_pb2, service_pb2_grpc
+
+from accounts import main
+from accounts.server_bench import seed_database, start_server_process
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _create_request(prefix: str, i: int) -> service_pb2.CreateAccountRequest:
+    return service_pb2.CreateAccountRequest(
+        email=f"{prefix}{i}@example.com", first_name="Batch", last_name=str(i), hashed_password="x"
+    )
+
+
+def run_size(stub, size: int) -> dict:
+    emails = [f"bench{i}@example.com" for i in range(size)]
+    singles = [_create_request(f"single{size}-", i) for i in range(size)]
+    batch = [_create_request(f"batch{size}-", i) for i in range(size)]
+    return {
+        "get_single": _timed(lambda: [stub.GetAccount(service_pb2.GetAccountRequest(email=e)) for e in emails]),
+        "get_batch": _timed(lambda: stub.BatchGetAccounts(service_pb2.BatchGetAccountsRequest(emails=emails))),
+        "create_single": _timed(lambda: [stub.CreateAccount(request) for request in singles]),
+        "create_batch": _timed(
+            lambda: stub.BatchCreateAccounts(service_pb2.BatchCreateAccountsRequest(accounts=batch))
+        ),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark batch account RPCs")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 100, 10_000])
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        seed_database(db_path, max(args.sizes))
+        server, port = start_server_process("sync", db_path, main.MAX_WORKERS)
+        try:
+            with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = service_pb2_grpc.AccountServiceStub(channel)
+                for size in args.sizes:
+                    results[size] = run_size(stub, size)
+        finally:
+            server.terminate()
+            server.join()
+
+    print(f"{'items':>7} {'get x N ms':>12} {'batch get ms':>13} {'create x N ms':>14} {'batch create ms':>16}")
+    for size, r in results.items():
+        print(
+            f"{size:>7} {r['get_single'] * 1000:>12.1f} {r['get_batch'] * 1000:>13.1f}"
+            f" {r['create_single'] * 1000:>14.1f} {r['create_batch'] * 1000:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
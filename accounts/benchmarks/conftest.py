@@ -0,0 +1,44 @@
+import os
+
+import pytest
+from sqlalchemy import insert
+
+from accounts import db, repository
+from accounts.models import base, users
+
+SIZES = [int(size) for size in os.getenv("ACCOUNTS_BENCH_SIZES", "1000").split(",") if size.strip()]
+SEED_BATCH = 50_000
+
+
+def email(i: int) -> str:
+    return f"user{i}@example.com"
+
+
+def _seed(path: str, count: int) -> None:
+    engine = db.create_engine("sqlite:///" + path)
+    base.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for start in range(0, count, SEED_BATCH):
+            conn.execute(
+                insert(users.User),
+                [
+                    {"email": email(i), "first_name": "First", "last_name": f"Last{i}", "hashed_password": "x"}
+                    for i in range(start, min(start + SEED_BATCH, count))
+                ],
+            )
+    engine.dispose()
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"{size}")
+def users_db(request, tmp_path_factory):
+    """Path and row count of a SQLite users table seeded once per size for the whole session."""
+    path = str(tmp_path_factory.mktemp("bench") / f"users-{request.param}.db")
+    _seed(path, request.param)
+    return path, request.param
+
+
+@pytest.fixture
+def repo(users_db):
+    engine = db.create_pooled_engine("sqlite:///" + users_db[0], max_workers=1, name="bench")
+    yield repository.AccountRepository(db.get_session_factory(bind=engine))
+    engine.dispose()
@@ -0,0 +1,119 @@
+"""Per-call latency of the web GrpcClient with a channel per call vs persistent channels.
+
+Starts a TLS AccountService on a seeded SQLite database (self-signed
+certificate generated with openssl) and issues sequential GetAccount calls.
+The channel-per-call client reads the certificate and builds its credentials
+on every call, as GrpcClient did before it kept its channels open:
+
+    python -m accounts.benchmarks.grpc_client_bench --calls 500
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+
+import grpc
+import structlog
+from codegen.accounts import service_pb2, service_pb2_grpc
+
+from accounts import db
+from accounts import main as accounts_main
+from accounts.repository import AccountRepository
+from accounts.server_bench import percentile, seed_database
+from accounts.utils import creds_utils
+from web.app.utils.grpc_client import GrpcClient
+
+
+def _make_certificate(certs_dir: str) -> str:
+    cert_path = os.path.join(certs_dir, "accounts.crt")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost",
+            "-keyout",
+            os.path.join(certs_dir, "accounts.key"),
+            "-out",
+            cert_path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert_path
+
+
+def _run_server(db_path: str, certs_dir: str, port_queue) -> None:
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    creds_utils.BASE_DIR = certs_dir
+    engine = db.create_pooled_engine("sqlite:///" + db_path, max_workers=accounts_main.MAX_WORKERS)
+    server = accounts_main.create_server(AccountRepository(db.get_session_factory(bind=engine)))
+    credentials = grpc.ssl_server_credentials(creds_utils.load_credentials())
+    port_queue.put(server.add_secure_port("127.0.0.1:0", credentials))
+    server.start()
+    server.wait_for_termination()
+
+
+def _channel_per_call(addr: str, cert_path: str, request):
+    with open(cert_path, "rb") as f:
+        credentials = grpc.ssl_channel_credentials(root_certificates=f.read())
+    with grpc.secure_channel(addr, credentials) as channel:
+        return service_pb2_grpc.AccountServiceStub(channel).GetAccount(request)
+
+
+def _measure(calls: int, fn) -> list:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GrpcClient channel reuse")
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        seed_database(db_path, 1)
+        cert_path = _make_certificate(tmpdir)
+        ctx = multiprocessing.get_context("spawn")
+        port_queue = ctx.Queue()
+        server = ctx.Process(target=_run_server, args=(db_path, tmpdir, port_queue), daemon=True)
+        server.start()
+        try:
+            port = port_queue.get(timeout=30)
+            addr = f"localhost:{port}"
+            client = GrpcClient("AccountService", service_pb2_grpc, addr=addr, cert_path=cert_path)
+            request = service_pb2.GetAccountRequest(email="bench0@example.com")
+            before = _measure(args.calls, lambda: _channel_per_call(addr, cert_path, request))
+            client.call("GetAccount", request)
+            after = _measure(args.calls, lambda: client.call("GetAccount", request))
+            client.close()
+        finally:
+            server.terminate()
+            server.join()
+
+    print(f"{'client':<18} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, latencies in (("channel per call", before), ("persistent", after)):
+        mean = sum(latencies) / len(latencies) * 1000
+        p50, p99 = percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000
+        print(f"{name:<18} {mean:>9.2f} {p50:>9.2f} {p99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+from accounts.benchmarks.conftest import email
+
+
+def _rotating(count: int):
+    """Spread lookups over the whole table instead of hitting one hot row."""
+    step = max(1, count // 997)
+    return itertools.cycle(range(0, count, step))
+
+
+@pytest.mark.benchmark(group="repository")
+def test_get_account_by_email(benchmark, repo, users_db):
+    ids = _rotating(users_db[1])
+    account = benchmark(lambda: repo.get_account_by_email(email(next(ids))))
+    assert account is not None
+
+
+@pytest.mark.benchmark(group="repository")
+def test_get_account_by_email_missing(benchmark, repo):
+    assert benchmark(repo.get_account_by_email, "missing@example.com") is None
+
+
+@pytest.mark.benchmark(group="repository")
+def test_get_accounts_by_emails_100(benchmark, repo, users_db):
+    emails = [email(i) for i in range(0, users_db[1], max(1, users_db[1] // 100))][:100]
+    assert len(benchmark(repo.get_accounts_by_emails, emails)) == len(emails)
+
+
+@pytest.mark.benchmark(group="repository")
+def test_update_account_fields(benchmark, repo, users_db):
+    ids, names = _rotating(users_db[1]), itertools.cycle(["Alpha", "Beta"])
+    benchmark(lambda: repo.update_account_fields(next(ids) + 1, first_name=next(names)))
+
+
+@pytest.mark.benchmark(group="repository")
+def test_create_then_delete_account(benchmark, repo):
+    serial = itertools.count()
+
+    def create_then_delete():
+        account = repo.create_account(f"bench-{next(serial)}@example.com", "Bench", "Mark", "x")
+        repo.delete_account(account.id)
+
+    benchmark(create_then_delete)
+
+
+@pytest.mark.benchmark(group="repository")
+def test_iter_accounts_first_page(benchmark, repo, users_db):
+    page = benchmark(lambda: next(repo.iter_accounts(page_size=500)))
+    assert len(page) == min(500, users_db[1])
@@ -0,0 +1,52 @@
+from unittest import mock
+
+import grpc
+import pytest
+from codegen.accounts import service_pb2
+
+from accounts import service_utils
+from accounts.benchmarks.conftest import email
+from accounts.models.users import User
+from accounts.service import AccountService
+from accounts.utils import creds_utils
+
+
+@pytest.fixture
+def service(repo):
+    return AccountService(repo)
+
+
+@pytest.fixture
+def context():
+    return mock.Mock(spec=grpc.ServicerContext)
+
+
+@pytest.mark.benchmark(group="service")
+def test_to_account_message(benchmark):
+    account = User(id=1, email=email(1), first_name="First", last_name="Last", is_active=True, is_verified=False)
+    assert benchmark(service_utils.to_account_message, account).account_id == 1
+
+
+@pytest.mark.benchmark(group="service")
+def test_GetAccount(benchmark, service, context):
+    request = service_pb2.GetAccountRequest(email=email(0))
+    assert benchmark(service.GetAccount, request, context).account.email == email(0)
+
+
+@pytest.mark.benchmark(group="service")
+def test_ListAccounts_first_page(benchmark, service, context):
+    context.is_active.return_value = True
+    request = service_pb2.ListAccountsRequest(page_size=500, limit=500)
+    pages = benchmark(lambda: list(service.ListAccounts(request, context)))
+    assert pages
+
+
+@pytest.mark.benchmark(group="tokens")
+def test_generate_token_cached(benchmark):
+    creds_utils.generate_token(email(0), "First", "Last")
+    assert benchmark(creds_utils.generate_token, email(0), "First", "Last")
+
+
+@pytest.mark.benchmark(group="tokens")
+def test_encode_token_uncached(benchmark):
+    assert benchmark(creds_utils._encode_token, email(0), "First", "Last")
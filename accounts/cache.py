@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional, Protocol, Tuple
+
+import structlog
+
+from accounts import metrics
+from accounts.models.users import User
+
+logger = structlog.get_logger()
+
+_MISSING = object()
+_TOMBSTONE = b""
+_SNAPSHOT_DATETIMES = ("created_at", "updated_at")
+
+
+class CacheBackend(Protocol):
+    """Shared cache store, e.g. a ``redis.Redis`` client."""
+
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None, nx: bool = False) -> Any: ...
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, name: str, max_size: int, ttl: float, clock=time.monotonic):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self._evicted("expired")
+                entry = None
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evicted("size")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evicted(self, reason: str) -> None:
+        self.evictions += 1
+        metrics.CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+
+
+def _snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def _dumps(snapshot: dict) -> bytes:
+    return json.dumps(snapshot, default=lambda value: value.isoformat()).encode()
+
+
+def _loads(payload: bytes) -> dict:
+    snapshot = json.loads(payload)
+    for key in _SNAPSHOT_DATETIMES:
+        if snapshot.get(key):
+            snapshot[key] = datetime.fromisoformat(snapshot[key])
+    return snapshot
+
+
+class AccountCache:
+    """Read-through cache for accounts keyed by lower-cased email.
+
+    Entries are column snapshots, so every hit hands out a fresh detached ``User``
+    that callers may mutate freely. Lookups go to the local LRU first, then to the
+    optional shared backend. Not-found emails are cached only when
+    ``negative_max_size`` is set, in a separate, smaller LRU with its own TTL.
+
+    Other processes share the backend but not the generation, so an invalidation
+    leaves a tombstone there for ``tombstone_ttl`` seconds and fills only write
+    keys that are absent (SET NX): a snapshot read before a write in another
+    process cannot replace the tombstone, as long as the read took less than that.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl: float = 30,
+        shared: Optional[CacheBackend] = None,
+        shared_ttl: int = 300,
+        tombstone_ttl: int = 10,
+        negative_max_size: int = 0,
+        negative_ttl: float = 5,
+        key_prefix: str = "accounts:email:",
+    ):
+        self.local = LRUCache("accounts", max_size, ttl)
+        self.negative = LRUCache("accounts_negative", negative_max_size, negative_ttl)
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.tombstone_ttl = tombstone_ttl
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every invalidation; pass it back to ``put`` to skip stale fills."""
+        return self._generation
+
+    def get(self, email: str) -> Tuple[bool, Optional[User]]:
+        """Return ``(found, account)``; a found ``None`` is a cached not-found."""
+        email = email.lower()
+        snapshot = self.local.get(email, _MISSING)
+        if snapshot is _MISSING and self.shared is not None:
+            snapshot = self._shared_get(email)
+            if snapshot is not _MISSING:
+                self.local.set(email, snapshot)
+        if snapshot is not _MISSING:
+            self.hits += 1
+            metrics.CACHE_LOOKUPS.labels(cache="accounts", result="hit").inc()
+            return True, User(**snapshot)
+        if self.negative.max_size > 0 and self.negative.get(email, _MISSING) is not _MISSING:
+            self.negative_hits += 1
+            metrics.CACHE_LOOKUPS.labels(cache="accounts", result="negative_hit").inc()
+            return True, None
+        self.misses += 1
+        metrics.CACHE_LOOKUPS.labels(cache="accounts", result="miss").inc()
+        return False, None
+
+    def put(self, email: str, account: Optional[User], generation: int) -> None:
+        email = email.lower()
+        snapshot = None if account is None else _snapshot(account)
+        with self._generation_lock:
+            if generation != self._generation:
+                return
+            if snapshot is None:
+                self.negative.set(email, True)
+                return
+            self.local.set(email, snapshot)
+        if self.shared is not None:
+            self._shared_call("set", self.key_prefix + email, _dumps(snapshot), ex=self.shared_ttl, nx=True)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.local.evictions + self.negative.evictions,
+            "size": len(self.local),
+            "negative_size": len(self.negative),
+        }
+
+    def invalidate(self, *emails: str) -> None:
+        emails = tuple(email.lower() for email in emails)
+        with self._generation_lock:
+            self._generation += 1
+        for email in emails:
+            self.local.delete(email)
+            self.negative.delete(email)
+        if self.shared is not None:
+            for email in emails:
+                self._shared_call("set", self.key_prefix + email, _TOMBSTONE, ex=self.tombstone_ttl)
+
+    def _shared_get(self, email: str):
+        payload = self._shared_call("get", self.key_prefix + email)
+        if not payload:
+            return _MISSING
+        return _loads(payload)
+
+    def _shared_call(self, name: str, *args, **kwargs):
+        # The shared backend is an optimisation; never fail a request because of it.
+        try:
+            return getattr(self.shared, name)(*args, **kwargs)
+        except Exception as exc:
+            logger.warning("Shared account cache unavailable", operation=name, error=str(exc))
+            return None
+
+
+def account_cache_from_env(processes: int = 1) -> Optional[AccountCache]:
+    """The account cache configured by ACCOUNTS_CACHE_*, or None when it is disabled.
+
+    A write only invalidates the cache of the process that made it, so when
+    ``processes`` workers serve the same accounts the in-process layers are
+    left out: the cache then uses the shared backend alone, or is disabled
+    without one.
+    """
+    max_size = int(os.getenv("ACCOUNTS_CACHE_SIZE", "10000"))
+    if max_size <= 0:
+        return None
+    shared = None
+    redis_url = os.getenv("ACCOUNTS_CACHE_REDIS_URL")
+    if redis_url:
+        import redis  # only needed when the shared backend is enabled
+
+        shared = redis.Redis.from_url(redis_url)
+    negative_max_size = int(os.getenv("ACCOUNTS_NEGATIVE_CACHE_SIZE", "0"))
+    if processes > 1:
+        if shared is None:
+            logger.info("Account cache disabled: no shared backend for multiple processes", processes=processes)
+            return None
+        max_size = negative_max_size = 0
+    return AccountCache(
+        max_size=max_size,
+        ttl=float(os.getenv("ACCOUNTS_CACHE_TTL", "30")),
+        shared=shared,
+        negative_max_size=negative_max_size,
+        negative_ttl=float(os.getenv("ACCOUNTS_NEGATIVE_CACHE_TTL", "5")),
+    )
@@ -0,0 +1,194 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from accounts import cache
+from accounts.models.users import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBackend:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+def make_user(email="test@example.com", **overrides):
+    fields = dict(
+        id=1,
+        email=email,
+        first_name="Test",
+        last_name="User",
+        hashed_password="pw",
+        is_active=True,
+        is_verified=False,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2025, 1, 2, tzinfo=timezone.utc),
+    )
+    fields.update(overrides)
+    return User(**fields)
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = cache.LRUCache("test", max_size=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.evictions, 1)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        lru = cache.LRUCache("test", max_size=2, ttl=10, clock=clock)
+        lru.set("a", 1)
+
+        clock.now = 9
+        self.assertEqual(lru.get("a"), 1)
+        clock.now = 10
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 0)
+        self.assertEqual(lru.evictions, 1)
+
+    def test_zero_size_disables_cache(self):
+        lru = cache.LRUCache("test", max_size=0, ttl=10)
+        lru.set("a", 1)
+        self.assertIsNone(lru.get("a"))
+
+
+class AccountCacheTest(unittest.TestCase):
+    def test_hit_returns_fresh_copy(self):
+        account_cache = cache.AccountCache()
+        account_cache.put("test@example.com", make_user(), account_cache.generation)
+
+        found, first = account_cache.get("test@example.com")
+        first.first_name = "Changed"
+        _, second = account_cache.get("test@example.com")
+
+        self.assertTrue(found)
+        self.assertEqual(second.first_name, "Test")
+        self.assertEqual(account_cache.stats()["hits"], 2)
+
+    def test_keys_ignore_email_case(self):
+        account_cache = cache.AccountCache()
+        account_cache.put("Test@Example.com", make_user(), account_cache.generation)
+        self.assertTrue(account_cache.get("test@example.com")[0])
+
+        account_cache.invalidate("TEST@example.com")
+        self.assertEqual(account_cache.get("Test@Example.com"), (False, None))
+
+    def test_miss_is_counted(self):
+        account_cache = cache.AccountCache()
+        self.assertEqual(account_cache.get("missing@example.com"), (False, None))
+        self.assertEqual(account_cache.stats()["misses"], 1)
+
+    def test_negative_caching_disabled_by_default(self):
+        account_cache = cache.AccountCache()
+        account_cache.put("missing@example.com", None, account_cache.generation)
+        self.assertEqual(account_cache.get("missing@example.com"), (False, None))
+
+    def test_negative_caching_is_bounded(self):
+        account_cache = cache.AccountCache(negative_max_size=2)
+        for i in range(3):
+            account_cache.put(f"missing{i}@example.com", None, account_cache.generation)
+
+        self.assertEqual(account_cache.get("missing2@example.com"), (True, None))
+        self.assertEqual(account_cache.get("missing0@example.com"), (False, None))
+        self.assertEqual(account_cache.stats()["negative_size"], 2)
+
+    def test_put_after_invalidation_is_skipped(self):
+        account_cache = cache.AccountCache()
+        generation = account_cache.generation
+        account_cache.invalidate("test@example.com")
+
+        account_cache.put("test@example.com", make_user(), generation)
+
+        self.assertEqual(account_cache.get("test@example.com"), (False, None))
+
+    def test_invalidate_drops_local_negative_and_shared_entries(self):
+        backend = FakeBackend()
+        account_cache = cache.AccountCache(shared=backend, negative_max_size=10)
+        account_cache.put("old@example.com", make_user("old@example.com"), account_cache.generation)
+        account_cache.put("new@example.com", None, account_cache.generation)
+
+        account_cache.invalidate("old@example.com", "new@example.com")
+
+        self.assertEqual(account_cache.get("old@example.com"), (False, None))
+        self.assertEqual(account_cache.get("new@example.com"), (False, None))
+        self.assertEqual(backend.store, {"accounts:email:old@example.com": b"", "accounts:email:new@example.com": b""})
+
+    def test_shared_backend_fills_local_cache(self):
+        backend = FakeBackend()
+        cache.AccountCache(shared=backend).put("test@example.com", make_user(), 0)
+        account_cache = cache.AccountCache(shared=backend)
+
+        found, account = account_cache.get("test@example.com")
+
+        self.assertTrue(found)
+        self.assertEqual(account.id, 1)
+        self.assertEqual(account.created_at, datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(len(account_cache.local), 1)
+
+    def test_stale_fill_from_another_process_does_not_replace_the_invalidation(self):
+        backend = FakeBackend()
+        reader, writer = cache.AccountCache(shared=backend), cache.AccountCache(shared=backend)
+        generation = reader.generation
+
+        writer.invalidate("test@example.com")
+        reader.put("test@example.com", make_user(first_name="Stale"), generation)
+
+        self.assertEqual(writer.get("test@example.com"), (False, None))
+
+    @mock.patch.object(cache.logger, "warning")
+    def test_shared_backend_errors_fall_back_to_miss(self, mock_warning_logger):
+        backend = mock.Mock()
+        backend.get.side_effect = ConnectionError("down")
+        account_cache = cache.AccountCache(shared=backend)
+
+        self.assertEqual(account_cache.get("test@example.com"), (False, None))
+        mock_warning_logger.assert_called_once_with("Shared account cache unavailable", operation="get", error="down")
+
+    @mock.patch.dict("os.environ", {"ACCOUNTS_CACHE_SIZE": "0"})
+    def test_account_cache_from_env_disabled(self):
+        self.assertIsNone(cache.account_cache_from_env())
+
+    def test_account_cache_from_env_is_off_for_multiple_processes_without_shared_backend(self):
+        self.assertIsNotNone(cache.account_cache_from_env(processes=1))
+        self.assertIsNone(cache.account_cache_from_env(processes=4))
+
+    @mock.patch.dict("os.environ", {"ACCOUNTS_CACHE_REDIS_URL": "redis://cache:6379/0"})
+    def test_account_cache_from_env_is_shared_only_for_multiple_processes(self):
+        backend = FakeBackend()
+        redis = mock.Mock()
+        redis.Redis.from_url.return_value = backend
+        with mock.patch.dict("sys.modules", {"redis": redis}):
+            first, second = cache.account_cache_from_env(processes=2), cache.account_cache_from_env(processes=2)
+        first.put("test@example.com", make_user(), first.generation)
+        self.assertTrue(second.get("test@example.com")[0])
+
+        first.invalidate("test@example.com")
+
+        self.assertEqual(second.get("test@example.com"), (False, None))
+        self.assertEqual(len(second.local), 0)
@@ -1,11 +1,32 @@
+import itertools
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import URL
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from accounts import metrics
+
+SessionFactory = Callable[[], Session]
+AsyncSessionFactory = Callable[[], AsyncSession]
 
 _engine = None
 _SessionLocal = None
+_async_engine = None
+_replica_engines = None
+# Every engine create_pooled_engine made that is still referenced, for dispose_engines.
+_pooled_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+_session_scope: ContextVar[Optional[int]] = ContextVar("accounts_session_scope", default=None)
+_scope_ids = itertools.count(1)
 
 
 def get_db_url() -> URL:
@@ -23,15 +44,222 @@ def get_db_url() -> URL:
     )
 
 
-def get_engine():
+def get_replica_urls() -> List[URL]:
+    """Replica URLs from DB_REPLICA_HOSTS ("host[:port],..."), with the primary's credentials and database."""
+    primary = get_db_url()
+    urls = []
+    for entry in filter(None, (part.strip() for part in os.getenv("DB_REPLICA_HOSTS", "").split(","))):
+        host, _, port = entry.partition(":")
+        try:
+            urls.append(primary.set(host=host, port=int(port) if port else primary.port))
+        except ValueError as exc:
+            raise ValueError(f"Invalid DB_REPLICA_HOSTS entry: {entry!r}") from exc
+    return urls
+
+
+def get_async_db_url() -> URL:
+    return get_db_url().set(drivername="mysql+aiomysql")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(f"Invalid {name}: {value!r}") from exc
+
+
+def get_pool_settings(max_workers: Optional[int] = None) -> dict:
+    """Pool settings from the environment, sized to the gRPC worker count by default.
+
+    Every worker holds at most one connection at a time, so the pool gets one
+    connection per worker plus a small overflow for out-of-band work.
+    """
+    pool_size = _env_int("DB_POOL_SIZE", max_workers or 5)
+    return {
+        "pool_size": pool_size,
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 2),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+    }
+
+
+def _timed_pool_class(name: str, base: type = QueuePool) -> type:
+    # The pool name lives on the class so it survives QueuePool.recreate() on dispose.
+    class TimedQueuePool(base):
+        metrics_name = name
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                metrics.DB_POOL_CHECKOUT_TIMEOUTS.labels(pool=self.metrics_name).inc()
+                raise
+            finally:
+                metrics.DB_POOL_CHECKOUT_SECONDS.labels(pool=self.metrics_name).observe(time.perf_counter() - start)
+
+    return TimedQueuePool
+
+
+def _instrument_pool(engine: Engine, name: str, capacity: int) -> None:
+    # The gauges live as long as the process; a weak reference lets a disposed engine be collected.
+    engine_ref = weakref.ref(engine)
+
+    def checked_out() -> int:
+        live = engine_ref()
+        return live.pool.checkedout() if live is not None else 0
+
+    metrics.DB_POOL_CAPACITY.labels(pool=name).set(capacity)
+    metrics.DB_POOL_CHECKED_OUT.labels(pool=name).set_function(checked_out)
+    metrics.DB_POOL_SATURATION.labels(pool=name).set_function(lambda: checked_out() / capacity if capacity > 0 else 0.0)
+
+
+class QueryTimer:
+    """Time and number of statements executed while it is the current timer."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+
+
+_query_timer: ContextVar[Optional[QueryTimer]] = ContextVar("accounts_query_timer", default=None)
+
+
+@contextmanager
+def track_query_time() -> Iterator[QueryTimer]:
+    """Attribute the DB time of every statement run in this context (thread or task) to the yielded timer."""
+    timer = QueryTimer()
+    token = _query_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _query_timer.reset(token)
+
+
+def _instrument_queries(engine: Engine, name: str) -> None:
+    histogram = metrics.DB_QUERY_SECONDS.labels(pool=name)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        histogram.observe(elapsed)
+        timer = _query_timer.get()
+        if timer is not None:
+            timer.seconds += elapsed
+            timer.queries += 1
+
+    def handle_error(exception_context):
+        # after_cursor_execute does not fire for a failed statement.
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+def create_pooled_engine(url, max_workers: Optional[int] = None, name: str = "primary", **kwargs) -> Engine:
+    settings = get_pool_settings(max_workers)
+    engine = create_engine(url, poolclass=_timed_pool_class(name), **settings, **kwargs)
+    capacity = settings["pool_size"] + settings["max_overflow"] if settings["max_overflow"] >= 0 else 0
+    _instrument_pool(engine, name, capacity)
+    _instrument_queries(engine, name)
+    _pooled_engines.add(engine)
+    return engine
+
+
+def dispose_engines() -> int:
+    """Close the pooled connections of every sync engine (primary, replicas, shards); returns how many engines."""
+    engines = list(_pooled_engines)
+    for engine in engines:
+        engine.dispose()
+    return len(engines)
+
+
+def create_pooled_async_engine(url, max_workers: Optional[int] = None, name: str = "primary", **kwargs) -> AsyncEngine:
+    settings = get_pool_settings(max_workers)
+    engine = create_async_engine(url, poolclass=_timed_pool_class(name, AsyncAdaptedQueuePool), **settings, **kwargs)
+    capacity = settings["pool_size"] + settings["max_overflow"] if settings["max_overflow"] >= 0 else 0
+    _instrument_pool(engine.sync_engine, name, capacity)
+    _instrument_queries(engine.sync_engine, name)
+    return engine
+
+
+def get_engine(max_workers: Optional[int] = None) -> Engine:
     global _engine
     if _engine is None:
-        _engine = create_engine(get_db_url(), echo=False)
+        _engine = create_pooled_engine(get_db_url(), max_workers=max_workers, echo=False)
     return _engine
 
 
-def get_session() -> Session:
+def get_replica_engines(max_workers: Optional[int] = None) -> List[Engine]:
+    global _replica_engines
+    if _replica_engines is None:
+        _replica_engines = [
+            create_pooled_engine(url, max_workers=max_workers, name=f"replica-{i}", echo=False)
+            for i, url in enumerate(get_replica_urls())
+        ]
+    return _replica_engines
+
+
+def get_async_engine(max_workers: Optional[int] = None) -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_pooled_async_engine(get_async_db_url(), max_workers=max_workers, echo=False)
+    return _async_engine
+
+
+def get_async_session_factory(bind: Optional[AsyncEngine] = None) -> AsyncSessionFactory:
+    # Objects are returned to the service after the session closes, so keep them loaded after commit.
+    return async_sessionmaker(bind=bind or get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+def get_sessionmaker() -> sessionmaker:
     global _SessionLocal
     if _SessionLocal is None:
         _SessionLocal = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
-    return _SessionLocal()
+    return _SessionLocal
+
+
+def get_session() -> Session:
+    return get_sessionmaker()()
+
+
+def _current_scope():
+    scope = _session_scope.get()
+    if scope is None:
+        return ("thread", threading.get_ident())
+    return ("context", scope)
+
+
+def get_session_factory(scoped: bool = False, bind=None) -> SessionFactory:
+    """Return a callable producing a fresh session for each unit of work.
+
+    With ``scoped=True`` every call made inside the same ``session_scope`` (or,
+    outside of one, on the same thread) returns the same session.
+    """
+    if bind is None:
+        factory = get_sessionmaker()
+    else:
+        factory = sessionmaker(bind=bind, autoflush=False, autocommit=False)
+    if scoped:
+        return scoped_session(factory, scopefunc=_current_scope)
+    return factory
+
+
+@contextmanager
+def session_scope(factory: SessionFactory) -> Iterator[None]:
+    token = _session_scope.set(next(_scope_ids))
+    try:
+        yield
+    finally:
+        if isinstance(factory, scoped_session):
+            factory.remove()
+        _session_scope.reset(token)
@@ -1,6 +1,11 @@
+import gc
 import os
-
+import tempfile
 import unittest
+import weakref
+from unittest import mock
+
+from prometheus_client import REGISTRY
 from sqlalchemy.engine import URL
 
 os.environ["DB_URL"] = "sqlite:///:memory:"
@@ -28,3 +33,96 @@ class TestDatabase(unittest.TestCase):
         )
         url = db.get_db_url()
         self.assertEqual(url, expected_url)
+
+    @mock.patch.dict(os.environ, {"DB_REPLICA_HOSTS": "replica-a, replica-b:3307"})
+    def test_get_replica_urls(self):
+        urls = db.get_replica_urls()
+        self.assertEqual([(url.host, url.port) for url in urls], [("replica-a", 3306), ("replica-b", 3307)])
+        self.assertEqual({url.database for url in urls}, {"accounts"})
+
+    def test_scoped_session_factory_shares_session_within_scope(self):
+        engine = db.create_engine("sqlite:///:memory:")
+        factory = db.get_session_factory(scoped=True, bind=engine)
+
+        with db.session_scope(factory):
+            first = factory()
+            self.assertIs(first, factory())
+        with db.session_scope(factory):
+            self.assertIsNot(first, factory())
+
+        engine.dispose()
+
+    def test_session_factory_returns_new_session_per_call(self):
+        engine = db.create_engine("sqlite:///:memory:")
+        factory = db.get_session_factory(bind=engine)
+
+        self.assertIsNot(factory(), factory())
+
+        engine.dispose()
+
+    @mock.patch.dict(os.environ, {}, clear=True)
+    def test_get_pool_settings_sized_from_max_workers(self):
+        settings = db.get_pool_settings(max_workers=16)
+        self.assertEqual(settings["pool_size"], 16)
+        self.assertEqual(settings["max_overflow"], 2)
+        self.assertTrue(settings["pool_pre_ping"])
+
+    @mock.patch.dict(
+        os.environ,
+        {"DB_POOL_SIZE": "4", "DB_MAX_OVERFLOW": "0", "DB_POOL_RECYCLE": "60", "DB_POOL_PRE_PING": "0"},
+    )
+    def test_get_pool_settings_from_env(self):
+        settings = db.get_pool_settings(max_workers=16)
+        self.assertEqual(settings["pool_size"], 4)
+        self.assertEqual(settings["max_overflow"], 0)
+        self.assertEqual(settings["pool_recycle"], 60)
+        self.assertFalse(settings["pool_pre_ping"])
+
+    @mock.patch.dict(os.environ, {"DB_POOL_SIZE": "nope"})
+    def test_get_pool_settings_invalid_value(self):
+        with self.assertRaises(ValueError):
+            db.get_pool_settings()
+
+    @mock.patch.dict(os.environ, {"DB_POOL_SIZE": "2", "DB_MAX_OVERFLOW": "0", "DB_POOL_TIMEOUT": "1"})
+    def test_pooled_engine_reports_checkout_metrics(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = db.create_pooled_engine("sqlite:///" + os.path.join(tmpdir, "test.db"), name="test")
+            labels = {"pool": "test"}
+            first, second = engine.connect(), engine.connect()
+
+            self.assertEqual(REGISTRY.get_sample_value("accounts_db_pool_saturation", labels), 1.0)
+            self.assertEqual(REGISTRY.get_sample_value("accounts_db_pool_checkout_seconds_count", labels), 2)
+
+            first.close()
+            second.close()
+            self.assertEqual(REGISTRY.get_sample_value("accounts_db_pool_checked_out", labels), 0)
+            engine.dispose()
+
+    def test_pool_metrics_do_not_keep_the_engine_alive(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = db.create_pooled_engine("sqlite:///" + os.path.join(tmpdir, "test.db"), name="collected")
+            engine.connect().close()
+            engine.dispose()
+            engine_ref = weakref.ref(engine)
+            del engine
+            gc.collect()
+
+            self.assertIsNone(engine_ref())
+            self.assertEqual(REGISTRY.get_sample_value("accounts_db_pool_checked_out", {"pool": "collected"}), 0)
+
+    def test_track_query_time_attributes_statements_to_context(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = db.create_pooled_engine("sqlite:///" + os.path.join(tmpdir, "test.db"), name="timed")
+            with engine.connect() as conn:
+                with db.track_query_time() as timer:
+                    conn.exec_driver_sql("SELECT 1")
+                    conn.exec_driver_sql("SELECT 2")
+                conn.exec_driver_sql("SELECT 3")
+                with self.assertRaises(Exception), db.track_query_time() as failed:
+                    conn.exec_driver_sql("SELECT * FROM missing")
+            engine.dispose()
+
+        self.assertEqual(timer.queries, 2)
+        self.assertGreater(timer.seconds, 0)
+        self.assertEqual(failed.queries, 0)
+        self.assertEqual(REGISTRY.get_sample_value("accounts_db_query_seconds_count", {"pool": "timed"}), 3)
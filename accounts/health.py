@@ -0,0 +1,174 @@
+import asyncio
+import os
+import threading
+from typing import Dict, Mapping, Optional, Sequence
+
+import structlog
+from grpc_health.v1 import health, health_pb2
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from accounts import metrics
+from accounts.db import SessionFactory
+
+logger = structlog.get_logger()
+
+HEALTH_INTERVAL = float(os.getenv("ACCOUNTS_HEALTH_INTERVAL", "5"))
+HEALTH_FAILURE_THRESHOLD = int(os.getenv("ACCOUNTS_HEALTH_FAILURE_THRESHOLD", "2"))
+
+SERVING = health_pb2.HealthCheckResponse.SERVING
+NOT_SERVING = health_pb2.HealthCheckResponse.NOT_SERVING
+
+
+class _PingStatus:
+    """Turns ping results into a serving status, flipping to NOT_SERVING after ``failure_threshold`` bad rounds."""
+
+    def __init__(self, services: Sequence[str], interval: float, failure_threshold: int):
+        self.services = list(services)
+        self.interval = interval
+        self.failure_threshold = failure_threshold
+        self.failures = 0
+        self.status: Optional[int] = None
+
+    def record(self, errors: Dict[str, Optional[str]]) -> Optional[int]:
+        """Account for one round of pings (database -> error or None); returns the new status if it changed."""
+        for database, error in errors.items():
+            metrics.DB_PING_UP.labels(database=database).set(0 if error else 1)
+        failed = {database: error for database, error in errors.items() if error}
+        self.failures = self.failures + 1 if failed else 0
+        if failed:
+            logger.warning("Database ping failed", failures=self.failures, errors=failed)
+        if self.status is None:
+            status = NOT_SERVING if failed else SERVING
+        elif self.failures >= self.failure_threshold:
+            status = NOT_SERVING
+        elif not failed:
+            status = SERVING
+        else:
+            status = self.status
+        if status == self.status:
+            return None
+        if self.status is not None:
+            logger.info("Health status changed", status=health_pb2.HealthCheckResponse.ServingStatus.Name(status))
+        self.status = status
+        return status
+
+
+class DatabaseHealthChecker:
+    """Keeps a grpc.health.v1 servicer's status in step with a periodic ``SELECT 1`` on each database.
+
+    Probes only read the status the background thread last set, so however
+    often the load balancer asks, the database sees one ping per database per
+    ``interval`` seconds. The first failure is tolerated while serving; the
+    service is reported NOT_SERVING after ``failure_threshold`` consecutive
+    failed rounds and SERVING again after the first good one.
+    """
+
+    def __init__(
+        self,
+        servicer: health.HealthServicer,
+        session_factories: Mapping[str, SessionFactory],
+        services: Sequence[str] = ("",),
+        interval: float = HEALTH_INTERVAL,
+        failure_threshold: int = HEALTH_FAILURE_THRESHOLD,
+    ):
+        self.servicer = servicer
+        self.session_factories = dict(session_factories)
+        self._status = _PingStatus(services, interval, failure_threshold)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def status(self) -> Optional[int]:
+        return self._status.status
+
+    def _ping(self, session_factory: SessionFactory) -> Optional[str]:
+        try:
+            with session_factory() as session:
+                session.execute(text("SELECT 1"))
+        except SQLAlchemyError as exc:
+            return str(exc)
+        return None
+
+    def check(self) -> int:
+        """Ping every database once, update the servicer and return the resulting status."""
+        errors = {name: self._ping(session_factory) for name, session_factory in self.session_factories.items()}
+        status = self._status.record(errors)
+        if status is not None:
+            for service in self._status.services:
+                self.servicer.set(service, status)
+        return self._status.status
+
+    def start(self) -> "DatabaseHealthChecker":
+        """Check once now, then every ``interval`` seconds on a background thread."""
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="db-health", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._status.interval):
+            self.check()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class AsyncDatabaseHealthChecker:
+    """DatabaseHealthChecker for the grpc.aio server: pings async engines from a task on the event loop."""
+
+    def __init__(
+        self,
+        servicer: health.aio.HealthServicer,
+        engines: Mapping[str, AsyncEngine],
+        services: Sequence[str] = ("",),
+        interval: float = HEALTH_INTERVAL,
+        failure_threshold: int = HEALTH_FAILURE_THRESHOLD,
+    ):
+        self.servicer = servicer
+        self.engines = dict(engines)
+        self._status = _PingStatus(services, interval, failure_threshold)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def status(self) -> Optional[int]:
+        return self._status.status
+
+    async def _ping(self, engine: AsyncEngine) -> Optional[str]:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except SQLAlchemyError as exc:
+            return str(exc)
+        return None
+
+    async def check(self) -> int:
+        errors = {name: await self._ping(engine) for name, engine in self.engines.items()}
+        status = self._status.record(errors)
+        if status is not None:
+            for service in self._status.services:
+                await self.servicer.set(service, status)
+        return self._status.status
+
+    async def start(self) -> "AsyncDatabaseHealthChecker":
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._status.interval)
+            await self.check()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
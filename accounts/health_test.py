@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from concurrent import futures
+
+import grpc
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from accounts import health as db_health
+
+
+class FlakyDatabase:
+    """A session factory over in-memory SQLite that fails while ``down`` is set, counting pings."""
+
+    def __init__(self):
+        self.engine = create_engine("sqlite://")
+        self.factory = sessionmaker(bind=self.engine)
+        self.down = False
+        self.pings = 0
+
+    def __call__(self):
+        self.pings += 1
+        if self.down:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        return self.factory()
+
+
+class DatabaseHealthCheckerTest(unittest.TestCase):
+    def setUp(self):
+        self.database = FlakyDatabase()
+        self.addCleanup(self.database.engine.dispose)
+        self.servicer = health.HealthServicer()
+        self.checker = db_health.DatabaseHealthChecker(
+            self.servicer, {"primary": self.database}, services=("", "accounts.AccountService"), interval=60
+        )
+
+    def _status(self, service=""):
+        return self.servicer.Check(health_pb2.HealthCheckRequest(service=service), None).status
+
+    def test_flips_after_consecutive_failures_and_recovers(self):
+        self.assertEqual(self.checker.check(), db_health.SERVING)
+        self.assertEqual(self._status("accounts.AccountService"), db_health.SERVING)
+
+        self.database.down = True
+        self.checker.check()
+        self.assertEqual(self._status(), db_health.SERVING)
+        self.checker.check()
+        self.assertEqual(self._status(), db_health.NOT_SERVING)
+        self.assertEqual(self._status("accounts.AccountService"), db_health.NOT_SERVING)
+
+        self.database.down = False
+        self.checker.check()
+        self.assertEqual(self._status(), db_health.SERVING)
+
+    def test_starts_not_serving_when_the_database_is_down(self):
+        self.database.down = True
+        self.assertEqual(self.checker.check(), db_health.NOT_SERVING)
+
+    def test_graceful_shutdown_is_not_undone(self):
+        self.checker.check()
+        self.database.down = True
+        self.checker.check()
+        self.checker.check()
+        self.servicer.enter_graceful_shutdown()
+
+        self.database.down = False
+        self.checker.check()
+        self.assertEqual(self._status(), db_health.NOT_SERVING)
+
+    def test_probes_read_the_cached_status(self):
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        health_pb2_grpc.add_HealthServicer_to_server(self.servicer, server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        self.addCleanup(server.stop, None)
+        self.checker.start()
+        self.addCleanup(self.checker.close)
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.addCleanup(channel.close)
+        stub = health_pb2_grpc.HealthStub(channel)
+
+        for _ in range(20):
+            response = stub.Check(health_pb2.HealthCheckRequest(service="accounts.AccountService"), timeout=5)
+            self.assertEqual(response.status, db_health.SERVING)
+        self.assertEqual(self.database.pings, 1)
+
+
+class AsyncDatabaseHealthCheckerTest(unittest.TestCase):
+    def test_pings_the_async_engine(self):
+        async def scenario():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            servicer = health.aio.HealthServicer()
+            checker = await db_health.AsyncDatabaseHealthChecker(servicer, {"primary": engine}, interval=60).start()
+            try:
+                response = await servicer.Check(health_pb2.HealthCheckRequest(service=""), None)
+                return checker.status, response.status
+            finally:
+                await checker.close()
+                await engine.dispose()
+
+        self.assertEqual(asyncio.run(scenario()), (db_health.SERVING, db_health.SERVING))
+
+
+if __name__ == "__main__":
+    unittest.main()
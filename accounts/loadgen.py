@@ -0,0 +1,357 @@
+"""Load generator for AccountService.
+
+Drives a weighted mix of Get/Create/Update/Delete calls from a sync (threads)
+or async (grpc.aio) client for a fixed duration, optionally at a fixed request
+rate, and reports throughput and latency percentiles per operation:
+
+    # against a running server (TLS, certificates from accounts/certs)
+    python -m accounts.loadgen --target localhost:50051 --concurrency 32 --duration 30
+
+    # fully local: starts a server on a throwaway SQLite database
+    python -m accounts.loadgen --local sync --client async --mix get=90,update=10 --json results.json
+
+With --rate latencies are measured from each request's scheduled send time,
+so a stalled server shows up as latency rather than as fewer requests.
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent import futures
+from typing import Callable, Dict, List, Optional, Tuple
+
+import grpc
+from codegen.accounts import service_pb2, service_pb2_grpc
+
+from accounts import main
+from accounts.server_bench import percentile, seed_database, start_server_process
+from accounts.utils import creds_utils
+
+OPERATIONS = ("get", "create", "update", "delete")
+DEFAULT_MIX = "get=70,create=10,update=15,delete=5"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "get=70,create=10" into weights normalised to sum to 1."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError(f"Operation mix {spec!r} has no positive weights")
+    return {name: weight / total for name, weight in weights.items() if weight > 0}
+
+
+class AccountPool:
+    """Accounts known to exist on the server, shared by all workers.
+
+    Picks and removals are O(1): accounts sit in a list, indexed by id, and a
+    removed account is swapped with the last one before popping it.
+    """
+
+    def __init__(self):
+        self._accounts: List[Tuple[int, str]] = []
+        self._index: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def add(self, account_id: int, email: str) -> None:
+        with self._lock:
+            if account_id in self._index:
+                self._accounts[self._index[account_id]] = (account_id, email)
+            else:
+                self._index[account_id] = len(self._accounts)
+                self._accounts.append((account_id, email))
+
+    def pick(self, rng: random.Random, remove: bool = False) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            if not self._accounts:
+                return None
+            position = rng.randrange(len(self._accounts))
+            picked = self._accounts[position]
+            if remove:
+                last = self._accounts.pop()
+                del self._index[picked[0]]
+                if last is not picked:
+                    self._accounts[position] = last
+                    self._index[last[0]] = position
+        return picked
+
+
+class Pacer:
+    """Hands out evenly spaced send times for a target rate; rate 0 means as fast as possible."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._slots = itertools.count()
+        self._lock = threading.Lock()
+        self._start = None
+
+    def next_slot(self) -> float:
+        now = time.perf_counter()
+        if not self.rate:
+            return now
+        with self._lock:
+            if self._start is None:
+                self._start = now
+            return self._start + next(self._slots) / self.rate
+
+
+class Recorder:
+    def __init__(self):
+        self._latencies: Dict[str, List[float]] = {op: [] for op in OPERATIONS}
+        self._errors: Dict[str, Dict[str, int]] = {op: {} for op in OPERATIONS}
+        self._lock = threading.Lock()
+
+    def record(self, op: str, latency: float, error: Optional[grpc.StatusCode] = None) -> None:
+        with self._lock:
+            if error is None:
+                self._latencies[op].append(latency)
+            else:
+                self._errors[op][error.name] = self._errors[op].get(error.name, 0) + 1
+
+    @staticmethod
+    def _stats(latencies: List[float], errors: Dict[str, int], elapsed: float) -> dict:
+        latencies = sorted(latencies)
+        return {
+            "requests": len(latencies),
+            "errors": dict(errors),
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p90_ms": percentile(latencies, 0.90) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+    def summary(self, elapsed: float) -> dict:
+        with self._lock:
+            operations = {
+                op: self._stats(self._latencies[op], self._errors[op], elapsed)
+                for op in OPERATIONS
+                if self._latencies[op] or self._errors[op]
+            }
+            all_errors = {}
+            for errors in self._errors.values():
+                for code, count in errors.items():
+                    all_errors[code] = all_errors.get(code, 0) + count
+            total = self._stats(list(itertools.chain(*self._latencies.values())), all_errors, elapsed)
+        return {"elapsed_s": elapsed, "total": total, "operations": operations}
+
+
+class Workload:
+    """Builds the next request for an operation and keeps the AccountPool in step with the server."""
+
+    def __init__(self, pool: AccountPool, mix: Dict[str, float], run_id: str):
+        self.pool = pool
+        self.ops = list(mix)
+        self.weights = list(mix.values())
+        self.run_id = run_id
+        self._serial = itertools.count()
+
+    def new_email(self) -> str:
+        return f"load-{self.run_id}-{next(self._serial)}@example.com"
+
+    def create_request(self, email: str) -> service_pb2.CreateAccountRequest:
+        return service_pb2.CreateAccountRequest(email=email, first_name="Load", last_name="Test", hashed_password="x")
+
+    def next_call(self, rng: random.Random) -> Tuple[str, str, object, Callable]:
+        """Return (op, RPC name, request, on_success callback)."""
+        op = rng.choices(self.ops, self.weights)[0]
+        # With no account left to pick (e.g. deletes outpacing creates) fall back to a create.
+        picked = self.pool.pick(rng, remove=op == "delete") if op != "create" else None
+        if picked is None:
+            return "create", "CreateAccount", self.create_request(self.new_email()), self._created
+        account_id, email = picked
+        if op == "get":
+            return op, "GetAccount", service_pb2.GetAccountRequest(email=email), _ignore
+        if op == "update":
+            request = service_pb2.UpdateAccountRequest(account_id=account_id, first_name=f"Load{rng.randrange(1000)}")
+            request.update_mask.paths.append("first_name")
+            return op, "UpdateAccount", request, _ignore
+        return op, "DeleteAccount", service_pb2.DeleteAccountRequest(account_id=account_id), _ignore
+
+    def _created(self, response) -> None:
+        self.pool.add(response.account.account_id, response.account.email)
+
+
+def _ignore(response) -> None:
+    pass
+
+
+def _sleep_until(when: float) -> None:
+    delay = when - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def run_sync(channel, workload: Workload, concurrency: int, duration: float, rate: float, seed: int) -> dict:
+    stub = service_pb2_grpc.AccountServiceStub(channel)
+    recorder, pacer = Recorder(), Pacer(rate)
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        while True:
+            scheduled = pacer.next_slot()
+            if scheduled >= deadline:
+                return
+            _sleep_until(scheduled)
+            op, method, request, on_success = workload.next_call(rng)
+            try:
+                on_success(getattr(stub, method)(request))
+            except grpc.RpcError as e:
+                recorder.record(op, time.perf_counter() - scheduled, e.code())
+            else:
+                recorder.record(op, time.perf_counter() - scheduled)
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+async def run_async(channel, workload: Workload, concurrency: int, duration: float, rate: float, seed: int) -> dict:
+    stub = service_pb2_grpc.AccountServiceStub(channel)
+    recorder, pacer = Recorder(), Pacer(rate)
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        while True:
+            scheduled = pacer.next_slot()
+            if scheduled >= deadline:
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            op, method, request, on_success = workload.next_call(rng)
+            try:
+                on_success(await getattr(stub, method)(request))
+            except grpc.aio.AioRpcError as e:
+                recorder.record(op, time.perf_counter() - scheduled, e.code())
+            else:
+                recorder.record(op, time.perf_counter() - scheduled)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def populate(channel, workload: Workload, accounts: int) -> None:
+    """Create the accounts that get/update/delete operate on before the clock starts."""
+    stub = service_pb2_grpc.AccountServiceStub(channel)
+    for _ in range(accounts):
+        response = stub.CreateAccount(workload.create_request(workload.new_email()))
+        workload.pool.add(response.account.account_id, response.account.email)
+
+
+def run(target: str, args, secure: bool) -> dict:
+    if secure:
+        credentials = grpc.ssl_channel_credentials(creds_utils.load_credentials()[0][1])
+        open_sync = functools.partial(grpc.secure_channel, target, credentials)
+        open_async = functools.partial(grpc.aio.secure_channel, target, credentials)
+    else:
+        open_sync = functools.partial(grpc.insecure_channel, target)
+        open_async = functools.partial(grpc.aio.insecure_channel, target)
+
+    workload = Workload(AccountPool(), parse_mix(args.mix), uuid.uuid4().hex[:8])
+    with open_sync() as channel:
+        populate(channel, workload, args.accounts)
+        if args.client == "sync":
+            return run_sync(channel, workload, args.concurrency, args.duration, args.rate, args.seed)
+
+    async def run_with_channel():
+        async with open_async() as channel:
+            return await run_async(channel, workload, args.concurrency, args.duration, args.rate, args.seed)
+
+    return asyncio.run(run_with_channel())
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: dict) -> None:
+    print(
+        f"{'operation':<10} {'ok':>8} {'errors':>7} {'rps':>9} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    rows = list(results["operations"].items()) + [("total", results["total"])]
+    for op, r in rows:
+        errors = sum(r["errors"].values())
+        print(
+            f"{op:<10} {r['requests']:>8} {errors:>7} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} "
+            f"{r['p90_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load test AccountService")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--target", default="localhost:50051", help="host:port of a running TLS server")
+    target.add_argument("--local", choices=["sync", "aio"], help="Start a local server in this mode on SQLite")
+    parser.add_argument("--client", choices=["sync", "async"], default="sync", help="Threaded or grpc.aio client")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent workers")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. get=80,create=20")
+    parser.add_argument("--rate", type=float, default=0, help="Target requests/s across all workers, 0 = unlimited")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--accounts", type=int, default=200, help="Accounts created before the run starts")
+    parser.add_argument("--workers", type=int, default=main.MAX_WORKERS, help="Local server thread pool / DB pool")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the operation sequence")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON to PATH ('-' for stdout)")
+    args = parser.parse_args()
+
+    if args.local:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "load.db")
+            seed_database(db_path, 0)
+            server, port = start_server_process(args.local, db_path, args.workers)
+            try:
+                results = run(f"127.0.0.1:{port}", args, secure=False)
+            finally:
+                server.terminate()
+                server.join()
+    else:
+        results = run(args.target, args, secure=True)
+
+    results["config"] = {
+        "target": f"local:{args.local}" if args.local else args.target,
+        "client": args.client,
+        "concurrency": args.concurrency,
+        "mix": parse_mix(args.mix),
+        "rate": args.rate,
+        "duration": args.duration,
+        "accounts": args.accounts,
+        "commit": _git_commit(),
+    }
+    if args.json == "-":
+        print(json.dumps(results, indent=2))
+        return
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main_cli()
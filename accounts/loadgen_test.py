@@ -0,0 +1,74 @@
+import os
+import random
+import tempfile
+import unittest
+
+import grpc
+
+from accounts import db, loadgen, main, repository
+from accounts.models import base
+
+
+class ParseMixTest(unittest.TestCase):
+    def test_normalises_weights(self):
+        self.assertEqual(loadgen.parse_mix("get=3, create=1,delete=0"), {"get": 0.75, "create": 0.25})
+
+    def test_rejects_unknown_or_empty_mix(self):
+        with self.assertRaises(ValueError):
+            loadgen.parse_mix("get=1,list=1")
+        with self.assertRaises(ValueError):
+            loadgen.parse_mix("get=0")
+
+
+class AccountPoolTest(unittest.TestCase):
+    def test_removing_swaps_the_last_account_into_place(self):
+        pool = loadgen.AccountPool()
+        for account_id in range(1, 6):
+            pool.add(account_id, f"user{account_id}@example.com")
+        pool.add(3, "renamed@example.com")
+        rng = random.Random(0)
+
+        removed = [pool.pick(rng, remove=True) for _ in range(5)]
+
+        self.assertEqual(sorted(removed)[2], (3, "renamed@example.com"))
+        self.assertEqual(sorted(account_id for account_id, _ in removed), [1, 2, 3, 4, 5])
+        self.assertEqual(len(pool), 0)
+        self.assertIsNone(pool.pick(rng))
+
+
+class WorkloadTest(unittest.TestCase):
+    def test_creates_when_no_account_to_pick(self):
+        workload = loadgen.Workload(loadgen.AccountPool(), {"delete": 1.0}, "run")
+        op, method, request, _ = workload.next_call(random.Random(0))
+        self.assertEqual((op, method), ("create", "CreateAccount"))
+        self.assertEqual(request.email, "load-run-0@example.com")
+
+    def test_delete_removes_account_from_pool(self):
+        workload = loadgen.Workload(loadgen.AccountPool(), {"delete": 1.0}, "run")
+        workload.pool.add(7, "a@example.com")
+        _, method, request, _ = workload.next_call(random.Random(0))
+        self.assertEqual((method, request.account_id), ("DeleteAccount", 7))
+        self.assertIsNone(workload.pool.pick(random.Random(0)))
+
+
+class RunTest(unittest.TestCase):
+    def test_sync_run_against_local_server(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = db.create_pooled_engine("sqlite:///" + os.path.join(tmpdir, "test.db"), max_workers=4)
+            base.Base.metadata.create_all(engine)
+            repo = repository.AccountRepository(db.get_session_factory(bind=engine))
+            server = main.create_server(repo, max_workers=4)
+            port = server.add_insecure_port("127.0.0.1:0")
+            server.start()
+            try:
+                workload = loadgen.Workload(loadgen.AccountPool(), loadgen.parse_mix("get=1,create=1"), "test")
+                with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+                    loadgen.populate(channel, workload, 5)
+                    results = loadgen.run_sync(channel, workload, concurrency=2, duration=0.5, rate=40, seed=1)
+            finally:
+                server.stop(None)
+                engine.dispose()
+
+        self.assertEqual(results["total"]["errors"], {})
+        self.assertLessEqual(results["total"]["requests"], 21)
+        self.assertGreater(results["operations"]["get"]["requests"], 0)
@@ -1,21 +1,68 @@
+import asyncio
+import atexit
 import logging
+import os
+import signal
 import sys
+import threading
+import time
 from concurrent import futures
+from functools import partial
+from typing import Callable, Dict
 
 import grpc
 import structlog
-from codegen.accounts import service_pb2_grpc
+from codegen.accounts import service_pb2, service_pb2_grpc
+from grpc_health.v1 import health, health_pb2_grpc
+from prometheus_client import start_http_server
 from structlog.dev import ConsoleRenderer
 
-from accounts.db import get_session
+from accounts import metrics
+from accounts.admission import AdaptiveLimiter, limiter_from_env, method_priority
+from accounts.async_repository import AsyncAccountRepository
+from accounts.async_service import AsyncAccountService
+from accounts.cache import account_cache_from_env
+from accounts.db import (
+    SessionFactory,
+    dispose_engines,
+    get_async_engine,
+    get_async_session_factory,
+    get_engine,
+    get_session_factory,
+    track_query_time,
+)
+from accounts.health import AsyncDatabaseHealthChecker, DatabaseHealthChecker
+from accounts.outbox import OutboxPruner, OutboxRelay, pruner_from_env, relay_from_env
+from accounts.prefork import Supervisor
+from accounts.replicas import replica_router_from_env
 from accounts.repository import AccountRepository
 from accounts.service import AccountService
-from accounts.utils import creds_utils
+from accounts.sharding import sharded_repository_from_env
+from accounts.utils import creds_utils, log_utils
+
+MAX_WORKERS = int(os.getenv("ACCOUNTS_MAX_WORKERS", "10"))
+METRICS_PORT = int(os.getenv("ACCOUNTS_METRICS_PORT", "0"))
+SERVER_MODE = os.getenv("ACCOUNTS_SERVER_MODE", "sync")
+# Hard cap on RPCs queued or running, beyond which gRPC rejects calls before they reach the thread pool.
+MAX_CONCURRENT_RPCS = int(os.getenv("ACCOUNTS_MAX_CONCURRENT_RPCS", "100"))
+PROCESSES = int(os.getenv("ACCOUNTS_PROCESSES", "1"))
+DRAIN_SECONDS = float(os.getenv("ACCOUNTS_DRAIN_SECONDS", "30"))
+# Time between reporting NOT_SERVING and refusing new RPCs, for load balancers to stop routing here.
+SHUTDOWN_DELAY = float(os.getenv("ACCOUNTS_SHUTDOWN_DELAY", "0"))
+SERVICE_NAME = service_pb2.DESCRIPTOR.services_by_name["AccountService"].full_name
+# Lets every worker process bind port 50051; the kernel spreads connections across them.
+REUSEPORT_OPTIONS = (("grpc.so_reuseport", 1),)
 
 
 class LoggingInterceptor(grpc.ServerInterceptor):
-    def __init__(self, logger: structlog.BoundLogger):
+    """Logs a sample of unary requests and responses.
+    The messages are put on the log event as-is; redaction, truncation and
+    rendering happen on the QueueLogSink thread configured by configure_structlog.
+    """
+
+    def __init__(self, logger: structlog.BoundLogger, sampler: log_utils.LogSampler = None):
         self._logger = logger
+        self._sampler = sampler or log_utils.LogSampler()
 
     def intercept_service(self, continuation, handler_call_details):
         handler = continuation(handler_call_details)
@@ -25,7 +72,10 @@ class LoggingInterceptor(grpc.ServerInterceptor):
         method = handler_call_details.method
 
         if handler.unary_unary:
+
             def unary_unary(request, context):
+                if not self._sampler.sampled(method):
+                    return handler.unary_unary(request, context)
                 self._logger.info("gRPC request", method=method, request=request)
                 response = handler.unary_unary(request, context)
                 self._logger.info("gRPC response", method=method, response=response)
@@ -40,47 +90,500 @@ class LoggingInterceptor(grpc.ServerInterceptor):
         return handler
 
 
-def configure_structlog(local: bool = False) -> None:
+class AsyncLoggingInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, logger: structlog.BoundLogger, sampler: log_utils.LogSampler = None):
+        self._logger = logger
+        self._sampler = sampler or log_utils.LogSampler()
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method
+
+        if handler.unary_unary:
+
+            async def unary_unary(request, context):
+                if not self._sampler.sampled(method):
+                    return await handler.unary_unary(request, context)
+                self._logger.info("gRPC request", method=method, request=request)
+                response = await handler.unary_unary(request, context)
+                self._logger.info("gRPC response", method=method, response=response)
+                return response
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        return handler
+
+
+def _status_code(context, failed: bool) -> str:
+    code = context.code()
+    if code is None:
+        code = grpc.StatusCode.UNKNOWN if failed else grpc.StatusCode.OK
+    return code.name
+
+
+class _RpcObservation:
+    """Latency, DB time, in-flight and status metrics for a single RPC."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self._query_time = track_query_time()
+
+    def __enter__(self):
+        metrics.GRPC_SERVER_IN_FLIGHT.labels(method=self.method).inc()
+        self._timer = self._query_time.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def finish(self, context, failed: bool) -> None:
+        metrics.GRPC_SERVER_HANDLING_SECONDS.labels(method=self.method).observe(time.perf_counter() - self._start)
+        metrics.GRPC_SERVER_DB_SECONDS.labels(method=self.method).observe(self._timer.seconds)
+        metrics.GRPC_SERVER_HANDLED.labels(method=self.method, code=_status_code(context, failed)).inc()
+
+    def __exit__(self, *exc_info):
+        self._query_time.__exit__(*exc_info)
+        metrics.GRPC_SERVER_IN_FLIGHT.labels(method=self.method).dec()
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Per-method latency histograms, DB time, status code counters and in-flight gauges."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method
+
+        if handler.unary_unary:
+
+            def unary_unary(request, context):
+                with _RpcObservation(method) as observation:
+                    try:
+                        response = handler.unary_unary(request, context)
+                    except BaseException:
+                        observation.finish(context, failed=True)
+                        raise
+                    observation.finish(context, failed=False)
+                    return response
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        if handler.unary_stream:
+
+            def unary_stream(request, context):
+                # The whole stream is one observation: it is in flight until the last message is sent.
+                with _RpcObservation(method) as observation:
+                    try:
+                        yield from handler.unary_stream(request, context)
+                    except BaseException:
+                        observation.finish(context, failed=True)
+                        raise
+                    observation.finish(context, failed=False)
+
+            return grpc.unary_stream_rpc_method_handler(
+                unary_stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        return handler
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method
+
+        if handler.unary_unary:
+
+            async def unary_unary(request, context):
+                with _RpcObservation(method) as observation:
+                    try:
+                        response = await handler.unary_unary(request, context)
+                    except BaseException:
+                        observation.finish(context, failed=True)
+                        raise
+                    observation.finish(context, failed=False)
+                    return response
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        return handler
+
+
+def _reject(method: str, reason: str):
+    metrics.ADMISSION_REJECTED.labels(method=method, reason=reason).inc()
+    return f"Server overloaded ({reason}), retry with backoff"
+
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    """Sheds load with RESOURCE_EXHAUSTED once an AdaptiveLimiter's limit for the method's priority is reached.
+
+    intercept_service runs on the server's polling thread when a call arrives,
+    so the arrival time it records makes the limiter see queueing time too. The
+    admission decision itself is made in the returned handler, after the call has
+    waited for and been dispatched to a worker thread; MAX_CONCURRENT_RPCS is
+    what keeps that queue bounded.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, clock=time.monotonic):
+        self._limiter = limiter
+        self._clock = clock
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method
+        priority = method_priority(method)
+        if priority is None:
+            return handler
+        arrived = self._clock()
+
+        if handler.unary_unary:
+
+            def unary_unary(request, context):
+                reason = self._limiter.try_acquire(priority, arrived)
+                if reason is not None:
+                    context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _reject(method, reason))
+                latency = None
+                try:
+                    response = handler.unary_unary(request, context)
+                    latency = self._clock() - arrived
+                    return response
+                finally:
+                    self._limiter.release(priority, arrived, latency)
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        if handler.unary_stream:
+
+            def unary_stream(request, context):
+                reason = self._limiter.try_acquire(priority, arrived)
+                if reason is not None:
+                    context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _reject(method, reason))
+                try:
+                    yield from handler.unary_stream(request, context)
+                finally:
+                    self._limiter.release(priority, arrived)
+
+            return grpc.unary_stream_rpc_method_handler(
+                unary_stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        return handler
+
+
+class AsyncAdmissionInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, limiter: AdaptiveLimiter, clock=time.monotonic):
+        self._limiter = limiter
+        self._clock = clock
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method
+        priority = method_priority(method)
+        if priority is None:
+            return handler
+        arrived = self._clock()
+
+        if handler.unary_unary:
+
+            async def unary_unary(request, context):
+                reason = self._limiter.try_acquire(priority, arrived)
+                if reason is not None:
+                    await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _reject(method, reason))
+                latency = None
+                try:
+                    response = await handler.unary_unary(request, context)
+                    latency = self._clock() - arrived
+                    return response
+                finally:
+                    self._limiter.release(priority, arrived, latency)
+
+            return grpc.unary_unary_rpc_method_handler(
+                unary_unary,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+
+        return handler
+
+
+def configure_structlog(local: bool = False) -> log_utils.QueueLogSink:
+    """Route structlog through a QueueLogSink so rendering and stdout writes happen off the RPC threads."""
     log_level = logging.DEBUG if local else logging.INFO
     console = ConsoleRenderer() if local else structlog.processors.JSONRenderer()
+    sink = log_utils.queue_sink_from_env(renderer=console, file=sys.stdout)
     structlog.configure(
         processors=[
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.add_log_level,
             structlog.processors.dict_tracebacks,
-            console if console else structlog.processors.JSONRenderer(),
         ],
         wrapper_class=structlog.make_filtering_bound_logger(log_level),
-        logger_factory=structlog.PrintLoggerFactory(file=sys.stdout),
+        logger_factory=sink.logger_factory,
         cache_logger_on_first_use=True,
     )
+    atexit.register(sink.close)
+    return sink
 
 
-def serve():
-    local = len(sys.argv) > 1 and sys.argv[1] == "local"
-    configure_structlog(local=local)
-    logger = structlog.get_logger()
-
-    logger.info("Starting AccountService")
+def create_server(
+    repo: AccountRepository,
+    max_workers: int = MAX_WORKERS,
+    interceptors=(),
+    relay: OutboxRelay = None,
+    options=(),
+    maximum_concurrent_rpcs=None,
+) -> grpc.Server:
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10),
-        interceptors=(LoggingInterceptor(logger),),
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        interceptors=interceptors,
+        options=options,
+        maximum_concurrent_rpcs=maximum_concurrent_rpcs,
+    )
+    service_pb2_grpc.add_AccountServiceServicer_to_server(
+        AccountService(repo, relay=relay),
+        server,
+    )
+    return server
+
+
+def create_aio_server(
+    repo: AsyncAccountRepository, interceptors=(), maximum_concurrent_rpcs=None, options=()
+) -> grpc.aio.Server:
+    server = grpc.aio.server(
+        interceptors=interceptors,
+        maximum_concurrent_rpcs=maximum_concurrent_rpcs,
+        options=options,
     )
-    repo = AccountRepository(get_session())
     service_pb2_grpc.add_AccountServiceServicer_to_server(
-        AccountService(repo),
+        AsyncAccountService(repo),
         server,
     )
+    return server
+
+
+def add_health_servicer(server: grpc.Server) -> health.HealthServicer:
+    servicer = health.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(servicer, server)
+    return servicer
+
+
+def install_stop_handlers() -> Callable[[], signal.Signals]:
+    """Catch SIGTERM and SIGINT from now on; returns a function that blocks until one arrives and returns it.
+
+    Install before starting the server so that a signal arriving during startup
+    still drains it instead of killing the process.
+    """
+    received = []
+    stop = threading.Event()
+
+    def handler(signum, frame):
+        received.append(signal.Signals(signum))
+        stop.set()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, handler)
+
+    def wait() -> signal.Signals:
+        while not stop.wait(1):
+            pass
+        return received[0]
+
+    return wait
+
+
+def drain(
+    server: grpc.Server,
+    health_servicer: health.HealthServicer,
+    relay: OutboxRelay = None,
+    grace: float = DRAIN_SECONDS,
+    delay: float = SHUTDOWN_DELAY,
+    health_checker: DatabaseHealthChecker = None,
+    pruner: OutboxPruner = None,
+) -> None:
+    """Report NOT_SERVING, then stop taking RPCs and give in-flight ones ``grace`` seconds before cancelling them."""
+    health_servicer.enter_graceful_shutdown()
+    time.sleep(delay)
+    if relay is not None:
+        # Ends the WatchAccounts streams, which would otherwise hold the server for the whole grace period.
+        relay.close()
+    server.stop(grace).wait()
+    if health_checker is not None:
+        health_checker.close()
+    if pruner is not None:
+        pruner.close()
+    dispose_engines()
+
+
+def check_aio_settings() -> None:
+    """Refuse settings that only the sync server honours, rather than starting aio without them."""
+    unsupported = [name for name in ("ACCOUNTS_SHARD_MAP", "DB_REPLICA_HOSTS") if os.getenv(name)]
+    # The relay is on by default, so only an explicit request for it is refused.
+    if os.getenv("ACCOUNTS_OUTBOX_RELAY") == "1":
+        unsupported.append("ACCOUNTS_OUTBOX_RELAY")
+    if unsupported:
+        raise ValueError(f"ACCOUNTS_SERVER_MODE=aio does not support {', '.join(unsupported)}")
+
+
+def aio_interceptors(logger: structlog.BoundLogger) -> list:
+    interceptors = [AsyncMetricsInterceptor(), AsyncLoggingInterceptor(logger, log_utils.sampler_from_env())]
+    # No thread pool bounds the aio server, so admission starts at the RPC cap rather than ACCOUNTS_MAX_WORKERS.
+    limiter = limiter_from_env(MAX_CONCURRENT_RPCS)
+    if limiter is not None:
+        interceptors.insert(1, AsyncAdmissionInterceptor(limiter))
+    return interceptors
+
+
+async def serve_aio(logger: structlog.BoundLogger, options=()) -> None:
+    # Before the server starts, so that a signal during startup drains it instead of killing the worker.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    repo = AsyncAccountRepository(get_async_session_factory(get_async_engine(max_workers=MAX_WORKERS)))
+    interceptors = aio_interceptors(logger)
+    server = create_aio_server(
+        repo, interceptors=interceptors, maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS, options=options
+    )
+    health_servicer = health.aio.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+    credentials = grpc.ssl_server_credentials(creds_utils.load_credentials())
+    server.add_secure_port("[::]:50051", credentials)
+    await server.start()
+    health_checker = await AsyncDatabaseHealthChecker(
+        health_servicer, {"primary": get_async_engine()}, services=("", SERVICE_NAME)
+    ).start()
+    logger.info("AccountService started", port=50051, mode="aio")
+
+    await stop.wait()
+
+    logger.info("AccountService draining", grace=DRAIN_SECONDS)
+    await health_servicer.enter_graceful_shutdown()
+    await asyncio.sleep(SHUTDOWN_DELAY)
+    await server.stop(DRAIN_SECONDS)
+    await health_checker.close()
+    await get_async_engine().dispose()
+    logger.info("AccountService stopped")
+
+
+def serve_sync(logger: structlog.BoundLogger, options=()) -> None:
+    wait_for_stop_signal = install_stop_handlers()
+    cache = account_cache_from_env(processes=PROCESSES)
+    # Each shard has its own outbox, so WatchAccounts is only served unsharded.
+    repo, relay = sharded_repository_from_env(max_workers=MAX_WORKERS, cache=cache), None
+    if repo is not None:
+        databases: Dict[str, SessionFactory] = repo.session_factories
+    else:
+        get_engine(max_workers=MAX_WORKERS)
+        scoped = os.getenv("DB_SCOPED_SESSIONS", "0") == "1"
+        session_factory = get_session_factory(scoped=scoped)
+        repo = AccountRepository(
+            session_factory,
+            cache=cache,
+            replicas=replica_router_from_env(session_factory, max_workers=MAX_WORKERS),
+        )
+        relay = relay_from_env(session_factory)
+        databases = {"primary": get_session_factory()}
+    if relay is not None:
+        relay.start()
+    pruner = pruner_from_env(databases)
+    if pruner is not None:
+        pruner.start()
+    interceptors = [MetricsInterceptor(), LoggingInterceptor(logger, log_utils.sampler_from_env())]
+    limiter = limiter_from_env(MAX_WORKERS)
+    if limiter is not None:
+        # After MetricsInterceptor so that shed calls are counted as RESOURCE_EXHAUSTED.
+        interceptors.insert(1, AdmissionInterceptor(limiter))
+    server = create_server(
+        repo,
+        interceptors=interceptors,
+        relay=relay,
+        options=options,
+        maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS,
+    )
+    health_servicer = add_health_servicer(server)
     credentials = grpc.ssl_server_credentials(creds_utils.load_credentials())
     server.add_secure_port("[::]:50051", credentials)
     server.start()
-    logger.info("AccountService started", port=50051)
+    health_checker = DatabaseHealthChecker(health_servicer, databases, services=("", SERVICE_NAME)).start()
+    logger.info("AccountService started", port=50051, mode="sync", max_workers=MAX_WORKERS)
+
+    stop_signal = wait_for_stop_signal()
+    logger.info("AccountService draining", signal=stop_signal.name, grace=DRAIN_SECONDS)
+    drain(server, health_servicer, relay=relay, health_checker=health_checker, pruner=pruner)
+    logger.info("AccountService stopped")
+
+
+def start_metrics_server(logger: structlog.BoundLogger, port: int) -> None:
+    start_http_server(port, addr="127.0.0.1")
+    logger.info("Metrics endpoint started", port=port)
+
+
+def run_server(logger: structlog.BoundLogger, options=()) -> None:
+    if SERVER_MODE == "sync":
+        serve_sync(logger, options=options)
+    else:
+        asyncio.run(serve_aio(logger, options=options))
+
+
+def serve_worker(local: bool, index: int) -> None:
+    """Entry point of one ACCOUNTS_PROCESSES worker; worker i serves metrics on ACCOUNTS_METRICS_PORT + i."""
+    configure_structlog(local=local)
+    logger = structlog.get_logger().bind(worker=index)
+    if METRICS_PORT:
+        start_metrics_server(logger, METRICS_PORT + index)
+    run_server(logger, options=REUSEPORT_OPTIONS)
+
+
+def serve():
+    local = len(sys.argv) > 1 and sys.argv[1] == "local"
+    configure_structlog(local=local)
+    logger = structlog.get_logger()
 
-    try:
-        server.wait_for_termination()
-    except KeyboardInterrupt:
-        logger.info("AccountService stopping")
-        server.stop(0)
+    if SERVER_MODE not in ("sync", "aio"):
+        raise ValueError(f"Invalid ACCOUNTS_SERVER_MODE: {SERVER_MODE!r}")
+    if SERVER_MODE == "aio":
+        check_aio_settings()
+    logger.info("Starting AccountService", mode=SERVER_MODE, processes=PROCESSES)
+    if PROCESSES > 1:
+        # Workers drain themselves on SIGTERM; only kill those still running well past that.
+        grace = SHUTDOWN_DELAY + DRAIN_SECONDS + 5
+        Supervisor(partial(serve_worker, local), PROCESSES, grace=grace).run()
+        return
+    if METRICS_PORT:
+        start_metrics_server(logger, METRICS_PORT)
+    run_server(logger)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+import asyncio
+import os
+import signal
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import grpc
+from codegen.accounts import service_pb2, service_pb2_grpc
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+from prometheus_client import REGISTRY
+
+from accounts import admission, db, main, repository
+from accounts.models import base
+from accounts.models.users import User
+from accounts.utils import log_utils
+
+
+class LoggingInterceptorTest(unittest.TestCase):
+    def _intercept(self, sampler):
+        logger = mock.Mock()
+        handler = mock.Mock(unary_unary=mock.Mock(return_value="response"))
+        details = mock.Mock(method="/accounts.AccountService/GetAccount")
+        interceptor = main.LoggingInterceptor(logger, sampler)
+        wrapped = interceptor.intercept_service(lambda _: handler, details)
+        return logger, wrapped.unary_unary("request", mock.Mock())
+
+    def test_logs_sampled_calls(self):
+        logger, response = self._intercept(log_utils.LogSampler(default_rate=1))
+        self.assertEqual(response, "response")
+        self.assertEqual(logger.info.call_count, 2)
+
+    def test_skips_unsampled_calls(self):
+        logger, response = self._intercept(log_utils.LogSampler(default_rate=0))
+        self.assertEqual(response, "response")
+        logger.info.assert_not_called()
+
+
+class ReusePortTest(unittest.TestCase):
+    def test_worker_servers_share_a_port(self):
+        first = main.create_server(mock.Mock(), max_workers=1, options=main.REUSEPORT_OPTIONS)
+        port = first.add_insecure_port("127.0.0.1:0")
+        second = main.create_server(mock.Mock(), max_workers=1, options=main.REUSEPORT_OPTIONS)
+
+        self.assertEqual(second.add_insecure_port(f"127.0.0.1:{port}"), port)
+        for server in (first, second):
+            server.start()
+            self.addCleanup(server.stop, None)
+
+
+class DrainTest(unittest.TestCase):
+    def setUp(self):
+        self.in_flight = threading.Event()
+        self.release = threading.Event()
+        repo = mock.Mock()
+
+        def slow_lookup(emails):
+            self.in_flight.set()
+            self.release.wait(5)
+            return {}
+
+        repo.get_accounts_by_emails.side_effect = slow_lookup
+        self.server = main.create_server(repo, max_workers=2)
+        self.health = main.add_health_servicer(self.server)
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        self.server.start()
+        self.health.set(main.SERVICE_NAME, health_pb2.HealthCheckResponse.SERVING)
+        self.addCleanup(self.server.stop, None)
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.addCleanup(channel.close)
+        self.stub = service_pb2_grpc.AccountServiceStub(channel)
+        self.health_stub = health_pb2_grpc.HealthStub(channel)
+
+    def _status(self):
+        request = health_pb2.HealthCheckRequest(service=main.SERVICE_NAME)
+        return self.health_stub.Check(request, timeout=5).status
+
+    def test_reports_not_serving_then_finishes_in_flight_calls(self):
+        relay = mock.Mock()
+        call = self.stub.BatchGetAccounts.future(service_pb2.BatchGetAccountsRequest(emails=["a@example.com"]))
+        self.assertTrue(self.in_flight.wait(5))
+        self.assertEqual(self._status(), health_pb2.HealthCheckResponse.SERVING)
+
+        with mock.patch.object(main, "dispose_engines") as dispose_engines:
+            drainer = threading.Thread(target=main.drain, args=(self.server, self.health, relay, 5, 0.5))
+            drainer.start()
+            self.assertEqual(self._status(), health_pb2.HealthCheckResponse.NOT_SERVING)
+            self.release.set()
+            drainer.join(10)
+
+        self.assertEqual(call.result(timeout=5).results[0].status.code, grpc.StatusCode.NOT_FOUND.value[0])
+        relay.close.assert_called_once_with()
+        dispose_engines.assert_called_once_with()
+        with self.assertRaises(grpc.RpcError) as ctx:
+            self.stub.BatchGetAccounts(service_pb2.BatchGetAccountsRequest(emails=["b@example.com"]), timeout=5)
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.UNAVAILABLE)
+
+    def test_cancels_calls_still_running_after_the_grace_period(self):
+        call = self.stub.BatchGetAccounts.future(service_pb2.BatchGetAccountsRequest(emails=["a@example.com"]))
+        self.assertTrue(self.in_flight.wait(5))
+
+        with mock.patch.object(main, "dispose_engines"):
+            main.drain(self.server, self.health, grace=0.2, delay=0)
+        self.release.set()
+
+        with self.assertRaises(grpc.RpcError) as ctx:
+            call.result(timeout=5)
+        self.assertIn(ctx.exception.code(), (grpc.StatusCode.CANCELLED, grpc.StatusCode.UNAVAILABLE))
+
+
+class AdmissionInterceptorTest(unittest.TestCase):
+    def setUp(self):
+        self.in_flight = threading.Event()
+        self.release = threading.Event()
+        repo = mock.Mock()
+
+        def slow_lookup(emails):
+            self.in_flight.set()
+            self.release.wait(5)
+            return {}
+
+        repo.get_accounts_by_emails.side_effect = slow_lookup
+        self.limiter = admission.AdaptiveLimiter(initial_limit=2, max_limit=2)
+        server = main.create_server(
+            repo,
+            max_workers=4,
+            interceptors=(main.MetricsInterceptor(), main.AdmissionInterceptor(self.limiter)),
+        )
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        self.addCleanup(server.stop, None)
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.addCleanup(channel.close)
+        self.stub = service_pb2_grpc.AccountServiceStub(channel)
+
+    def _batch_get(self):
+        return self.stub.BatchGetAccounts(service_pb2.BatchGetAccountsRequest(emails=["a@example.com"]), timeout=5)
+
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_sheds_calls_over_the_priority_share(self):
+        method = "/accounts.AccountService/BatchGetAccounts"
+        rejected = self._sample("accounts_admission_rejected_total", method=method, reason="limit")
+        handled = self._sample("accounts_grpc_server_handled_total", method=method, code="RESOURCE_EXHAUSTED")
+        first = self.stub.BatchGetAccounts.future(service_pb2.BatchGetAccountsRequest(emails=["a@example.com"]))
+        self.assertTrue(self.in_flight.wait(5))
+
+        with self.assertRaises(grpc.RpcError) as ctx:
+            self._batch_get()
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+        self.assertEqual(self._sample("accounts_admission_rejected_total", method=method, reason="limit"), rejected + 1)
+        self.assertEqual(
+            self._sample("accounts_grpc_server_handled_total", method=method, code="RESOURCE_EXHAUSTED"), handled + 1
+        )
+
+        self.release.set()
+        first.result(timeout=5)
+        self.assertEqual(self.limiter.in_flight, 0)
+        self.assertEqual(len(self._batch_get().results), 1)
+
+
+class AsyncAdmissionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_aio_server_admits_more_calls_than_worker_threads(self):
+        repo = mock.Mock()
+
+        async def slow_lookup(email):
+            await asyncio.sleep(0.1)
+            return User(id=1, email=email, first_name="F", last_name="L", is_active=True, is_verified=False)
+
+        repo.get_account_by_email.side_effect = slow_lookup
+        server = main.create_aio_server(repo, interceptors=main.aio_interceptors(mock.Mock()))
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        self.addAsyncCleanup(server.stop, None)
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        self.addAsyncCleanup(channel.close)
+        stub = service_pb2_grpc.AccountServiceStub(channel)
+
+        calls = [
+            stub.GetAccount(service_pb2.GetAccountRequest(email="a@example.com")) for _ in range(3 * main.MAX_WORKERS)
+        ]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        self.assertEqual([result for result in results if isinstance(result, Exception)], [])
+
+
+class CheckAioSettingsTest(unittest.TestCase):
+    @mock.patch.dict(os.environ, {"ACCOUNTS_SHARD_MAP": "shards.json", "DB_REPLICA_HOSTS": "replica-a"})
+    def test_refuses_sharding_and_replicas(self):
+        with self.assertRaisesRegex(ValueError, "does not support ACCOUNTS_SHARD_MAP, DB_REPLICA_HOSTS"):
+            main.check_aio_settings()
+
+    @mock.patch.dict(os.environ, {"ACCOUNTS_OUTBOX_RELAY": "1"})
+    def test_refuses_an_explicit_relay(self):
+        with self.assertRaisesRegex(ValueError, "does not support ACCOUNTS_OUTBOX_RELAY"):
+            main.check_aio_settings()
+
+    def test_accepts_the_defaults(self):
+        with mock.patch.dict(os.environ, clear=True):
+            main.check_aio_settings()
+
+
+class InstallStopHandlersTest(unittest.TestCase):
+    def setUp(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+
+    def test_returns_the_signal_received(self):
+        wait_for_stop_signal = main.install_stop_handlers()
+        threading.Timer(0.1, os.kill, args=(os.getpid(), signal.SIGTERM)).start()
+
+        self.assertEqual(wait_for_stop_signal(), signal.SIGTERM)
+
+    def test_keeps_a_signal_received_before_waiting(self):
+        wait_for_stop_signal = main.install_stop_handlers()
+        os.kill(os.getpid(), signal.SIGINT)
+
+        self.assertEqual(wait_for_stop_signal(), signal.SIGINT)
+
+
+class MetricsInterceptorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = db.create_pooled_engine(
+            "sqlite:///" + os.path.join(self.tmpdir.name, "test.db"), max_workers=2, name="metrics-test"
+        )
+        base.Base.metadata.create_all(self.engine)
+        server = main.create_server(
+            repository.AccountRepository(db.get_session_factory(bind=self.engine)),
+            max_workers=2,
+            interceptors=(main.MetricsInterceptor(),),
+        )
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        self.addCleanup(server.stop, None)
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.addCleanup(channel.close)
+        self.stub = service_pb2_grpc.AccountServiceStub(channel)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_records_latency_status_and_db_time(self):
+        method = "/accounts.AccountService/CreateAccount"
+        handled = self._sample("accounts_grpc_server_handled_total", method=method, code="OK")
+        observed = self._sample("accounts_grpc_server_handling_seconds_count", method=method)
+        db_seconds = self._sample("accounts_grpc_server_db_seconds_sum", method=method)
+        queries = self._sample("accounts_db_query_seconds_count", pool="metrics-test")
+
+        self.stub.CreateAccount(
+            service_pb2.CreateAccountRequest(email="a@example.com", first_name="A", last_name="B", hashed_password="pw")
+        )
+
+        self.assertEqual(self._sample("accounts_grpc_server_handled_total", method=method, code="OK"), handled + 1)
+        self.assertEqual(self._sample("accounts_grpc_server_handling_seconds_count", method=method), observed + 1)
+        self.assertGreater(self._sample("accounts_grpc_server_db_seconds_sum", method=method), db_seconds)
+        # The users INSERT and its outbox INSERT.
+        self.assertEqual(self._sample("accounts_db_query_seconds_count", pool="metrics-test"), queries + 2)
+        self.assertEqual(self._sample("accounts_grpc_server_in_flight", method=method), 0)
+
+    def test_records_error_status(self):
+        method = "/accounts.AccountService/GetAccount"
+        handled = self._sample("accounts_grpc_server_handled_total", method=method, code="INVALID_ARGUMENT")
+
+        with self.assertRaises(grpc.RpcError) as error:
+            self.stub.GetAccount(service_pb2.GetAccountRequest())
+
+        self.assertEqual(error.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        self.assertEqual(
+            self._sample("accounts_grpc_server_handled_total", method=method, code="INVALID_ARGUMENT"), handled + 1
+        )
+
+    def test_streaming_call_counted_once_finished(self):
+        method = "/accounts.AccountService/ListAccounts"
+        handled = self._sample("accounts_grpc_server_handled_total", method=method, code="OK")
+
+        pages = list(self.stub.ListAccounts(service_pb2.ListAccountsRequest()))
+
+        self.assertEqual(len(pages), 0)
+        self.assertEqual(self._sample("accounts_grpc_server_handled_total", method=method, code="OK"), handled + 1)
@@ -0,0 +1,110 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "accounts_db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the DB pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "accounts_db_pool_checkout_timeouts",
+    "Number of DB pool checkouts that timed out",
+    ["pool"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "accounts_db_pool_checked_out",
+    "Connections currently checked out of the DB pool",
+    ["pool"],
+)
+DB_POOL_CAPACITY = Gauge(
+    "accounts_db_pool_capacity",
+    "Maximum number of connections the DB pool may hand out (size + overflow)",
+    ["pool"],
+)
+DB_POOL_SATURATION = Gauge(
+    "accounts_db_pool_saturation",
+    "Fraction of the DB pool capacity currently checked out",
+    ["pool"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "accounts_db_query_seconds",
+    "Time spent executing a single DB statement",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_READS = Counter(
+    "accounts_db_reads",
+    "Repository reads by where they ran (primary or a replica)",
+    ["target"],
+)
+DB_REPLICA_UP = Gauge(
+    "accounts_db_replica_up",
+    "Whether a read replica is in rotation (1) or out after a failure (0)",
+    ["replica"],
+)
+DB_PING_UP = Gauge(
+    "accounts_db_ping_up",
+    "Whether the health check's last ping of a database succeeded",
+    ["database"],
+)
+
+GRPC_SERVER_HANDLING_SECONDS = Histogram(
+    "accounts_grpc_server_handling_seconds",
+    "Total time spent handling an RPC",
+    ["method"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+GRPC_SERVER_DB_SECONDS = Histogram(
+    "accounts_grpc_server_db_seconds",
+    "Part of an RPC's handling time spent executing DB statements",
+    ["method"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+GRPC_SERVER_HANDLED = Counter(
+    "accounts_grpc_server_handled",
+    "RPCs completed, by method and gRPC status code",
+    ["method", "code"],
+)
+GRPC_SERVER_IN_FLIGHT = Gauge(
+    "accounts_grpc_server_in_flight",
+    "RPCs currently being handled",
+    ["method"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "accounts_cache_lookups",
+    "Cache lookups by result (hit, negative_hit, miss)",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "accounts_cache_evictions",
+    "Entries dropped from an in-process cache by reason (size, expired)",
+    ["cache", "reason"],
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "accounts_log_records_dropped",
+    "Log records discarded because the background log queue was full",
+)
+
+OUTBOX_EVENTS_PUBLISHED = Counter(
+    "accounts_outbox_events_published",
+    "Account change events the outbox relay handed to WatchAccounts streams",
+)
+OUTBOX_GAPS_SKIPPED = Counter(
+    "accounts_outbox_gaps_skipped",
+    "Outbox ids the relay gave up waiting for, assuming their transaction rolled back",
+)
+OUTBOX_EVENTS_PRUNED = Counter(
+    "accounts_outbox_events_pruned",
+    "Outbox rows deleted for being older than ACCOUNTS_OUTBOX_RETENTION",
+)
+ADMISSION_LIMIT = Gauge(
+    "accounts_admission_limit",
+    "Current adaptive concurrency limit of the admission interceptor",
+)
+ADMISSION_REJECTED = Counter(
+    "accounts_admission_rejected",
+    "RPCs rejected with RESOURCE_EXHAUSTED by the admission interceptor",
+    ["method", "reason"],
+)
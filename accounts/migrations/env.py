@@ -3,7 +3,8 @@ from logging.config import fileConfig
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 
-from accounts.models import users
+# Imported for their side effect: defining the models registers their tables on Base.metadata.
+from accounts.models import outbox, users  # noqa: F401
 from accounts.models.base import Base
 
 # this is the Alembic Config object, which provides
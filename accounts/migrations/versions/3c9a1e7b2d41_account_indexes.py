@@ -0,0 +1,40 @@
+"""Account indexes
+
+Secondary indexes for GetAccount's case-insensitive email lookup, admin search
+by name and signup date, and ListAccounts' status filter.
+
+ix_users_email_lower is unique: emails that differ only in case must be merged
+before upgrading. It needs MySQL 8.0.13+ for the functional key part.
+
+Revision ID: 3c9a1e7b2d41
+Revises: 5f1f809f6a95
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9a1e7b2d41"
+down_revision: Union[str, Sequence[str], None] = "5f1f809f6a95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_users_email_lower", "users", [sa.func.lower(sa.column("email"))], unique=True)
+    op.create_index("ix_users_last_name_first_name", "users", ["last_name", "first_name"])
+    op.create_index("ix_users_created_at", "users", ["created_at"])
+    op.create_index("ix_users_status", "users", ["is_active", "is_verified", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_status", table_name="users")
+    op.drop_index("ix_users_created_at", table_name="users")
+    op.drop_index("ix_users_last_name_first_name", table_name="users")
+    op.drop_index("ix_users_email_lower", table_name="users")
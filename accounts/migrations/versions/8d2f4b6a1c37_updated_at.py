@@ -0,0 +1,49 @@
+"""Maintain and index updated_at
+
+users.updated_at only had a default. On MySQL the column now also carries
+ON UPDATE CURRENT_TIMESTAMP so every write bumps it; the application sets it
+through the model's onupdate on other databases. ix_users_updated_at serves
+ListAccountsChangedSince.
+
+Revision ID: 8d2f4b6a1c37
+Revises: 3c9a1e7b2d41
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2f4b6a1c37"
+down_revision: Union[str, Sequence[str], None] = "3c9a1e7b2d41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name == "mysql":
+        op.alter_column(
+            "users",
+            "updated_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+        )
+    op.create_index("ix_users_updated_at", "users", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_updated_at", table_name="users")
+    if op.get_context().dialect.name == "mysql":
+        op.alter_column(
+            "users",
+            "updated_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        )
@@ -0,0 +1,46 @@
+"""Account outbox
+
+account_outbox holds one row per account create, update and delete, written in
+the same transaction as the change. The WatchAccounts relay publishes rows in
+id order; the id is the stream position clients resume from.
+
+Revision ID: b71e5c9d0a42
+Revises: 8d2f4b6a1c37
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b71e5c9d0a42"
+down_revision: Union[str, Sequence[str], None] = "8d2f4b6a1c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "account_outbox",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("account_id", sa.BigInteger(), nullable=False),
+        sa.Column("event_type", sa.String(length=16), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("previous_email", sa.String(length=100), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("account_outbox")
@@ -0,0 +1,56 @@
+"""Sharding
+
+users.id becomes BIGINT so it can hold sharded ids (time, bucket and sequence
+packed into 63 bits, see accounts/sharding.py). account_forwards records the
+bucket of accounts whose email moved them away from the bucket in their id.
+
+Revision ID: e2a4c6f8b015
+Revises: b71e5c9d0a42
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a4c6f8b015"
+down_revision: Union[str, Sequence[str], None] = "b71e5c9d0a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite's INTEGER PRIMARY KEY is already 64-bit.
+    if op.get_context().dialect.name != "sqlite":
+        op.alter_column(
+            "users",
+            "id",
+            existing_type=sa.Integer(),
+            type_=sa.BigInteger(),
+            existing_nullable=False,
+            autoincrement=True,
+        )
+    op.create_table(
+        "account_forwards",
+        sa.Column("account_id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("account_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("account_forwards")
+    if op.get_context().dialect.name != "sqlite":
+        op.alter_column(
+            "users",
+            "id",
+            existing_type=sa.BigInteger(),
+            type_=sa.Integer(),
+            existing_nullable=False,
+            autoincrement=True,
+        )
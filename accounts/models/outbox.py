@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .users import Timestamp
+
+# Values of AccountOutboxEvent.event_type.
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+class AccountOutboxEvent(Base):
+    """An account change, written in the same transaction as the change itself.
+    The id is the event's position in the stream and the WatchAccounts resume token.
+    """
+
+    __tablename__ = "account_outbox"
+
+    # SQLite only autoincrements INTEGER PRIMARY KEY.
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    account_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    event_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    email: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Set when an update changed the email, so caches keyed by email can drop the old key.
+    previous_email: Mapped[str] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(Timestamp, server_default=func.now(), nullable=False)
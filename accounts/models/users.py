@@ -1,25 +1,52 @@
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, func
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
 
+# Whole seconds like MySQL DATETIME, so stored SQLite values compare equal to bound ones.
+Timestamp = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
 
 class TimestampMixin:
-    created_at: Mapped[DateTime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
-    )
+    created_at: Mapped[DateTime] = mapped_column(Timestamp, server_default=func.now(), nullable=False)
+    # Set by the DB on every UPDATE issued through SQLAlchemy; the migration adds
+    # ON UPDATE CURRENT_TIMESTAMP on MySQL for writes from anywhere else.
     updated_at: Mapped[DateTime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
 
 class User(Base, TimestampMixin):
     __tablename__ = "users"
 
-    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # BIGINT for sharded ids (accounts.sharding); SQLite only autoincrements INTEGER PRIMARY KEY.
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     email: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
     last_name: Mapped[str] = mapped_column(String(50), nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     is_active: Mapped[bool] = mapped_column(default=True)
     is_verified: Mapped[bool] = mapped_column(default=False)
+
+
+# Keep in step with migrations/versions/3c9a1e7b2d41_account_indexes.py and 8d2f4b6a1c37_updated_at.py.
+# GetAccount matches lower(email), which also makes emails unique regardless of case.
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+# Admin search by name.
+Index("ix_users_last_name_first_name", User.last_name, User.first_name)
+# Admin listing by signup date.
+Index("ix_users_created_at", User.created_at)
+# ListAccounts filtered by status, paged by id.
+Index("ix_users_status", User.is_active, User.is_verified, User.id)
+# ListAccountsChangedSince, paged by (updated_at, id).
+Index("ix_users_updated_at", User.updated_at, User.id)
+
+
+class AccountForward(Base):
+    """Where a sharded account lives when its email no longer hashes to the bucket in its id."""
+
+    __tablename__ = "account_forwards"
+
+    account_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    bucket: Mapped[int] = mapped_column(Integer, nullable=False)
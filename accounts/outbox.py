@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, List, Mapping, Optional
+
+import structlog
+from sqlalchemy import Row, delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from accounts import metrics
+from accounts.db import SessionFactory
+from accounts.models.outbox import AccountOutboxEvent
+from accounts.repository import DatabaseError
+
+logger = structlog.get_logger()
+
+_EVENT_COLUMNS = (
+    AccountOutboxEvent.id,
+    AccountOutboxEvent.account_id,
+    AccountOutboxEvent.event_type,
+    AccountOutboxEvent.email,
+    AccountOutboxEvent.previous_email,
+    AccountOutboxEvent.created_at,
+)
+
+
+class OutboxRelay:
+    """Publishes account_outbox rows, in id order, to any number of WatchAccounts streams.
+
+    A background thread polls for rows past the last published id and appends
+    them to a ring buffer of the latest ``buffer_size`` events; subscribers read
+    from the buffer and fall back to the table when they are further behind, so
+    memory stays bounded however many streams there are or how slow they are.
+
+    Ids are allocated at INSERT but become visible at COMMIT, so a missing id may
+    belong to a transaction that has not committed yet. The relay stops at such a
+    gap for up to ``gap_timeout`` seconds before assuming it was rolled back;
+    an event committed later than that is only seen by streams resuming from before it.
+    """
+
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        poll_interval: float = 0.1,
+        batch_size: int = 500,
+        buffer_size: int = 10000,
+        gap_timeout: float = 5.0,
+        clock=time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self._clock = clock
+        self._buffer: "deque[Row]" = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        # Every published event with an id above _floor is in the buffer.
+        self._floor = self._high_water = 0
+        self._gap: Optional[tuple] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def high_water(self) -> int:
+        """Id of the last published event; a stream starting here sees only new events."""
+        return self._high_water
+
+    @property
+    def closed(self) -> bool:
+        return self._stop.is_set()
+
+    def start(self) -> "OutboxRelay":
+        """Start publishing events written from now on."""
+        self._floor = self._high_water = self._max_id()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+        logger.info("Outbox relay started", high_water=self._high_water)
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                published = self.poll()
+            except DatabaseError:
+                published = 0
+            if published < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def _max_id(self) -> int:
+        try:
+            with self.session_factory() as session:
+                return session.scalar(select(func.max(AccountOutboxEvent.id))) or 0
+        except SQLAlchemyError as exc:
+            logger.error("Database error while reading outbox position", error=str(exc))
+            raise DatabaseError("Database error") from exc
+
+    def oldest_id(self) -> int:
+        """Id of the oldest event not yet pruned, or the next one to be published when none is left."""
+        try:
+            with self.session_factory() as session:
+                oldest = session.scalar(select(func.min(AccountOutboxEvent.id)))
+        except SQLAlchemyError as exc:
+            logger.error("Database error while reading outbox position", error=str(exc))
+            raise DatabaseError("Database error") from exc
+        return self._high_water + 1 if oldest is None else oldest
+
+    def read(self, after_id: int, until_id: Optional[int] = None, limit: Optional[int] = None) -> List[Row]:
+        """Events with ``after_id < id <= until_id`` straight from the table, oldest first."""
+        stmt = select(*_EVENT_COLUMNS).where(AccountOutboxEvent.id > after_id)
+        if until_id is not None:
+            stmt = stmt.where(AccountOutboxEvent.id <= until_id)
+        try:
+            with self.session_factory() as session:
+                return session.execute(stmt.order_by(AccountOutboxEvent.id).limit(limit or self.batch_size)).all()
+        except SQLAlchemyError as exc:
+            logger.error("Database error while reading outbox", error=str(exc), after_id=after_id)
+            raise DatabaseError("Database error") from exc
+
+    def poll(self) -> int:
+        """Publish the committed events after the high water mark; returns how many."""
+        ready = []
+        expected = self._high_water + 1
+        for event in self.read(self._high_water):
+            if event.id != expected and not self._gap_expired(expected):
+                break
+            ready.append(event)
+            expected = event.id + 1
+        if not ready:
+            return 0
+        with self._cond:
+            for event in ready:
+                if len(self._buffer) == self._buffer.maxlen:
+                    self._floor = self._buffer[0].id
+                self._buffer.append(event)
+            self._high_water = ready[-1].id
+            self._cond.notify_all()
+        metrics.OUTBOX_EVENTS_PUBLISHED.inc(len(ready))
+        return len(ready)
+
+    def _gap_expired(self, missing_id: int) -> bool:
+        now = self._clock()
+        if self._gap is None or self._gap[0] != missing_id:
+            self._gap = (missing_id, now)
+        if now - self._gap[1] < self.gap_timeout:
+            return False
+        logger.warning("Skipping outbox gap", missing_id=missing_id)
+        metrics.OUTBOX_GAPS_SKIPPED.inc()
+        return True
+
+    def events_after(self, after_id: int, timeout: float) -> List[Row]:
+        """Up to batch_size published events after ``after_id``, waiting up to ``timeout`` seconds for one."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.closed or self._high_water > after_id, timeout):
+                return []
+            if self.closed:
+                return []
+            high_water = self._high_water
+            if after_id >= self._floor:
+                start = bisect_right(self._buffer, after_id, key=attrgetter("id"))
+                return list(islice(self._buffer, start, start + self.batch_size))
+        return self.read(after_id, until_id=high_water)
+
+
+class OutboxPruner:
+    """Deletes account_outbox rows older than ``retention`` seconds from each database, every ``interval`` seconds.
+
+    Rows are deleted oldest first in batches of ``batch_size``, each found by
+    primary key, so a sweep never scans the table. A WatchAccounts stream
+    resuming from before the oldest event left is refused with OUT_OF_RANGE.
+    """
+
+    def __init__(
+        self,
+        session_factories: Mapping[str, SessionFactory],
+        retention: float,
+        interval: float = 300,
+        batch_size: int = 1000,
+    ):
+        self.session_factories = dict(session_factories)
+        self.retention = retention
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def prune(self) -> Dict[str, int]:
+        """Delete the expired events now; returns how many per database."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        return {
+            name: self._prune(name, session_factory, cutoff) for name, session_factory in self.session_factories.items()
+        }
+
+    def _prune(self, name: str, session_factory: SessionFactory, cutoff: datetime) -> int:
+        oldest = (
+            select(AccountOutboxEvent.id, AccountOutboxEvent.created_at)
+            .order_by(AccountOutboxEvent.id)
+            .limit(self.batch_size)
+            .subquery()
+        )
+        last_expired = select(func.max(oldest.c.id)).where(oldest.c.created_at < cutoff)
+        deleted = 0
+        try:
+            with session_factory() as session:
+                while True:
+                    last_id = session.scalar(last_expired)
+                    if last_id is None:
+                        break
+                    count = session.execute(delete(AccountOutboxEvent).where(AccountOutboxEvent.id <= last_id)).rowcount
+                    session.commit()
+                    deleted += count
+                    if count < self.batch_size:
+                        break
+        except SQLAlchemyError as exc:
+            logger.error("Database error while pruning outbox", database=name, error=str(exc))
+        if deleted:
+            metrics.OUTBOX_EVENTS_PRUNED.inc(deleted)
+            logger.info("Pruned outbox", database=name, deleted=deleted)
+        return deleted
+
+    def start(self) -> "OutboxPruner":
+        self._thread = threading.Thread(target=self._run, name="outbox-pruner", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.prune()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def pruner_from_env(session_factories: Mapping[str, SessionFactory]) -> Optional[OutboxPruner]:
+    """An OutboxPruner keeping ACCOUNTS_OUTBOX_RETENTION seconds of events (default 7 days), None when it is 0."""
+    retention = float(os.getenv("ACCOUNTS_OUTBOX_RETENTION", str(7 * 24 * 3600)))
+    if retention <= 0:
+        return None
+    return OutboxPruner(
+        session_factories, retention, interval=float(os.getenv("ACCOUNTS_OUTBOX_PRUNE_INTERVAL", "300"))
+    )
+
+
+def relay_from_env(session_factory: SessionFactory) -> Optional[OutboxRelay]:
+    if os.getenv("ACCOUNTS_OUTBOX_RELAY", "1") != "1":
+        return None
+    return OutboxRelay(
+        session_factory,
+        poll_interval=float(os.getenv("ACCOUNTS_OUTBOX_POLL_INTERVAL", "0.1")),
+        buffer_size=int(os.getenv("ACCOUNTS_OUTBOX_BUFFER_SIZE", "10000")),
+        gap_timeout=float(os.getenv("ACCOUNTS_OUTBOX_GAP_TIMEOUT", "5")),
+    )
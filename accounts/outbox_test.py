@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from accounts import outbox, repository
+from accounts.models import base
+from accounts.models.outbox import AccountOutboxEvent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class OutboxRelayTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine("sqlite:///" + os.path.join(self.tmpdir.name, "test.db"))
+        base.Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.repo = repository.AccountRepository(self.Session)
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _relay(self, **kwargs) -> outbox.OutboxRelay:
+        relay = outbox.OutboxRelay(self.Session, clock=self.clock, **kwargs)
+        self.addCleanup(relay.close)
+        return relay
+
+    def _insert_event(self, event_id: int, **values):
+        with self.engine.begin() as conn:
+            conn.execute(
+                insert(AccountOutboxEvent).values(
+                    id=event_id, account_id=1, event_type="created", email="a@x.com", **values
+                )
+            )
+
+    def test_publishes_changes_in_order(self):
+        self.repo.create_account("before@example.com", "First", "Last", "pw")
+        relay = self._relay(poll_interval=0.01).start()
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+        self.repo.update_account_fields(account.id, email="two@example.com")
+        self.repo.delete_account(account.id)
+
+        events = []
+        while len(events) < 3:
+            page = relay.events_after(events[-1].id if events else 1, timeout=5)
+            self.assertTrue(page, "relay did not publish in time")
+            events.extend(page)
+
+        self.assertEqual([e.event_type for e in events], ["created", "updated", "deleted"])
+        self.assertEqual([e.account_id for e in events], [account.id] * 3)
+        self.assertEqual((events[1].email, events[1].previous_email), ("two@example.com", "one@example.com"))
+        self.assertEqual(events[2].email, "two@example.com")
+
+    def test_returns_nothing_when_no_event_arrives(self):
+        relay = self._relay()
+        self.assertEqual(relay.events_after(0, timeout=0.01), [])
+
+    def test_slow_consumer_reads_evicted_events_from_the_table(self):
+        relay = self._relay(buffer_size=2)
+        for i in range(5):
+            self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw")
+        relay.poll()
+
+        self.assertEqual(len(relay._buffer), 2)
+        self.assertEqual([e.id for e in relay.events_after(0, timeout=0)], [1, 2, 3, 4, 5])
+        self.assertEqual([e.id for e in relay.events_after(3, timeout=0)], [4, 5])
+
+    def test_waits_for_gaps_before_skipping_them(self):
+        relay = self._relay(gap_timeout=5)
+        self._insert_event(1)
+        self._insert_event(3)
+
+        self.assertEqual(relay.poll(), 1)
+        self.clock.now = 4
+        self.assertEqual(relay.poll(), 0)
+        self._insert_event(2)
+        self.assertEqual(relay.poll(), 2)
+        self.assertEqual(relay.high_water, 3)
+
+        self._insert_event(5)
+        self.assertEqual(relay.poll(), 0)
+        self.clock.now = 10
+        self.assertEqual(relay.poll(), 1)
+        self.assertEqual([e.id for e in relay.events_after(0, timeout=0)], [1, 2, 3, 5])
+
+    def test_close_wakes_waiting_streams(self):
+        relay = self._relay().start()
+        relay.close()
+        self.assertTrue(relay.closed)
+        self.assertEqual(relay.events_after(relay.high_water, timeout=5), [])
+
+    def test_pruner_deletes_events_past_retention_in_batches(self):
+        old = datetime.now(timezone.utc) - timedelta(days=8)
+        for event_id in range(1, 6):
+            self._insert_event(event_id, created_at=old)
+        self._insert_event(6)
+        pruner = outbox.OutboxPruner({"primary": self.Session}, retention=7 * 24 * 3600, batch_size=2)
+
+        self.assertEqual(pruner.prune(), {"primary": 5})
+
+        with self.Session() as session:
+            self.assertEqual(session.scalars(select(AccountOutboxEvent.id)).all(), [6])
+        self.assertEqual(pruner.prune(), {"primary": 0})
+        self.assertEqual(self._relay().oldest_id(), 6)
+
+    @mock.patch.dict("os.environ", {"ACCOUNTS_OUTBOX_RETENTION": "0"})
+    def test_pruner_from_env_disabled(self):
+        self.assertIsNone(outbox.pruner_from_env({"primary": self.Session}))
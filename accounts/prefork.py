@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class _Slot:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.backoff = 0.0
+
+
+class Supervisor:
+    """Runs ``target(index)`` in ``processes`` worker processes and keeps them running.
+
+    A worker that exits is started again, after a backoff that doubles (up to
+    ``max_backoff``) while workers keep dying within ``min_uptime`` seconds of
+    starting. On SIGTERM or SIGINT the supervisor stops restarting, sends
+    ``stop_signal`` to every worker and waits up to ``grace`` seconds for them
+    to drain before killing the rest.
+
+    Workers are started with the "spawn" method so none inherits the gRPC or
+    database state of another; each builds its own server and engine pool.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int], None],
+        processes: int,
+        grace: float = 30.0,
+        stop_signal: int = signal.SIGTERM,
+        min_uptime: float = 5.0,
+        max_backoff: float = 30.0,
+        clock=time.monotonic,
+    ):
+        if processes < 1:
+            raise ValueError(f"processes must be at least 1, got {processes}")
+        self.target = target
+        self.grace = grace
+        self.stop_signal = stop_signal
+        self.min_uptime = min_uptime
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = [_Slot(index) for index in range(processes)]
+        self._stopping = False
+
+    @property
+    def pids(self) -> Dict[int, Optional[int]]:
+        return {slot.index: slot.process.pid if slot.process else None for slot in self._slots}
+
+    def start(self) -> "Supervisor":
+        for slot in self._slots:
+            self._spawn(slot)
+        return self
+
+    def _spawn(self, slot: _Slot) -> None:
+        slot.process = self._ctx.Process(target=self.target, args=(slot.index,), name=f"worker-{slot.index}")
+        slot.process.start()
+        slot.started_at = self._clock()
+        logger.info("Worker started", worker=slot.index, pid=slot.process.pid)
+
+    def check(self) -> int:
+        """Schedule exited workers for restart and start those whose backoff is over; returns how many started."""
+        started = 0
+        now = self._clock()
+        for slot in self._slots:
+            if slot.process is not None and not slot.process.is_alive():
+                slot.process.join()
+                exitcode, slot.process = slot.process.exitcode, None
+                if now - slot.started_at < self.min_uptime:
+                    slot.backoff = min(self.max_backoff, max(slot.backoff * 2, 0.5))
+                else:
+                    slot.backoff = 0.0
+                slot.restart_at = now + slot.backoff
+                logger.warning("Worker exited", worker=slot.index, exitcode=exitcode, restart_in=slot.backoff)
+            if slot.process is None and not self._stopping and slot.restart_at <= now:
+                self._spawn(slot)
+                started += 1
+        return started
+
+    def run(self, poll_interval: float = 0.5) -> None:
+        """Start the workers and supervise them until SIGTERM or SIGINT, then drain them."""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._request_stop)
+        self.start()
+        while not self._stopping:
+            sentinels = [slot.process.sentinel for slot in self._slots if slot.process is not None]
+            if sentinels:
+                wait(sentinels, timeout=poll_interval)
+            else:
+                time.sleep(poll_interval)
+            self.check()
+        self.stop()
+
+    def _request_stop(self, signum, frame) -> None:
+        logger.info("Supervisor stopping", signal=signal.Signals(signum).name)
+        self._stopping = True
+
+    def stop(self) -> None:
+        """Ask every worker to stop, wait up to ``grace`` seconds, then kill the stragglers."""
+        self._stopping = True
+        running = [slot.process for slot in self._slots if slot.process is not None and slot.process.is_alive()]
+        for process in running:
+            os.kill(process.pid, self.stop_signal)
+        deadline = self._clock() + self.grace
+        for process in running:
+            process.join(max(0.0, deadline - self._clock()))
+            if process.is_alive():
+                logger.warning("Worker did not drain in time", pid=process.pid)
+                process.kill()
+                process.join()
+        for slot in self._slots:
+            slot.process = None
+        logger.info("Workers stopped", workers=len(running))
@@ -0,0 +1,89 @@
+import signal
+import sys
+import time
+import unittest
+
+from accounts import prefork
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def exit_at_once(index: int) -> None:
+    sys.exit(3)
+
+
+def sleep_until_stopped(index: int) -> None:
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    time.sleep(60)
+
+
+def ignore_stop(index: int) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(60)
+
+
+class SupervisorTest(unittest.TestCase):
+    def _supervisor(self, target, processes=1, **kwargs) -> prefork.Supervisor:
+        supervisor = prefork.Supervisor(target, processes, **kwargs)
+        self.addCleanup(supervisor.stop)
+        return supervisor
+
+    def test_stop_signals_workers(self):
+        supervisor = self._supervisor(sleep_until_stopped, processes=2).start()
+        processes = [slot.process for slot in supervisor._slots]
+        self.assertEqual(len(set(supervisor.pids.values())), 2)
+        time.sleep(0.5)  # let the workers reach their target
+
+        supervisor.stop()
+
+        self.assertEqual([process.exitcode for process in processes], [0, 0])
+        self.assertEqual(supervisor.pids, {0: None, 1: None})
+
+    def test_restarts_crashed_worker_with_backoff(self):
+        clock = FakeClock()
+        supervisor = self._supervisor(exit_at_once, clock=clock, min_uptime=5).start()
+        supervisor._slots[0].process.join()
+
+        self.assertEqual(supervisor.check(), 0)
+        self.assertIsNone(supervisor.pids[0])
+        clock.now += 0.5
+        self.assertEqual(supervisor.check(), 1)
+        supervisor._slots[0].process.join()
+        self.assertEqual(supervisor._slots[0].process.exitcode, 3)
+
+        self.assertEqual(supervisor.check(), 0)
+        self.assertEqual(supervisor._slots[0].backoff, 1.0)
+
+    def test_worker_that_stays_up_restarts_immediately(self):
+        clock = FakeClock()
+        supervisor = self._supervisor(exit_at_once, clock=clock, min_uptime=5).start()
+        supervisor._slots[0].process.join()
+        clock.now += 10
+
+        self.assertEqual(supervisor.check(), 1)
+        self.assertEqual(supervisor._slots[0].backoff, 0.0)
+
+    def test_kills_workers_that_do_not_drain(self):
+        supervisor = self._supervisor(ignore_stop, grace=0.5).start()
+        process = supervisor._slots[0].process
+        time.sleep(0.5)  # let the worker install its handler
+
+        started = time.monotonic()
+        supervisor.stop()
+
+        self.assertEqual(process.exitcode, -signal.SIGKILL)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_rejects_zero_processes(self):
+        with self.assertRaises(ValueError):
+            prefork.Supervisor(exit_at_once, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
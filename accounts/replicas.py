@@ -0,0 +1,127 @@
+import itertools
+import os
+import time
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, TypeVar
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+from accounts import metrics
+from accounts.cache import LRUCache
+from accounts.db import SessionFactory, get_replica_engines, get_session_factory
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class Replica:
+    def __init__(self, name: str, session_factory: SessionFactory):
+        self.name = name
+        self.session_factory = session_factory
+        # 0 while healthy, otherwise when the replica may be probed again.
+        self.down_until = 0.0
+
+
+def _sticky_key(key: Hashable) -> Hashable:
+    return key.lower() if isinstance(key, str) else key
+
+
+class ReplicaRouter:
+    """Runs reads on replicas round-robin, falling back to the primary.
+
+    A replica whose connection fails is taken out of rotation for ``retry_after``
+    seconds and then probed with ``SELECT 1`` before it serves reads again; the
+    failed read is retried on the primary. Keys (emails, account ids) passed to
+    ``mark_written`` are read from the primary for ``sticky_seconds`` so callers
+    see their own writes despite replication lag. Stickiness is per process, so
+    with several worker processes it only holds for calls reaching the worker
+    that made the write.
+    """
+
+    def __init__(
+        self,
+        primary: SessionFactory,
+        replicas: Sequence[Replica],
+        sticky_seconds: float = 5.0,
+        retry_after: float = 10.0,
+        max_sticky_keys: int = 100_000,
+        clock=time.monotonic,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_after = retry_after
+        self._clock = clock
+        self._turn = itertools.count()
+        self._written = LRUCache("read_your_writes", max_sticky_keys, sticky_seconds, clock=clock)
+        for replica in self.replicas:
+            metrics.DB_REPLICA_UP.labels(replica=replica.name).set(1)
+
+    def mark_written(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._written.set(_sticky_key(key), True)
+
+    def is_sticky(self, keys: Iterable[Hashable]) -> bool:
+        return any(self._written.get(_sticky_key(key), False) for key in keys)
+
+    def read(self, query: Callable[[Session], T], keys: Iterable[Hashable] = ()) -> T:
+        """Run ``query`` in a session on a healthy replica, or on the primary for recently written keys."""
+        replica = None if self.is_sticky(keys) else self._next_replica()
+        if replica is None:
+            return self._run("primary", self.primary, query)
+        try:
+            return self._run(replica.name, replica.session_factory, query)
+        except DBAPIError as exc:
+            if not (exc.connection_invalidated or isinstance(exc, OperationalError)):
+                raise
+            self._mark_down(replica, exc)
+            return self._run("primary", self.primary, query)
+
+    def _run(self, target: str, session_factory: SessionFactory, query: Callable[[Session], T]) -> T:
+        metrics.DB_READS.labels(target=target).inc()
+        with session_factory() as session:
+            return query(session)
+
+    def _next_replica(self) -> Optional[Replica]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._turn) % len(self.replicas)]
+            if not replica.down_until:
+                return replica
+            if replica.down_until <= self._clock() and self._probe(replica):
+                return replica
+        return None
+
+    def _probe(self, replica: Replica) -> bool:
+        try:
+            with replica.session_factory() as session:
+                session.execute(text("SELECT 1"))
+        except DBAPIError as exc:
+            self._mark_down(replica, exc)
+            return False
+        replica.down_until = 0.0
+        metrics.DB_REPLICA_UP.labels(replica=replica.name).set(1)
+        logger.info("Replica back in rotation", replica=replica.name)
+        return True
+
+    def _mark_down(self, replica: Replica, exc: Exception) -> None:
+        replica.down_until = self._clock() + self.retry_after
+        metrics.DB_REPLICA_UP.labels(replica=replica.name).set(0)
+        logger.warning("Replica taken out of rotation", replica=replica.name, error=str(exc))
+
+
+def replica_router_from_env(primary: SessionFactory, max_workers: Optional[int] = None) -> Optional[ReplicaRouter]:
+    """A router over the DB_REPLICA_HOSTS replicas, or None when there are none."""
+    replicas: List[Replica] = [
+        Replica(f"replica-{i}", get_session_factory(bind=engine))
+        for i, engine in enumerate(get_replica_engines(max_workers=max_workers))
+    ]
+    if not replicas:
+        return None
+    return ReplicaRouter(
+        primary,
+        replicas,
+        sticky_seconds=float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5")),
+        retry_after=float(os.getenv("DB_REPLICA_RETRY_SECONDS", "10")),
+    )
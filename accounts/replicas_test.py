@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from accounts import cache, replicas, repository
+from accounts.models import base, users
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ReplicaRoutingTest(unittest.TestCase):
+    """Primary and replica are two SQLite files; the replica never receives the primary's writes,
+    so which one answered shows where a read was routed."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engines = {}
+        for name in ("primary", "replica"):
+            engine = create_engine("sqlite:///" + os.path.join(self.tmpdir.name, f"{name}.db"))
+            base.Base.metadata.create_all(engine)
+            self.engines[name] = engine
+        self.clock = FakeClock()
+        self.replica = replicas.Replica("replica-0", sessionmaker(bind=self.engines["replica"]))
+        primary = sessionmaker(bind=self.engines["primary"])
+        self.router = replicas.ReplicaRouter(
+            primary, [self.replica], sticky_seconds=5, retry_after=10, clock=self.clock
+        )
+        self.repo = repository.AccountRepository(primary, replicas=self.router)
+
+    def tearDown(self):
+        for engine in self.engines.values():
+            engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _replicate(self, email: str):
+        with self.engines["replica"].begin() as conn:
+            conn.execute(
+                insert(users.User).values(email=email, first_name="Replica", last_name="Copy", hashed_password="pw")
+            )
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self._replicate("old@example.com")
+
+        self.assertEqual(self.repo.get_account_by_email("old@example.com").first_name, "Replica")
+        self.repo.create_account("new@example.com", "Primary", "Copy", "pw")
+        with self.engines["replica"].connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("SELECT count(*) FROM users").scalar(), 1)
+
+    def test_reads_own_writes_from_primary_until_window_ends(self):
+        account = self.repo.create_account("new@example.com", "Primary", "Copy", "pw")
+        self._replicate("new@example.com")
+
+        self.assertEqual(self.repo.get_account_by_email("NEW@example.com").first_name, "Primary")
+        self.assertIn(account.id, self.repo.get_accounts_by_ids([account.id]))
+        self.assertEqual(len(self.repo.get_accounts_by_emails(["other@example.com"])), 0)
+
+        self.clock.now = 6
+        self.assertEqual(self.repo.get_account_by_email("new@example.com").first_name, "Replica")
+
+    def _first_name(self, email: str):
+        account = self.repo.get_account_by_email(email)
+        return account and account.first_name
+
+    def test_read_racing_a_write_does_not_cache_the_replica_copy(self):
+        self.repo.cache = cache.AccountCache()
+        self._replicate("new@example.com")  # the replica already has a row the write is about to replace
+        reads = []
+
+        def then_read(method):
+            def wrapper(*args):
+                method(*args)
+                if not reads:
+                    reads.append(self._first_name("new@example.com"))
+
+            return wrapper
+
+        with mock.patch.object(self.router, "mark_written", then_read(self.router.mark_written)), mock.patch.object(
+            self.repo.cache, "invalidate", then_read(self.repo.cache.invalidate)
+        ):
+            self.repo.create_account("new@example.com", "Primary", "Copy", "pw")
+
+        self.assertEqual(reads, ["Primary"])
+        self.assertEqual(self._first_name("new@example.com"), "Primary")
+
+    def test_round_robin_skips_failed_replica_until_probe_succeeds(self):
+        broken_dir = os.path.join(self.tmpdir.name, "missing")
+        broken_engine = create_engine("sqlite:///" + os.path.join(broken_dir, "replica.db"))
+        broken = replicas.Replica("replica-1", sessionmaker(bind=broken_engine))
+        self.router.replicas.append(broken)
+        self._replicate("old@example.com")
+
+        names = [self._first_name("old@example.com") for _ in range(4)]
+
+        # replica-1 fails, its read is retried on the primary (which lacks the account)
+        # and it is skipped from then on.
+        self.assertEqual(names, ["Replica", None, "Replica", "Replica"])
+        self.assertEqual(broken.down_until, 10)
+
+        os.mkdir(broken_dir)
+        base.Base.metadata.create_all(broken_engine)
+        self.assertEqual(self._first_name("old@example.com"), "Replica")
+        self.clock.now = 11
+        self.assertIsNone(self._first_name("old@example.com"))
+        self.assertEqual(broken.down_until, 0)
+        broken_engine.dispose()
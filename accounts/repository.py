@@ -1,11 +1,41 @@
+import os
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union
+
 import structlog
+from sqlalchemy import LargeBinary, Row, cast, delete, func, insert, literal, or_, select, tuple_, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from accounts.cache import AccountCache
+from accounts.db import SessionFactory
+from accounts.models import outbox
+from accounts.models.outbox import AccountOutboxEvent
 from accounts.models.users import User
+from accounts.replicas import ReplicaRouter
+from accounts.utils import creds_utils
 
 logger = structlog.get_logger()
 
+T = TypeVar("T")
+
+# Upper bound on the number of bound parameters in a single IN (...) clause.
+IN_CLAUSE_CHUNK_SIZE = 1000
+
+# Columns a client may change through UpdateAccount.
+UPDATABLE_FIELDS = ("email", "first_name", "last_name", "hashed_password")
+
+# iter_changed_since holds back rows written less than this many seconds ago.
+# updated_at only has whole seconds on SQLite and is stamped before the write
+# commits, so a newer row could still appear behind a cursor within that time.
+CHANGES_SAFETY_LAG = float(os.getenv("ACCOUNTS_CHANGES_SAFETY_LAG", "5"))
+
+
+def changes_cutoff() -> datetime:
+    """Upper bound on updated_at that iter_changed_since can return without missing later writes."""
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=CHANGES_SAFETY_LAG)
+
 
 class AccountNotFoundError(Exception):
     pass
@@ -19,9 +49,81 @@ class DatabaseError(Exception):
     pass
 
 
+def is_duplicate_email(exc: IntegrityError) -> bool:
+    """Whether an IntegrityError is a violation of the unique constraint on users.email."""
+    message = str(exc.orig).lower()
+    return "email" in message and ("duplicate" in message or "unique" in message)
+
+
+def email_lookup(email: str):
+    """SELECT of the account with this email in any case, served by ix_users_email_lower."""
+    return select(User).where(func.lower(User.email) == email.lower()).limit(1)
+
+
+def check_updatable(changes: Dict[str, str]) -> None:
+    unknown = sorted(set(changes) - set(UPDATABLE_FIELDS))
+    if unknown:
+        raise ValueError(f"Fields cannot be updated: {', '.join(unknown)}")
+
+
+def changed_fields_update(account_id: int, changes: Dict[str, str]):
+    """UPDATE of the given columns that only matches the row if at least one of them differs."""
+    # Compare as bytes so a case-insensitive collation does not hide a change of case.
+    differs = [
+        cast(getattr(User, field), LargeBinary) != cast(literal(value), LargeBinary) for field, value in changes.items()
+    ]
+    return (
+        update(User)
+        .where(User.id == account_id, or_(*differs))
+        .values(**changes)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def outbox_insert(event_type: str, account_id: int, email: str, previous_email: Optional[str] = None):
+    """INSERT of an account change into the outbox, to run in the transaction that makes the change."""
+    return insert(AccountOutboxEvent).values(
+        event_type=event_type,
+        account_id=account_id,
+        email=email,
+        previous_email=previous_email if previous_email != email else None,
+    )
+
+
+def _chunks(values: Sequence, size: Optional[int] = None) -> Iterable[Sequence]:
+    size = size or IN_CLAUSE_CHUNK_SIZE
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
 class AccountRepository:
-    def __init__(self, session: Session):
-        self.session = session
+    """Writes go through ``session_factory`` (the primary); reads go through ``replicas`` when given."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        cache: Optional[AccountCache] = None,
+        replicas: Optional[ReplicaRouter] = None,
+    ):
+        self.session_factory = session_factory
+        self.cache = cache
+        self.replicas = replicas
+
+    def _read(self, query: Callable[[Session], T], *keys) -> T:
+        """Run a read-only query; ``keys`` (emails, ids) it touches keep it on the primary right after a write."""
+        if self.replicas is None:
+            with self.session_factory() as session:
+                return query(session)
+        return self.replicas.read(query, keys)
+
+    def _written(self, *emails: str, account_ids: Iterable[int] = ()) -> None:
+        # Pin reads to the primary before invalidating: in the other order a read in
+        # between could fetch the old row from a lagging replica and cache it again.
+        if self.replicas is not None:
+            self.replicas.mark_written(*emails, *account_ids)
+        if self.cache is not None:
+            self.cache.invalidate(*emails)
+        creds_utils.invalidate_token(*emails)
 
     def create_account(
         self,
@@ -29,71 +131,281 @@ class AccountRepository:
         first_name: str,
         last_name: str,
         hashed_password: str,
+        account_id: Optional[int] = None,
     ) -> User:
-        with self.session as session:
-            existing_user = session.query(User).filter_by(email=email).first()
-            if existing_user:
-                logger.warning("User already exists", email=email)
-                raise DuplicateEmailError("Email already exists")
-
-            new_account = User(
-                email=email,
-                first_name=first_name,
-                last_name=last_name,
-                hashed_password=hashed_password,
-            )
+        """Insert an account; ``account_id`` is left to the database unless given (sharded ids)."""
+        new_account = User(
+            id=account_id,
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            hashed_password=hashed_password,
+        )
+        with self.session_factory() as session:
             session.add(new_account)
             try:
+                # One INSERT; on dialects with RETURNING the id and server defaults come back with it.
+                session.flush()
+                if not session.get_bind().dialect.insert_returning:
+                    # The server defaults were not returned; load them while the row is still attached.
+                    session.refresh(new_account, ["created_at", "updated_at"])
+                session.execute(outbox_insert(outbox.CREATED, new_account.id, email))
+                # Detach before commit so commit does not expire it and force a reload.
+                session.expunge(new_account)
                 session.commit()
             except IntegrityError as exc:
                 session.rollback()
-                logger.error("Failed to create account", error=str(exc), new_account=new_account)
-                raise
-            session.refresh(new_account)
+                if is_duplicate_email(exc):
+                    logger.warning("User already exists", email=email)
+                    raise DuplicateEmailError("Email already exists") from exc
+                logger.error("Failed to create account", error=str(exc), email=email)
+                raise DatabaseError("Database error during create") from exc
+        self._written(email, account_ids=[new_account.id])
         return new_account
 
     def get_account_by_email(self, email: str):
+        if self.cache is not None:
+            found, account = self.cache.get(email)
+            if found:
+                return account
+            generation = self.cache.generation
         try:
-            with self.session as session:
-                account = session.query(User).filter_by(email=email).first()
+            account = self._read(lambda session: session.scalar(email_lookup(email)), email)
         except SQLAlchemyError as exc:
             logger.error("Database error while fetching account", error=str(exc), email=email)
             raise DatabaseError("Database error") from exc
+        if self.cache is not None:
+            self.cache.put(email, account, generation)
         return account
 
     def update_account(self, id, email, first_name, last_name, hashed_password) -> User:
-        with self.session as session:
+        return self.update_account_fields(
+            id, email=email, first_name=first_name, last_name=last_name, hashed_password=hashed_password
+        )
+
+    def update_account_fields(self, account_id: int, **changes: str) -> User:
+        """Write only the given columns, and nothing at all if they already hold those values."""
+        check_updatable(changes)
+        with self.session_factory() as session:
             try:
-                existing_account = session.query(User).filter_by(id=id).one_or_none()
-                if not existing_account:
-                    logger.error("Account not found for update", account_id=id)
+                # Caches and outbox consumers key by email, so the old one has to be read before it is overwritten.
+                previous_email = self._current_email(session, account_id) if "email" in changes else None
+                account = self._write_changes(session, account_id, changes) if changes else None
+                written = account is not None
+                if account is None:
+                    account = session.get(User, account_id)
+                if account is None:
+                    logger.error("Account not found for update", account_id=account_id)
                     raise AccountNotFoundError("Account not found")
+                if written:
+                    session.execute(outbox_insert(outbox.UPDATED, account_id, account.email, previous_email))
 
-                existing_account.email = email
-                existing_account.first_name = first_name
-                existing_account.last_name = last_name
-                existing_account.hashed_password = hashed_password
-
+                session.expunge(account)
                 session.commit()
-                session.refresh(existing_account)
             except SQLAlchemyError as exc:
                 session.rollback()
-                logger.error("Failed to update account", error=str(exc), account_id=id)
+                logger.error("Failed to update account", error=str(exc), account_id=account_id)
                 raise DatabaseError("Database error during update") from exc
-        return existing_account
+        if written:
+            self._written(previous_email or account.email, account.email, account_ids=[account_id])
+        return account
+
+    def _write_changes(self, session, account_id: int, changes: Dict[str, str]) -> Optional[User]:
+        statement = changed_fields_update(account_id, changes)
+        if session.get_bind().dialect.update_returning:
+            return session.scalars(statement.returning(User)).one_or_none()
+        if session.execute(statement).rowcount:
+            return session.get(User, account_id)
+        return None
 
     def delete_account(self, account_id: int) -> bool:
-        with self.session as session:
+        statement = delete(User).where(User.id == account_id).execution_options(synchronize_session=False)
+        with self.session_factory() as session:
             try:
-                account = session.query(User).filter_by(id=account_id).one_or_none()
-                if not account:
+                if session.get_bind().dialect.delete_returning:
+                    email = session.scalars(statement.returning(User.email)).one_or_none()
+                    deleted = email is not None
+                else:
+                    email = self._current_email(session, account_id)
+                    deleted = bool(session.execute(statement).rowcount)
+                if not deleted:
                     logger.error("Account not found for deletion", account_id=account_id)
                     raise AccountNotFoundError("Account not found")
+                session.execute(outbox_insert(outbox.DELETED, account_id, email))
 
-                session.delete(account)
                 session.commit()
+                self._written(email, account_ids=[account_id])
                 return True
             except SQLAlchemyError as exc:
                 session.rollback()
                 logger.error("Failed to delete account", error=str(exc), account_id=account_id)
                 raise DatabaseError("Database error during deletion") from exc
+
+    def _current_email(self, session, account_id: int) -> Optional[str]:
+        return session.scalar(select(User.email).where(User.id == account_id))
+
+    def _get_accounts_by(self, column, values: Iterable, key: Callable[[User], Any]) -> Dict:
+        keys = list(dict.fromkeys(values))
+
+        def query(session):
+            found = {}
+            for chunk in _chunks(keys):
+                for account in session.scalars(select(User).where(column.in_(chunk))):
+                    found[key(account)] = account
+            return found
+
+        try:
+            return self._read(query, *keys)
+        except SQLAlchemyError as exc:
+            logger.error("Database error while fetching accounts", error=str(exc), count=len(keys))
+            raise DatabaseError("Database error") from exc
+
+    def get_accounts_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        """Accounts keyed by lower-cased email; like get_account_by_email, emails match case-insensitively."""
+        return self._get_accounts_by(
+            func.lower(User.email), [email.lower() for email in emails], key=lambda account: account.email.lower()
+        )
+
+    def get_accounts_by_ids(self, account_ids: Iterable[int]) -> Dict[int, User]:
+        return self._get_accounts_by(User.id, account_ids, key=attrgetter("id"))
+
+    def create_accounts(self, accounts: Sequence[dict]) -> List[Union[User, DuplicateEmailError]]:
+        """Create many accounts with one existence check, one multi-row INSERT and one outbox INSERT.
+
+        Returns one entry per input, in order: the created ``User`` or a
+        ``DuplicateEmailError`` for emails that already exist or repeat within the batch.
+        An input may carry its own ``id``.
+        """
+        if not accounts:
+            return []
+        emails = [account["email"] for account in accounts]
+        existing = self.get_accounts_by_emails(emails)
+        results: List[Union[User, DuplicateEmailError, None]] = []
+        to_insert = {}
+        for account in accounts:
+            email = account["email"].lower()
+            if email in existing or email in to_insert:
+                results.append(DuplicateEmailError("Email already exists"))
+            else:
+                to_insert[email] = account
+                results.append(None)
+
+        if to_insert:
+            try:
+                with self.session_factory() as session:
+                    session.execute(insert(User), list(to_insert.values()))
+                    created = {}
+                    for chunk in _chunks(list(to_insert)):
+                        query = select(User).where(func.lower(User.email).in_(chunk)).order_by(User.id)
+                        for account in session.scalars(query):
+                            created[account.email.lower()] = account
+                    session.execute(
+                        insert(AccountOutboxEvent),
+                        [
+                            {"event_type": outbox.CREATED, "account_id": account.id, "email": account.email}
+                            for account in created.values()
+                        ],
+                    )
+                    session.expunge_all()
+                    session.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent signup; fall back to per-row inserts to find out which.
+                logger.warning("Batch insert conflicted, retrying row by row", count=len(to_insert))
+                return self._create_accounts_one_by_one(accounts)
+            except SQLAlchemyError as exc:
+                logger.error("Failed to create accounts", error=str(exc), count=len(to_insert))
+                raise DatabaseError("Database error during batch create") from exc
+            self._written(*to_insert, account_ids=[account.id for account in created.values()])
+            results = [created[email.lower()] if result is None else result for email, result in zip(emails, results)]
+        return results
+
+    def _create_accounts_one_by_one(self, accounts: Sequence[dict]) -> List[Union[User, DuplicateEmailError]]:
+        results = []
+        for account in accounts:
+            fields = dict(account)
+            account_id = fields.pop("id", None)
+            try:
+                results.append(self.create_account(**fields, account_id=account_id))
+            except DuplicateEmailError:
+                results.append(DuplicateEmailError("Email already exists"))
+        return results
+
+    def iter_accounts(
+        self,
+        is_active: Optional[bool] = None,
+        is_verified: Optional[bool] = None,
+        after_id: int = 0,
+        page_size: int = 500,
+        limit: Optional[int] = None,
+    ) -> Iterator[List[Row]]:
+        """Yield pages of accounts ordered by id, walking the primary key (keyset pagination).
+
+        Each page is one ``id > last_id ... LIMIT page_size`` query in its own short
+        session, so memory and transaction length stay flat however large the table.
+        Rows carry the ``Account`` message columns only.
+        """
+        stmt = select(User.id, User.email, User.first_name, User.last_name, User.is_active, User.is_verified)
+        if is_active is not None:
+            stmt = stmt.where(User.is_active == is_active)
+        if is_verified is not None:
+            stmt = stmt.where(User.is_verified == is_verified)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page_query = stmt.where(User.id > after_id).order_by(User.id).limit(size)
+            try:
+                page = self._read(lambda session: session.execute(page_query).all())
+            except SQLAlchemyError as exc:
+                logger.error("Database error while listing accounts", error=str(exc), after_id=after_id)
+                raise DatabaseError("Database error") from exc
+            if not page:
+                return
+            yield page
+            after_id = page[-1].id
+            if remaining is not None:
+                remaining -= len(page)
+            if len(page) < size:
+                return
+
+    def iter_changed_since(
+        self,
+        since: datetime,
+        after_id: int = 0,
+        page_size: int = 500,
+        until: Optional[datetime] = None,
+    ) -> Iterator[List[Row]]:
+        """Yield pages of accounts last written at or after ``since``, ordered by ``(updated_at, id)``.
+
+        Pages are keyset queries on ix_users_updated_at; resume with the last row's
+        ``updated_at`` and ``id``. Rows carry the ``Account`` columns plus ``updated_at``.
+
+        Only rows written before ``until`` (naive UTC, default CHANGES_SAFETY_LAG
+        seconds ago) are returned, so no resume position gets ahead of a write
+        that can still land behind it: one in the same second, or one whose
+        transaction commits later than a newer row's.
+        """
+        if until is None:
+            until = changes_cutoff()
+        stmt = select(
+            User.id, User.email, User.first_name, User.last_name, User.is_active, User.is_verified, User.updated_at
+        )
+        changed_after = tuple_(User.updated_at, User.id)
+        while True:
+            page_query = (
+                stmt.where(
+                    changed_after > tuple_(literal(since, User.updated_at.type), after_id), User.updated_at < until
+                )
+                .order_by(User.updated_at, User.id)
+                .limit(page_size)
+            )
+            try:
+                page = self._read(lambda session: session.execute(page_query).all())
+            except SQLAlchemyError as exc:
+                logger.error("Database error while listing changed accounts", error=str(exc), since=str(since))
+                raise DatabaseError("Database error") from exc
+            if not page:
+                return
+            yield page
+            since, after_id = page[-1].updated_at, page[-1].id
+            if len(page) < page_size:
+                return
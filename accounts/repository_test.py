@@ -1,13 +1,15 @@
 import os
 import tempfile
 import unittest
+from datetime import datetime, timedelta
 from unittest import mock
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, delete, event, select, update
 from sqlalchemy.orm import sessionmaker
 
-from accounts import repository
+from accounts import cache, repository
 from accounts.models import base, users
+from accounts.models.outbox import AccountOutboxEvent
 
 
 class TestAccountRepository(unittest.TestCase):
@@ -18,7 +20,7 @@ class TestAccountRepository(unittest.TestCase):
         base.Base.metadata.create_all(self.engine)
 
         self.Session = sessionmaker(bind=self.engine)
-        self.repo = repository.AccountRepository(self.Session())
+        self.repo = repository.AccountRepository(self.Session)
 
     def tearDown(self):
         self.engine.dispose()
@@ -58,6 +60,19 @@ class TestAccountRepository(unittest.TestCase):
             )
         mock_warning_logger.assert_called_once_with("User already exists", email="test@example.com")
 
+    def test_create_account_is_a_single_statement_plus_outbox(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith("INSERT INTO users"))
+        self.assertTrue(statements[1].startswith("INSERT INTO account_outbox"))
+        self.assertIsNotNone(account.id)
+        self.assertIsNotNone(account.created_at)
+        self.assertTrue(account.is_active)
+
     def test_get_account_by_email(self):
         self.repo.create_account(
             email="test@email.com",
@@ -134,3 +149,411 @@ class TestAccountRepository(unittest.TestCase):
         with self.assertRaises(repository.AccountNotFoundError):
             self.repo.delete_account(fake_account_id)
         mock_error_logger.assert_called_once_with("Account not found for deletion", account_id=fake_account_id)
+
+    def test_update_and_delete_are_single_statements_plus_outbox(self):
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        updated = self.repo.update_account(account.id, "one@example.com", "Second", "Last", "pw2")
+        # The email is written, so the old one is read first for the outbox event.
+        self.assertEqual([statement.split()[0] for statement in statements], ["SELECT", "UPDATE", "INSERT"])
+        self.assertEqual(updated.first_name, "Second")
+        self.assertTrue(updated.is_active)
+
+        statements.clear()
+        self.assertTrue(self.repo.delete_account(account.id))
+        self.assertEqual([statement.split()[0] for statement in statements], ["DELETE", "INSERT"])
+
+    @mock.patch.object(repository.logger, "error")
+    def test_update_without_returning_uses_rowcount(self, mock_error_logger):
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+        with mock.patch.object(self.engine.dialect, "update_returning", False), mock.patch.object(
+            self.engine.dialect, "delete_returning", False
+        ):
+            updated = self.repo.update_account(account.id, "two@example.com", "Second", "Last", "pw2")
+            self.assertEqual(updated.first_name, "Second")
+            with self.assertRaises(repository.AccountNotFoundError):
+                self.repo.update_account(999, "x@example.com", "X", "Y", "pw")
+            self.assertTrue(self.repo.delete_account(account.id))
+            with self.assertRaises(repository.AccountNotFoundError):
+                self.repo.delete_account(account.id)
+        self.assertEqual(mock_error_logger.call_count, 2)
+
+    def test_create_without_returning_loads_server_defaults(self):
+        with mock.patch.object(self.engine.dialect, "insert_returning", False):
+            account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+
+        self.assertIsNotNone(account.id)
+        self.assertIsNotNone(account.created_at)
+        self.assertIsNotNone(account.updated_at)
+
+    def test_update_account_fields_writes_only_masked_columns(self):
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        updated = self.repo.update_account_fields(account.id, first_name="Renamed")
+
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith("UPDATE users SET first_name=?, updated_at=CURRENT_TIMESTAMP WHERE"))
+        self.assertEqual(updated.first_name, "Renamed")
+        self.assertEqual(updated.last_name, "Last")
+
+    @mock.patch("accounts.utils.creds_utils.invalidate_token")
+    def test_email_change_invalidates_tokens_for_both_emails(self, mock_invalidate_token):
+        account = self.repo.create_account("old@example.com", "First", "Last", "pw")
+        mock_invalidate_token.reset_mock()
+
+        self.repo.update_account_fields(account.id, email="new@example.com")
+        mock_invalidate_token.assert_called_once_with("old@example.com", "new@example.com")
+
+        mock_invalidate_token.reset_mock()
+        self.repo.delete_account(account.id)
+        mock_invalidate_token.assert_called_once_with("new@example.com")
+
+    def test_update_account_fields_rejects_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            self.repo.update_account_fields(1, is_verified=True)
+
+    def test_get_accounts_by_emails_and_ids(self):
+        first = self.repo.create_account("a@example.com", "A", "User", "pw")
+        second = self.repo.create_account("b@example.com", "B", "User", "pw")
+
+        by_email = self.repo.get_accounts_by_emails(["a@example.com", "missing@example.com", "b@example.com"])
+        by_id = self.repo.get_accounts_by_ids([second.id, 999, first.id])
+
+        self.assertEqual(set(by_email), {"a@example.com", "b@example.com"})
+        self.assertEqual(by_id[first.id].email, "a@example.com")
+        self.assertNotIn(999, by_id)
+
+    @mock.patch.object(repository, "IN_CLAUSE_CHUNK_SIZE", 2)
+    def test_get_accounts_by_emails_chunks_large_lists(self):
+        for i in range(5):
+            self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw")
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        found = self.repo.get_accounts_by_emails([f"user{i}@example.com" for i in range(5)])
+
+        self.assertEqual(len(found), 5)
+        self.assertEqual(len(statements), 3)
+
+    def test_create_accounts_reports_duplicates_in_order(self):
+        self.repo.create_account("taken@example.com", "Taken", "User", "pw")
+
+        results = self.repo.create_accounts(
+            [
+                {"email": "new@example.com", "first_name": "New", "last_name": "User", "hashed_password": "pw"},
+                {"email": "taken@example.com", "first_name": "Dup", "last_name": "User", "hashed_password": "pw"},
+                {"email": "new@example.com", "first_name": "Again", "last_name": "User", "hashed_password": "pw"},
+            ]
+        )
+
+        self.assertIsInstance(results[0], users.User)
+        self.assertEqual(results[0].first_name, "New")
+        self.assertTrue(results[0].is_active)
+        self.assertIsInstance(results[1], repository.DuplicateEmailError)
+        self.assertIsInstance(results[2], repository.DuplicateEmailError)
+        check_session = self.Session()
+        self.assertEqual(check_session.query(users.User).count(), 2)
+
+    @mock.patch.object(repository.logger, "warning")
+    def test_create_accounts_falls_back_on_conflict(self, mock_warning_logger):
+        accounts = [
+            {"email": "a@example.com", "first_name": "A", "last_name": "User", "hashed_password": "pw"},
+            {"email": "b@example.com", "first_name": "B", "last_name": "User", "hashed_password": "pw"},
+        ]
+        self.repo.create_account("b@example.com", "Other", "Writer", "pw")
+        # Simulate the existence check missing a row another writer inserted just before the INSERT.
+        with mock.patch.object(self.repo, "get_accounts_by_emails", return_value={}):
+            results = self.repo.create_accounts(accounts)
+
+        self.assertIsInstance(results[0], users.User)
+        self.assertIsInstance(results[1], repository.DuplicateEmailError)
+        mock_warning_logger.assert_any_call("Batch insert conflicted, retrying row by row", count=2)
+
+    def test_iter_accounts_walks_pages_by_id(self):
+        for i in range(5):
+            self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw")
+
+        pages = list(self.repo.iter_accounts(page_size=2))
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [row.id for page in pages for row in page]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(pages[0][0].email, "user0@example.com")
+
+    def test_iter_accounts_filters_resumes_and_limits(self):
+        accounts = [self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw") for i in range(6)]
+        with self.Session() as session:
+            session.query(users.User).filter(users.User.id == accounts[1].id).update({"is_active": False})
+            session.commit()
+
+        active = [row.email for page in self.repo.iter_accounts(is_active=True) for row in page]
+        resumed = [row.id for page in self.repo.iter_accounts(after_id=accounts[3].id) for row in page]
+        limited = [row.id for page in self.repo.iter_accounts(page_size=2, limit=3) for row in page]
+
+        self.assertNotIn("user1@example.com", active)
+        self.assertEqual(len(active), 5)
+        self.assertEqual(resumed, [accounts[4].id, accounts[5].id])
+        self.assertEqual(limited, [account.id for account in accounts[:3]])
+
+
+class TestAccountOutbox(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine("sqlite:///" + os.path.join(self.tmpdir.name, "test.db"))
+        base.Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.repo = repository.AccountRepository(self.Session)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _events(self):
+        with self.Session() as session:
+            return [(e.event_type, e.email) for e in session.query(AccountOutboxEvent).order_by(AccountOutboxEvent.id)]
+
+    def test_batch_create_writes_one_event_per_account(self):
+        self.repo.create_account("taken@example.com", "Taken", "User", "pw")
+        with self.engine.begin() as conn:
+            conn.execute(delete(AccountOutboxEvent))
+
+        self.repo.create_accounts(
+            [
+                {"email": f"{name}@example.com", "first_name": "F", "last_name": "L", "hashed_password": "pw"}
+                for name in ("new", "taken", "other")
+            ]
+        )
+
+        self.assertEqual(self._events(), [("created", "new@example.com"), ("created", "other@example.com")])
+
+    def test_failed_or_no_op_writes_leave_no_event(self):
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+        with self.assertRaises(repository.DuplicateEmailError):
+            self.repo.create_account("one@example.com", "Again", "Last", "pw")
+        self.repo.update_account_fields(account.id, first_name="First")
+
+        self.assertEqual(self._events(), [("created", "one@example.com")])
+
+
+class TestAccountChanges(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine("sqlite:///" + os.path.join(self.tmpdir.name, "test.db"))
+        base.Base.metadata.create_all(self.engine)
+        self.repo = repository.AccountRepository(sessionmaker(bind=self.engine))
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _set_updated_at(self, account_id, updated_at):
+        with self.engine.begin() as conn:
+            conn.execute(update(users.User).where(users.User.id == account_id).values(updated_at=updated_at))
+
+    def test_update_bumps_updated_at(self):
+        account = self.repo.create_account("one@example.com", "First", "Last", "pw")
+        self._set_updated_at(account.id, datetime(2020, 1, 1))
+
+        updated = self.repo.update_account_fields(account.id, first_name="Renamed")
+        unchanged = self.repo.update_account_fields(account.id, first_name="Renamed")
+
+        self.assertGreater(updated.updated_at, datetime(2020, 1, 1))
+        self.assertEqual(unchanged.updated_at, updated.updated_at)
+
+    def test_iter_changed_since_orders_by_write_time_and_resumes(self):
+        accounts = [self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw") for i in range(5)]
+        times = [datetime(2026, 1, 3), datetime(2026, 1, 1), datetime(2026, 1, 2), datetime(2026, 1, 2), None]
+        for account, updated_at in zip(accounts, times):
+            self._set_updated_at(account.id, updated_at or datetime(2025, 12, 31))
+
+        pages = list(self.repo.iter_changed_since(datetime(2026, 1, 1), page_size=2))
+        ids = [row.id for page in pages for row in page]
+        last = pages[0][-1]
+        resumed = [row.id for page in self.repo.iter_changed_since(last.updated_at, after_id=last.id) for row in page]
+
+        self.assertEqual(ids, [accounts[1].id, accounts[2].id, accounts[3].id, accounts[0].id])
+        self.assertEqual(resumed, [accounts[3].id, accounts[0].id])
+
+    def test_iter_changed_since_returns_an_update_in_the_same_second_as_the_cursor(self):
+        second = datetime(2026, 10, 18, 12, 0, 0)
+        accounts = [self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw") for i in range(2)]
+        for account in accounts:
+            self._set_updated_at(account.id, second)
+
+        self.assertEqual(list(self.repo.iter_changed_since(datetime(2026, 1, 1), until=second)), [])
+        self.repo.update_account_fields(accounts[0].id, first_name="Renamed")
+        self._set_updated_at(accounts[0].id, second)  # stamped within the same whole second
+        later = second + timedelta(seconds=1)
+        pages = list(self.repo.iter_changed_since(datetime(2026, 1, 1), until=later))
+
+        self.assertEqual([(row.id, row.first_name) for row in pages[0]], [(1, "Renamed"), (2, "First")])
+        self.assertEqual(list(self.repo.iter_changed_since(second, after_id=2, until=later)), [])
+
+    def test_iter_changed_since_holds_back_recent_writes(self):
+        self.repo.create_account("new@example.com", "First", "Last", "pw")
+
+        self.assertEqual(list(self.repo.iter_changed_since(datetime(2026, 1, 1))), [])
+        with mock.patch.object(repository, "CHANGES_SAFETY_LAG", -60):
+            self.assertEqual(len(next(self.repo.iter_changed_since(datetime(2026, 1, 1)))), 1)
+
+    def test_iter_changed_since_uses_updated_at_index(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append((args[2], args[3])))
+        list(self.repo.iter_changed_since(datetime(2026, 1, 1), after_id=3))
+        with self.engine.connect() as conn:
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statements[-1][0], statements[-1][1]).all()
+        self.assertIn("ix_users_updated_at", " ".join(row[-1] for row in plan))
+
+
+class TestAccountIndexes(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine("sqlite:///" + os.path.join(self.tmpdir.name, "test.db"))
+        base.Base.metadata.create_all(self.engine)
+        self.repo = repository.AccountRepository(sessionmaker(bind=self.engine))
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._capture)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def _plan(self, statement, parameters=()) -> str:
+        with self.engine.connect() as conn:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return " ".join(row[-1] for row in rows)
+
+    def test_get_account_by_email_is_case_insensitive_and_indexed(self):
+        self.repo.create_account("Mixed.Case@example.com", "First", "Last", "pw")
+
+        account = self.repo.get_account_by_email("mixed.case@EXAMPLE.com")
+
+        self.assertEqual(account.email, "Mixed.Case@example.com")
+        self.assertIn("USING INDEX ix_users_email_lower", self._plan(*self.statements[-1]))
+
+    def test_get_accounts_by_emails_is_case_insensitive_and_indexed(self):
+        self.repo.create_account("Mixed.Case@example.com", "First", "Last", "pw")
+
+        found = self.repo.get_accounts_by_emails(["mixed.case@EXAMPLE.com", "MIXED.CASE@example.com"])
+
+        self.assertEqual(list(found), ["mixed.case@example.com"])
+        self.assertEqual(found["mixed.case@example.com"].email, "Mixed.Case@example.com")
+        self.assertIn("USING INDEX ix_users_email_lower", self._plan(*self.statements[-1]))
+
+    @mock.patch.object(repository.logger, "warning")
+    def test_batch_create_treats_emails_differing_only_in_case_as_duplicates(self, mock_warning_logger):
+        self.repo.create_account("user@example.com", "First", "Last", "pw")
+        account = {"first_name": "First", "last_name": "Last", "hashed_password": "pw"}
+
+        results = self.repo.create_accounts(
+            [
+                {**account, "email": "USER@example.com"},
+                {**account, "email": "New@Example.com"},
+                {**account, "email": "new@example.com"},
+            ]
+        )
+
+        self.assertIsInstance(results[0], repository.DuplicateEmailError)
+        self.assertEqual(results[1].email, "New@Example.com")
+        self.assertIsInstance(results[2], repository.DuplicateEmailError)
+
+    @mock.patch.object(repository.logger, "warning")
+    def test_emails_differing_only_in_case_are_duplicates(self, mock_warning_logger):
+        self.repo.create_account("user@example.com", "First", "Last", "pw")
+        with self.assertRaises(repository.DuplicateEmailError):
+            self.repo.create_account("USER@example.com", "First", "Last", "pw")
+
+    def test_list_accounts_by_status_uses_status_index(self):
+        list(self.repo.iter_accounts(is_active=True, is_verified=False))
+        self.assertIn("ix_users_status", self._plan(*self.statements[-1]))
+
+    def test_admin_queries_use_indexes(self):
+        by_name = select(users.User).where(users.User.last_name == "Last", users.User.first_name == "First")
+        by_signup = select(users.User).where(users.User.created_at >= datetime(2026, 1, 1))
+        for query, index in [(by_name, "ix_users_last_name_first_name"), (by_signup, "ix_users_created_at")]:
+            compiled = query.compile(self.engine)
+            with self.subTest(index=index):
+                self.assertIn(index, self._plan(str(compiled), tuple(compiled.params.values())))
+
+
+class TestCachedAccountRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.engine = create_engine("sqlite:///" + db_path)
+        base.Base.metadata.create_all(self.engine)
+
+        self.Session = sessionmaker(bind=self.engine)
+        self.cache = cache.AccountCache(negative_max_size=10)
+        self.repo = repository.AccountRepository(self.Session, cache=self.cache)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _create(self, email="test@example.com"):
+        return self.repo.create_account(email=email, first_name="First", last_name="Last", hashed_password="pw")
+
+    def test_get_account_by_email_served_from_cache(self):
+        self._create()
+        self.repo.get_account_by_email("test@example.com")
+
+        with mock.patch.object(self.repo, "session_factory") as mock_session_factory:
+            account = self.repo.get_account_by_email("test@example.com")
+
+        mock_session_factory.assert_not_called()
+        self.assertEqual(account.first_name, "First")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_update_account_invalidates_old_and_new_email(self):
+        account = self._create()
+        self.repo.get_account_by_email("test@example.com")
+        self.assertIsNone(self.repo.get_account_by_email("new@example.com"))
+
+        self.repo.update_account(account.id, "new@example.com", "Updated", "Last", "pw")
+
+        self.assertIsNone(self.repo.get_account_by_email("test@example.com"))
+        self.assertEqual(self.repo.get_account_by_email("new@example.com").first_name, "Updated")
+
+    def test_delete_account_invalidates_cache(self):
+        account = self._create()
+        self.repo.get_account_by_email("test@example.com")
+
+        self.repo.delete_account(account.id)
+
+        self.assertIsNone(self.repo.get_account_by_email("test@example.com"))
+
+    def test_create_account_clears_negative_entry(self):
+        self.assertIsNone(self.repo.get_account_by_email("test@example.com"))
+        self._create()
+        self.assertIsNotNone(self.repo.get_account_by_email("test@example.com"))
+
+    def test_unchanged_update_skips_write_and_invalidation(self):
+        account = self._create()
+        self.repo.get_account_by_email("test@example.com")
+
+        with mock.patch.object(self.cache, "invalidate") as mock_invalidate:
+            same = self.repo.update_account_fields(account.id, first_name="First", last_name="Last")
+            nothing = self.repo.update_account_fields(account.id)
+
+        mock_invalidate.assert_not_called()
+        self.assertEqual(same.first_name, "First")
+        self.assertEqual(nothing.email, "test@example.com")
+
+    def test_update_account_fields_changes_case(self):
+        account = self._create()
+        self.repo.update_account_fields(account.id, first_name="FIRST")
+        self.assertEqual(self.repo.get_account_by_email("test@example.com").first_name, "FIRST")
@@ -0,0 +1,237 @@
+"""Compare the sync (thread pool) and grpc.aio AccountService server modes.
+
+Each mode runs in its own process on a seeded SQLite database while the
+benchmark drives GetAccount from a pool of concurrent asyncio clients:
+
+    python -m accounts.server_bench --concurrency 64 --duration 10
+
+``--processes`` runs each mode as that many server processes sharing one port
+through SO_REUSEPORT, as ACCOUNTS_PROCESSES does, to measure how throughput
+scales with cores. Give the load generator enough client processes that it is
+not the bottleneck itself:
+
+    python -m accounts.server_bench --modes sync --processes 1 2 4 --clients 4 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import grpc
+import structlog
+from codegen.accounts import service_pb2, service_pb2_grpc
+from sqlalchemy import insert
+
+from accounts import db, main
+from accounts.async_repository import AsyncAccountRepository
+from accounts.models import base, users
+from accounts.repository import AccountRepository
+
+
+def _email(i: int) -> str:
+    return f"bench{i}@example.com"
+
+
+def seed_database(db_path: str, accounts: int) -> None:
+    engine = db.create_engine("sqlite:///" + db_path)
+    base.Base.metadata.create_all(engine)
+    if not accounts:
+        engine.dispose()
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            insert(users.User),
+            [
+                {"email": _email(i), "first_name": "Bench", "last_name": str(i), "hashed_password": "x"}
+                for i in range(accounts)
+            ],
+        )
+    engine.dispose()
+
+
+def _run_sync_server(db_path: str, workers: int, port_queue, port: int) -> None:
+    engine = db.create_pooled_engine("sqlite:///" + db_path, max_workers=workers)
+    server = main.create_server(
+        AccountRepository(db.get_session_factory(bind=engine)), max_workers=workers, options=main.REUSEPORT_OPTIONS
+    )
+    port_queue.put(server.add_insecure_port(f"127.0.0.1:{port}"))
+    server.start()
+    server.wait_for_termination()
+
+
+async def _run_aio_server(db_path: str, workers: int, port_queue, port: int) -> None:
+    engine = db.create_pooled_async_engine("sqlite+aiosqlite:///" + db_path, max_workers=workers)
+    server = main.create_aio_server(
+        AsyncAccountRepository(db.get_async_session_factory(engine)), options=main.REUSEPORT_OPTIONS
+    )
+    port_queue.put(server.add_insecure_port(f"127.0.0.1:{port}"))
+    await server.start()
+    await server.wait_for_termination()
+
+
+def _run_server(mode: str, db_path: str, workers: int, port_queue, port: int = 0) -> None:
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    if mode == "sync":
+        _run_sync_server(db_path, workers, port_queue, port)
+    else:
+        asyncio.run(_run_aio_server(db_path, workers, port_queue, port))
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _drive_requests(port: int, accounts: int, concurrency: int, duration: float, seed: int = 0):
+    """GetAccount latencies, error count and elapsed seconds from ``concurrency`` clients over ``duration``.
+
+    Clients are spread over several channels, each with its own connection, so
+    that SO_REUSEPORT can hand them to different server processes.
+    """
+    latencies = []
+    errors = 0
+    # A local subchannel pool stops channels to the same address from sharing one connection.
+    channels = [
+        grpc.aio.insecure_channel(f"127.0.0.1:{port}", options=[("grpc.use_local_subchannel_pool", 1)])
+        for _ in range(max(1, concurrency // 8))
+    ]
+    try:
+        stubs = [service_pb2_grpc.AccountServiceStub(channel) for channel in channels]
+        await asyncio.gather(*(channel.channel_ready() for channel in channels))
+        deadline = time.perf_counter() + duration
+
+        async def worker(index: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed * concurrency + index)
+            stub = stubs[index % len(stubs)]
+            while time.perf_counter() < deadline:
+                request = service_pb2.GetAccountRequest(email=_email(rng.randrange(accounts)))
+                start = time.perf_counter()
+                try:
+                    await stub.GetAccount(request)
+                except grpc.aio.AioRpcError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*(channel.close() for channel in channels))
+    return latencies, errors, elapsed
+
+
+def _summary(latencies, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def drive(port: int, accounts: int, concurrency: int, duration: float) -> dict:
+    return _summary(*await _drive_requests(port, accounts, concurrency, duration))
+
+
+def _drive_client(port: int, accounts: int, concurrency: int, duration: float, seed: int):
+    return asyncio.run(_drive_requests(port, accounts, concurrency, duration, seed))
+
+
+def drive_processes(port: int, accounts: int, concurrency: int, duration: float, clients: int) -> dict:
+    """Like drive, from ``clients`` processes with ``concurrency`` in-flight requests each."""
+    if clients == 1:
+        return asyncio.run(drive(port, accounts, concurrency, duration))
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(clients) as pool:
+        runs = pool.starmap(_drive_client, [(port, accounts, concurrency, duration, seed) for seed in range(clients)])
+    latencies = [latency for run in runs for latency in run[0]]
+    return _summary(latencies, sum(run[1] for run in runs), max(run[2] for run in runs))
+
+
+def start_server_process(mode: str, db_path: str, workers: int, port: int = 0):
+    """Start an AccountService in a child process and return ``(process, port)``."""
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    server = ctx.Process(target=_run_server, args=(mode, db_path, workers, port_queue, port), daemon=True)
+    server.start()
+    try:
+        return server, port_queue.get(timeout=30)
+    except Exception:
+        server.terminate()
+        raise
+
+
+def start_server_processes(mode: str, db_path: str, workers: int, processes: int):
+    """Start ``processes`` AccountServices sharing one port and return ``(processes, port)``."""
+    server, port = start_server_process(mode, db_path, workers)
+    servers = [server]
+    try:
+        for _ in range(processes - 1):
+            servers.append(start_server_process(mode, db_path, workers, port=port)[0])
+    except Exception:
+        stop_servers(servers)
+        raise
+    return servers, port
+
+
+def stop_servers(servers) -> None:
+    for server in servers:
+        server.terminate()
+    for server in servers:
+        server.join()
+
+
+def run_mode(mode: str, db_path: str, args, processes: int = 1) -> dict:
+    servers, port = start_server_processes(mode, db_path, args.workers, processes)
+    try:
+        return drive_processes(port, args.accounts, args.concurrency, args.duration, args.clients)
+    finally:
+        stop_servers(servers)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs grpc.aio AccountService")
+    parser.add_argument("--modes", nargs="+", default=["sync", "aio"], choices=["sync", "aio"])
+    parser.add_argument("--accounts", type=int, default=1000, help="Accounts seeded into SQLite")
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight client requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--workers", type=int, default=main.MAX_WORKERS, help="Sync thread pool / DB pool size")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1], help="Server processes sharing the port")
+    parser.add_argument("--clients", type=int, default=1, help="Load generator processes")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        seed_database(db_path, args.accounts)
+        for mode in args.modes:
+            for processes in args.processes:
+                results[f"{mode}x{processes}"] = run_mode(mode, db_path, args, processes)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    # Scaling is relative to the single-process run of the same mode; without one it is not reported.
+    baselines = {name.partition("x")[0]: r["rps"] for name, r in results.items() if name.endswith("x1")}
+    print(f"{'mode':<10} {'rps':>10} {'scaling':>8} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for name, r in results.items():
+        baseline = baselines.get(name.partition("x")[0])
+        scaling = f"{r['rps'] / baseline:>7.2f}x" if baseline else f"{'n/a':>8}"
+        print(f"{name:<10} {r['rps']:>10.1f} {scaling} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main_cli()
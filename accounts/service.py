@@ -1,17 +1,31 @@
+import os
+import threading
+from typing import Optional
+
 import grpc
 import structlog
 from codegen.accounts import service_pb2, service_pb2_grpc
 
 from accounts import service_utils
+from accounts.outbox import OutboxRelay
 from accounts.repository import AccountNotFoundError, AccountRepository, DuplicateEmailError
 from accounts.utils import creds_utils
 
 logger = structlog.get_logger()
 
+MAX_BATCH_SIZE = int(os.getenv("ACCOUNTS_MAX_BATCH_SIZE", "10000"))
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+# Each WatchAccounts stream holds a server worker thread for as long as it is open.
+MAX_WATCHERS = int(os.getenv("ACCOUNTS_MAX_WATCHERS", "4"))
+WATCH_POLL_SECONDS = 1.0
+
 
 class AccountService(service_pb2_grpc.AccountServiceServicer):
-    def __init__(self, repo: AccountRepository):
+    def __init__(self, repo: AccountRepository, relay: Optional[OutboxRelay] = None, max_watchers: int = MAX_WATCHERS):
         self.repo = repo
+        self.relay = relay
+        self._watchers = threading.BoundedSemaphore(max_watchers)
 
     def CreateAccount(
         self, request: service_pb2.CreateAccountRequest, context: grpc.ServicerContext
@@ -31,14 +45,7 @@ class AccountService(service_pb2_grpc.AccountServiceServicer):
             context.abort(grpc.StatusCode.ALREADY_EXISTS, str(e))
             return service_pb2.CreateAccountResponse()
 
-        account_msg = service_pb2.Account(
-            account_id=account.id,
-            email=account.email,
-            first_name=account.first_name,
-            last_name=account.last_name,
-            is_active=account.is_active,
-            is_verified=account.is_verified,
-        )
+        account_msg = service_utils.to_account_message(account)
         return service_pb2.CreateAccountResponse(
             account=account_msg,
             token=creds_utils.generate_token(
@@ -59,14 +66,7 @@ class AccountService(service_pb2_grpc.AccountServiceServicer):
             context.abort(grpc.StatusCode.NOT_FOUND, "Account not found", email=request.email)
             return service_pb2.GetAccountResponse()
 
-        account_msg = service_pb2.Account(
-            account_id=account.id,
-            email=account.email,
-            first_name=account.first_name,
-            last_name=account.last_name,
-            is_active=account.is_active,
-            is_verified=account.is_verified,
-        )
+        account_msg = service_utils.to_account_message(account)
         return service_pb2.GetAccountResponse(
             account=account_msg,
             token=creds_utils.generate_token(
@@ -79,17 +79,29 @@ class AccountService(service_pb2_grpc.AccountServiceServicer):
     def UpdateAccount(
         self, request: service_pb2.UpdateAccountRequest, context: grpc.ServicerContext
     ) -> service_pb2.UpdateAccountResponse:
-        required_fields = ["account_id", "email", "first_name", "last_name", "hashed_password"]
-        service_utils.validate_required(context, request, required_fields)
+        if request.update_mask.paths:
+            service_utils.validate_required(context, request, ["account_id"])
+            try:
+                changes = service_utils.masked_changes(request)
+            except ValueError as e:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                return service_pb2.UpdateAccountResponse()
+        else:
+            required_fields = ["account_id", "email", "first_name", "last_name", "hashed_password"]
+            service_utils.validate_required(context, request, required_fields)
+            changes = None
 
         try:
-            updated_account = self.repo.update_account(
-                request.account_id,
-                request.email,
-                request.first_name,
-                request.last_name,
-                request.hashed_password,
-            )
+            if changes is None:
+                updated_account = self.repo.update_account(
+                    request.account_id,
+                    request.email,
+                    request.first_name,
+                    request.last_name,
+                    request.hashed_password,
+                )
+            else:
+                updated_account = self.repo.update_account_fields(request.account_id, **changes)
         except AccountNotFoundError as e:
             context.abort(grpc.StatusCode.NOT_FOUND, str(e), account_id=request.account_id)
             return service_pb2.UpdateAccountResponse()
@@ -97,14 +109,7 @@ class AccountService(service_pb2_grpc.AccountServiceServicer):
             context.abort(grpc.StatusCode.INTERNAL, "Failed to update account", account_id=request.account_id)
             return service_pb2.UpdateAccountResponse()
 
-        account = service_pb2.Account(
-            account_id=updated_account.id,
-            email=updated_account.email,
-            first_name=updated_account.first_name,
-            last_name=updated_account.last_name,
-            is_active=updated_account.is_active,
-            is_verified=updated_account.is_verified,
-        )
+        account = service_utils.to_account_message(updated_account)
         return service_pb2.UpdateAccountResponse(account=account)
 
     def DeleteAccount(
@@ -120,3 +125,153 @@ class AccountService(service_pb2_grpc.AccountServiceServicer):
         except AccountNotFoundError as e:
             context.abort(grpc.StatusCode.NOT_FOUND, str(e), account_id=request.account_id)
             return service_pb2.DeleteAccountResponse(success=False)
+
+    def BatchGetAccounts(
+        self, request: service_pb2.BatchGetAccountsRequest, context: grpc.ServicerContext
+    ) -> service_pb2.BatchGetAccountsResponse:
+        size = len(request.emails) + len(request.account_ids)
+        if size == 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Emails or account ids are required")
+            return service_pb2.BatchGetAccountsResponse()
+        if size > MAX_BATCH_SIZE:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Batch size exceeds {MAX_BATCH_SIZE}")
+            return service_pb2.BatchGetAccountsResponse()
+
+        by_email = self.repo.get_accounts_by_emails(request.emails) if request.emails else {}
+        by_id = self.repo.get_accounts_by_ids(request.account_ids) if request.account_ids else {}
+
+        results = [service_utils.batch_result(by_email.get(email.lower()), email=email) for email in request.emails]
+        results.extend(
+            service_utils.batch_result(by_id.get(account_id), account_id=account_id)
+            for account_id in request.account_ids
+        )
+        return service_pb2.BatchGetAccountsResponse(results=results)
+
+    def BatchCreateAccounts(
+        self, request: service_pb2.BatchCreateAccountsRequest, context: grpc.ServicerContext
+    ) -> service_pb2.BatchCreateAccountsResponse:
+        if not request.accounts:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Accounts are required")
+            return service_pb2.BatchCreateAccountsResponse()
+        if len(request.accounts) > MAX_BATCH_SIZE:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Batch size exceeds {MAX_BATCH_SIZE}")
+            return service_pb2.BatchCreateAccountsResponse()
+
+        required_fields = ["email", "first_name", "last_name", "hashed_password"]
+        results = [None] * len(request.accounts)
+        valid = []
+        for i, item in enumerate(request.accounts):
+            message = service_utils.missing_field_message(item, required_fields)
+            if message:
+                results[i] = service_utils.batch_error(grpc.StatusCode.INVALID_ARGUMENT, message, email=item.email)
+            else:
+                valid.append(i)
+
+        items = [request.accounts[i] for i in valid]
+        created = self.repo.create_accounts(
+            [
+                {
+                    "email": item.email,
+                    "first_name": item.first_name,
+                    "last_name": item.last_name,
+                    "hashed_password": item.hashed_password,
+                }
+                for item in items
+            ]
+        )
+        for i, outcome in zip(valid, created):
+            email = request.accounts[i].email
+            if isinstance(outcome, DuplicateEmailError):
+                results[i] = service_utils.batch_error(grpc.StatusCode.ALREADY_EXISTS, str(outcome), email=email)
+            else:
+                results[i] = service_utils.batch_result(outcome, email=email)
+        logger.info("Batch create finished", requested=len(request.accounts))
+        return service_pb2.BatchCreateAccountsResponse(results=results)
+
+    def ListAccounts(self, request: service_pb2.ListAccountsRequest, context: grpc.ServicerContext):
+        try:
+            after_id = service_utils.decode_cursor(request.cursor)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            return
+        if request.page_size < 0 or request.limit < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Page size and limit must not be negative")
+            return
+
+        pages = self.repo.iter_accounts(
+            is_active=request.is_active if request.HasField("is_active") else None,
+            is_verified=request.is_verified if request.HasField("is_verified") else None,
+            after_id=after_id,
+            page_size=min(request.page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE),
+            limit=request.limit or None,
+        )
+        for page in pages:
+            if not context.is_active():
+                logger.info("ListAccounts cancelled by client", after_id=page[0].id)
+                return
+            yield service_pb2.ListAccountsResponse(
+                accounts=[service_utils.to_account_message(row) for row in page],
+                cursor=service_utils.encode_cursor(page[-1].id),
+            )
+
+    def ListAccountsChangedSince(
+        self, request: service_pb2.ListAccountsChangedSinceRequest, context: grpc.ServicerContext
+    ):
+        if request.cursor:
+            try:
+                since, after_id = service_utils.decode_change_cursor(request.cursor)
+            except ValueError as e:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                return
+        elif request.HasField("since"):
+            since, after_id = request.since.ToDatetime(), 0
+        else:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Since or cursor is required")
+            return
+        if request.page_size < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Page size must not be negative")
+            return
+
+        pages = self.repo.iter_changed_since(
+            since, after_id=after_id, page_size=min(request.page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        )
+        for page in pages:
+            if not context.is_active():
+                logger.info("ListAccountsChangedSince cancelled by client", since=str(page[0].updated_at))
+                return
+            yield service_pb2.ListAccountsResponse(
+                accounts=[service_utils.to_account_message(row) for row in page],
+                cursor=service_utils.encode_change_cursor(page[-1].updated_at, page[-1].id),
+            )
+
+    def WatchAccounts(self, request: service_pb2.WatchAccountsRequest, context: grpc.ServicerContext):
+        if self.relay is None:
+            context.abort(grpc.StatusCode.UNIMPLEMENTED, "WatchAccounts is not enabled")
+            return
+        try:
+            after_id = (
+                service_utils.decode_event_token(request.resume_token)
+                if request.resume_token
+                else self.relay.high_water
+            )
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            return
+        # Resuming before the oldest retained event would silently skip the pruned ones.
+        if request.resume_token and after_id + 1 < self.relay.oldest_id():
+            context.abort(
+                grpc.StatusCode.OUT_OF_RANGE, "Resume token has expired, resync with ListAccountsChangedSince"
+            )
+            return
+        if not self._watchers.acquire(blocking=False):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many WatchAccounts streams")
+            return
+
+        try:
+            # Wake up every WATCH_POLL_SECONDS to notice cancelled clients and a stopping relay.
+            while context.is_active() and not self.relay.closed:
+                for event in self.relay.events_after(after_id, timeout=WATCH_POLL_SECONDS):
+                    yield service_utils.to_account_event(event)
+                    after_id = event.id
+        finally:
+            self._watchers.release()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from concurrent import futures
+
+import grpc
+from codegen.accounts import service_pb2, service_pb2_grpc
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from accounts import db, main, repository
+from accounts.models import base, users
+
+
+class AccountServiceConcurrencyTest(unittest.TestCase):
+    SERVER_WORKERS = 10
+    CLIENT_THREADS = 32
+    ACCOUNTS = 200
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.engine = create_engine("sqlite:///" + db_path, connect_args={"timeout": 30})
+        base.Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def _start_server(self, session_factory):
+        server = main.create_server(
+            repository.AccountRepository(session_factory),
+            max_workers=self.SERVER_WORKERS,
+        )
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        self.addCleanup(server.stop, None)
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.addCleanup(channel.close)
+        return service_pb2_grpc.AccountServiceStub(channel)
+
+    def _hammer(self, stub):
+        def create_then_get(i):
+            email = f"user{i}@example.com"
+            created = stub.CreateAccount(
+                service_pb2.CreateAccountRequest(
+                    email=email,
+                    first_name=f"First{i}",
+                    last_name=f"Last{i}",
+                    hashed_password="hashed",
+                )
+            )
+            fetched = stub.GetAccount(service_pb2.GetAccountRequest(email=email))
+            return created.account, fetched.account
+
+        with futures.ThreadPoolExecutor(max_workers=self.CLIENT_THREADS) as pool:
+            results = list(pool.map(create_then_get, range(self.ACCOUNTS)))
+
+        for i, (created, fetched) in enumerate(results):
+            self.assertEqual(created.email, f"user{i}@example.com")
+            self.assertEqual(fetched.account_id, created.account_id)
+            self.assertEqual(fetched.first_name, f"First{i}")
+        self.assertEqual(len({created.account_id for created, _ in results}), self.ACCOUNTS)
+        with self.engine.connect() as conn:
+            count = conn.execute(select(func.count()).select_from(users.User)).scalar_one()
+        self.assertEqual(count, self.ACCOUNTS)
+
+    def test_concurrent_create_and_get_with_session_per_call(self):
+        stub = self._start_server(sessionmaker(bind=self.engine))
+        self._hammer(stub)
+
+    def test_concurrent_create_and_get_with_scoped_sessions(self):
+        stub = self._start_server(db.get_session_factory(scoped=True, bind=self.engine))
+        self._hammer(stub)
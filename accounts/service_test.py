@@ -1,9 +1,13 @@
 import unittest
+from datetime import datetime
 from types import SimpleNamespace
 from unittest import mock
 
 import grpc
+from codegen.accounts import service_pb2
+from google.protobuf import field_mask_pb2
 
+from accounts import service_utils
 from accounts.models.users import User
 from accounts.repository import AccountNotFoundError, DuplicateEmailError
 from accounts.service import AccountService
@@ -19,6 +23,7 @@ class AccountServiceTest(unittest.TestCase):
             first_name="Test",
             last_name="User",
             hashed_password="super-secret",
+            update_mask=field_mask_pb2.FieldMask(),
         )
 
     @mock.patch("accounts.utils.creds_utils.generate_token")
@@ -133,6 +138,34 @@ class AccountServiceTest(unittest.TestCase):
             self.request.hashed_password,
         )
 
+    def test_UpdateAccount_with_mask_writes_only_masked_fields(self):
+        request = service_pb2.UpdateAccountRequest(account_id=1, first_name="Renamed")
+        request.update_mask.paths.append("first_name")
+        self.repo.update_account_fields.return_value = User(
+            id=1, email="test@example.com", first_name="Renamed", last_name="User", is_active=True, is_verified=False
+        )
+
+        response = self.account_service.UpdateAccount(request=request, context=self.context)
+
+        self.repo.update_account_fields.assert_called_once_with(1, first_name="Renamed")
+        self.repo.update_account.assert_not_called()
+        self.assertEqual(response.account.first_name, "Renamed")
+
+    def test_UpdateAccount_rejects_bad_mask(self):
+        for path, value, message in [
+            ("is_verified", "", "Field cannot be updated: is_verified"),
+            ("last_name", "", "Last Name is required"),
+        ]:
+            with self.subTest(path=path):
+                self.context.reset_mock()
+                request = service_pb2.UpdateAccountRequest(account_id=1, last_name=value)
+                request.update_mask.paths.append(path)
+
+                self.account_service.UpdateAccount(request=request, context=self.context)
+
+                self.context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, message)
+        self.repo.update_account_fields.assert_not_called()
+
     def test_DeleteAccount_successful(self):
         self.request.account_id = 1
 
@@ -154,3 +187,219 @@ class AccountServiceTest(unittest.TestCase):
             account_id=request.account_id,
         )
         self.repo.delete_account.assert_called_once_with(account_id=request.account_id)
+
+    def test_BatchGetAccounts_returns_results_in_request_order(self):
+        account = User(id=1, email="a@example.com", first_name="A", last_name="User", is_active=True, is_verified=False)
+        self.repo.get_accounts_by_emails.return_value = {"a@example.com": account}
+        self.repo.get_accounts_by_ids.return_value = {1: account}
+        request = service_pb2.BatchGetAccountsRequest(emails=["missing@example.com", "a@example.com"], account_ids=[1])
+
+        response = self.account_service.BatchGetAccounts(request=request, context=self.context)
+
+        self.repo.get_accounts_by_emails.assert_called_once_with(request.emails)
+        self.assertEqual(
+            [(r.email, r.account_id, r.status.code) for r in response.results],
+            [
+                ("missing@example.com", 0, grpc.StatusCode.NOT_FOUND.value[0]),
+                ("a@example.com", 0, grpc.StatusCode.OK.value[0]),
+                ("", 1, grpc.StatusCode.OK.value[0]),
+            ],
+        )
+        self.assertEqual(response.results[1].account.email, "a@example.com")
+
+    def test_BatchGetAccounts_matches_emails_case_insensitively(self):
+        account = User(id=1, email="A@example.com", first_name="A", last_name="User", is_active=True, is_verified=False)
+        self.repo.get_accounts_by_emails.return_value = {"a@example.com": account}
+        request = service_pb2.BatchGetAccountsRequest(emails=["a@EXAMPLE.com"])
+
+        response = self.account_service.BatchGetAccounts(request=request, context=self.context)
+
+        self.assertEqual(response.results[0].email, "a@EXAMPLE.com")
+        self.assertEqual(response.results[0].status.code, grpc.StatusCode.OK.value[0])
+        self.assertEqual(response.results[0].account.email, "A@example.com")
+
+    def test_BatchGetAccounts_empty_request_aborts(self):
+        self.account_service.BatchGetAccounts(request=service_pb2.BatchGetAccountsRequest(), context=self.context)
+
+        self.context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT,
+            "Emails or account ids are required",
+        )
+
+    @mock.patch("accounts.service.MAX_BATCH_SIZE", 1)
+    def test_BatchGetAccounts_too_large_aborts(self):
+        request = service_pb2.BatchGetAccountsRequest(emails=["a@example.com", "b@example.com"])
+
+        self.account_service.BatchGetAccounts(request=request, context=self.context)
+
+        self.context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "Batch size exceeds 1")
+        self.repo.get_accounts_by_emails.assert_not_called()
+
+    def test_BatchCreateAccounts_reports_per_item_status(self):
+        created = User(id=1, email="a@example.com", first_name="A", last_name="User", is_active=True, is_verified=False)
+        self.repo.create_accounts.return_value = [created, DuplicateEmailError("Email already exists")]
+        request = service_pb2.BatchCreateAccountsRequest(
+            accounts=[
+                service_pb2.CreateAccountRequest(
+                    email="a@example.com", first_name="A", last_name="User", hashed_password="pw"
+                ),
+                service_pb2.CreateAccountRequest(email="b@example.com", first_name="B", last_name="User"),
+                service_pb2.CreateAccountRequest(
+                    email="taken@example.com", first_name="T", last_name="User", hashed_password="pw"
+                ),
+            ]
+        )
+
+        response = self.account_service.BatchCreateAccounts(request=request, context=self.context)
+
+        self.assertEqual(
+            [item["email"] for item in self.repo.create_accounts.call_args.args[0]],
+            ["a@example.com", "taken@example.com"],
+        )
+        self.assertEqual(
+            [(r.status.code, r.status.message) for r in response.results],
+            [
+                (grpc.StatusCode.OK.value[0], ""),
+                (grpc.StatusCode.INVALID_ARGUMENT.value[0], "Hashed Password is required"),
+                (grpc.StatusCode.ALREADY_EXISTS.value[0], "Email already exists"),
+            ],
+        )
+        self.assertEqual(response.results[0].account.account_id, 1)
+
+    def test_ListAccounts_streams_pages_with_cursor(self):
+        page = [
+            SimpleNamespace(
+                id=i, email=f"u{i}@example.com", first_name="F", last_name="L", is_active=True, is_verified=False
+            )
+            for i in (3, 4)
+        ]
+        self.repo.iter_accounts.return_value = iter([page])
+        self.context.is_active.return_value = True
+        request = service_pb2.ListAccountsRequest(is_active=True, cursor=service_utils.encode_cursor(2), limit=10)
+
+        responses = list(self.account_service.ListAccounts(request=request, context=self.context))
+
+        self.repo.iter_accounts.assert_called_once_with(
+            is_active=True, is_verified=None, after_id=2, page_size=500, limit=10
+        )
+        self.assertEqual([a.account_id for a in responses[0].accounts], [3, 4])
+        self.assertEqual(service_utils.decode_cursor(responses[0].cursor), 4)
+
+    def test_ListAccountsChangedSince_from_timestamp_then_cursor(self):
+        updated_at = datetime(2026, 10, 18, 9, 0, 0)
+        page = [
+            SimpleNamespace(
+                id=5,
+                email="u5@example.com",
+                first_name="F",
+                last_name="L",
+                is_active=True,
+                is_verified=False,
+                updated_at=updated_at,
+            )
+        ]
+        self.repo.iter_changed_since.return_value = iter([page])
+        self.context.is_active.return_value = True
+        request = service_pb2.ListAccountsChangedSinceRequest()
+        request.since.FromDatetime(datetime(2026, 10, 1))
+
+        responses = list(self.account_service.ListAccountsChangedSince(request=request, context=self.context))
+
+        self.repo.iter_changed_since.assert_called_once_with(datetime(2026, 10, 1), after_id=0, page_size=500)
+        self.assertEqual(responses[0].accounts[0].account_id, 5)
+
+        self.repo.iter_changed_since.reset_mock()
+        resumed = service_pb2.ListAccountsChangedSinceRequest(cursor=responses[0].cursor, page_size=10)
+        list(self.account_service.ListAccountsChangedSince(request=resumed, context=self.context))
+        self.repo.iter_changed_since.assert_called_once_with(updated_at, after_id=5, page_size=10)
+
+    def test_ListAccountsChangedSince_requires_since_or_cursor(self):
+        list(self.account_service.ListAccountsChangedSince(service_pb2.ListAccountsChangedSinceRequest(), self.context))
+
+        self.context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "Since or cursor is required")
+        self.repo.iter_changed_since.assert_not_called()
+
+    def test_WatchAccounts_streams_events_with_resume_tokens(self):
+        relay = mock.Mock(closed=False, high_water=10)
+        relay.events_after.side_effect = [
+            [
+                SimpleNamespace(
+                    id=11,
+                    account_id=3,
+                    event_type="updated",
+                    email="new@example.com",
+                    previous_email="old@example.com",
+                    created_at=datetime(2026, 10, 18, 11, 0, 0),
+                )
+            ],
+            [],
+        ]
+        self.context.is_active.side_effect = [True, True, False]
+        service = AccountService(repo=self.repo, relay=relay)
+
+        events = list(service.WatchAccounts(service_pb2.WatchAccountsRequest(), self.context))
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].type, service_pb2.AccountEvent.UPDATED)
+        self.assertEqual(events[0].previous_email, "old@example.com")
+        self.assertEqual(service_utils.decode_event_token(events[0].resume_token), 11)
+        self.assertEqual([c.args[0] for c in relay.events_after.call_args_list], [10, 11])
+
+    def test_WatchAccounts_resumes_from_token_and_limits_streams(self):
+        relay = mock.Mock(closed=False, high_water=10)
+        relay.events_after.return_value = [
+            SimpleNamespace(
+                id=5,
+                account_id=3,
+                event_type="deleted",
+                email="gone@example.com",
+                previous_email=None,
+                created_at=datetime(2026, 10, 18, 11, 0, 0),
+            )
+        ]
+        relay.oldest_id.return_value = 1
+        self.context.is_active.return_value = True
+        service = AccountService(repo=self.repo, relay=relay, max_watchers=1)
+        request = service_pb2.WatchAccountsRequest(resume_token=service_utils.encode_event_token(4))
+
+        open_stream = service.WatchAccounts(request, self.context)
+        self.assertEqual(next(open_stream).type, service_pb2.AccountEvent.DELETED)
+        list(service.WatchAccounts(request, self.context))
+        open_stream.close()
+
+        relay.events_after.assert_called_once_with(4, timeout=mock.ANY)
+        self.context.abort.assert_called_once_with(grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many WatchAccounts streams")
+        self.assertTrue(service._watchers.acquire(blocking=False))
+
+    def test_WatchAccounts_rejects_resume_token_older_than_retained_events(self):
+        relay = mock.Mock(closed=False, high_water=10)
+        relay.oldest_id.return_value = 6
+        service = AccountService(repo=self.repo, relay=relay)
+
+        for after_id, aborted in [(4, True), (5, False)]:
+            with self.subTest(after_id=after_id):
+                self.context.reset_mock()
+                self.context.is_active.return_value = False
+                request = service_pb2.WatchAccountsRequest(resume_token=service_utils.encode_event_token(after_id))
+
+                list(service.WatchAccounts(request, self.context))
+
+                if aborted:
+                    self.context.abort.assert_called_once_with(
+                        grpc.StatusCode.OUT_OF_RANGE, "Resume token has expired, resync with ListAccountsChangedSince"
+                    )
+                else:
+                    self.context.abort.assert_not_called()
+
+    def test_WatchAccounts_without_relay_is_unimplemented(self):
+        list(self.account_service.WatchAccounts(service_pb2.WatchAccountsRequest(), self.context))
+
+        self.context.abort.assert_called_once_with(grpc.StatusCode.UNIMPLEMENTED, "WatchAccounts is not enabled")
+
+    def test_ListAccounts_invalid_cursor_aborts(self):
+        request = service_pb2.ListAccountsRequest(cursor="garbage")
+
+        list(self.account_service.ListAccounts(request=request, context=self.context))
+
+        self.context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "Invalid cursor: 'garbage'")
+        self.repo.iter_accounts.assert_not_called()
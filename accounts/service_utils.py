@@ -1,14 +1,143 @@
-from typing import List
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 import grpc
+from codegen.accounts import service_pb2
+
+from accounts.models import outbox
+from accounts.models.users import User
+from accounts.repository import UPDATABLE_FIELDS
+
+
+def missing_field_message(request, required_fields: List) -> Optional[str]:
+    for field in required_fields:
+        if not getattr(request, field, None):
+            return f"{field.replace('_', ' ').title()} is required"
+    return None
 
 
 def validate_required(
     content: grpc.ServicerContext, request, required_fields: List
 ) -> None:
-    for field in required_fields:
-        if not getattr(request, field, None):
-            content.abort(
-                grpc.StatusCode.INVALID_ARGUMENT,
-                f"{field.replace('_', ' ').title()} is required",
-            )
+    message = missing_field_message(request, required_fields)
+    if message:
+        content.abort(grpc.StatusCode.INVALID_ARGUMENT, message)
+
+
+async def validate_required_async(
+    content: grpc.aio.ServicerContext, request, required_fields: List
+) -> None:
+    message = missing_field_message(request, required_fields)
+    if message:
+        await content.abort(grpc.StatusCode.INVALID_ARGUMENT, message)
+
+
+def masked_changes(request) -> Dict[str, str]:
+    """Field values an UpdateAccountRequest's update_mask selects; ValueError for an unknown or empty field."""
+    paths = list(dict.fromkeys(request.update_mask.paths))
+    for path in paths:
+        if path not in UPDATABLE_FIELDS:
+            raise ValueError(f"Field cannot be updated: {path}")
+    message = missing_field_message(request, paths)
+    if message:
+        raise ValueError(message)
+    return {path: getattr(request, path) for path in paths}
+
+
+def to_account_message(account: User) -> service_pb2.Account:
+    return service_pb2.Account(
+        account_id=account.id,
+        email=account.email,
+        first_name=account.first_name,
+        last_name=account.last_name,
+        is_active=account.is_active,
+        is_verified=account.is_verified,
+    )
+
+
+def batch_error(code: grpc.StatusCode, message: str, **key) -> service_pb2.BatchAccountResult:
+    return service_pb2.BatchAccountResult(
+        status=service_pb2.ItemStatus(code=code.value[0], message=message),
+        **key,
+    )
+
+
+def batch_result(account: Optional[User], **key) -> service_pb2.BatchAccountResult:
+    if account is None:
+        return batch_error(grpc.StatusCode.NOT_FOUND, "Account not found", **key)
+    return service_pb2.BatchAccountResult(
+        status=service_pb2.ItemStatus(code=grpc.StatusCode.OK.value[0]),
+        account=to_account_message(account),
+        **key,
+    )
+
+
+def encode_cursor(account_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{account_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the account id a cursor points at, 0 for an empty cursor; ValueError if malformed."""
+    if not cursor:
+        return 0
+    try:
+        prefix, _, value = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        account_id = int(value)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if prefix != "id" or account_id < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return account_id
+
+
+def encode_change_cursor(updated_at: datetime, account_id: int) -> str:
+    return base64.urlsafe_b64encode(f"changed:{updated_at.isoformat()}|{account_id}".encode()).decode()
+
+
+def decode_change_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return the (updated_at, account_id) a ListAccountsChangedSince cursor points at; ValueError if malformed."""
+    try:
+        prefix, _, value = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        timestamp, _, account_id = value.partition("|")
+        updated_at, account_id = datetime.fromisoformat(timestamp), int(account_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if prefix != "changed" or account_id < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return updated_at, account_id
+
+
+EVENT_TYPES = {
+    outbox.CREATED: service_pb2.AccountEvent.CREATED,
+    outbox.UPDATED: service_pb2.AccountEvent.UPDATED,
+    outbox.DELETED: service_pb2.AccountEvent.DELETED,
+}
+
+
+def encode_event_token(event_id: int) -> str:
+    return base64.urlsafe_b64encode(f"event:{event_id}".encode()).decode()
+
+
+def decode_event_token(token: str) -> int:
+    """Return the outbox event id a WatchAccounts resume token points at; ValueError if malformed."""
+    try:
+        prefix, _, value = base64.urlsafe_b64decode(token.encode()).decode().partition(":")
+        event_id = int(value)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid resume token: {token!r}") from exc
+    if prefix != "event" or event_id < 0:
+        raise ValueError(f"Invalid resume token: {token!r}")
+    return event_id
+
+
+def to_account_event(event) -> service_pb2.AccountEvent:
+    message = service_pb2.AccountEvent(
+        type=EVENT_TYPES[event.event_type],
+        account_id=event.account_id,
+        email=event.email,
+        previous_email=event.previous_email or "",
+        resume_token=encode_event_token(event.id),
+    )
+    message.occurred_at.FromDatetime(event.created_at)
+    return message
@@ -1,8 +1,18 @@
 import unittest
+from datetime import datetime
 from unittest import mock
 import grpc
 
-from accounts.service_utils import validate_required
+from accounts.service_utils import (
+    decode_change_cursor,
+    decode_cursor,
+    decode_event_token,
+    encode_change_cursor,
+    encode_cursor,
+    encode_event_token,
+    validate_required,
+    validate_required_async,
+)
 
 
 class ServiceUtilsTest(unittest.TestCase):
@@ -22,3 +32,42 @@ class ServiceUtilsTest(unittest.TestCase):
             grpc.StatusCode.INVALID_ARGUMENT,
             "Field2 is required",
         )
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+        self.assertEqual(decode_cursor(""), 0)
+
+    def test_decode_cursor_rejects_garbage(self):
+        for cursor in ("not-a-cursor", encode_cursor(1).replace("aWQ", "eHk")):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_change_cursor_round_trip(self):
+        updated_at = datetime(2026, 10, 18, 9, 30, 15)
+        self.assertEqual(decode_change_cursor(encode_change_cursor(updated_at, 7)), (updated_at, 7))
+        for cursor in ("", encode_cursor(7)):
+            with self.assertRaises(ValueError):
+                decode_change_cursor(cursor)
+
+    def test_event_token_round_trip(self):
+        self.assertEqual(decode_event_token(encode_event_token(42)), 42)
+        for token in ("garbage", encode_cursor(42)):
+            with self.assertRaises(ValueError):
+                decode_event_token(token)
+
+
+class ServiceUtilsAsyncTest(unittest.IsolatedAsyncioTestCase):
+    async def test_validate_required_async_missing_field(self):
+        mock_content = mock.AsyncMock()
+        Request = type("Request", (), {"field1": "value"})()
+        await validate_required_async(mock_content, Request, ["field1", "field2"])
+        mock_content.abort.assert_awaited_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT,
+            "Field2 is required",
+        )
+
+    async def test_validate_required_async(self):
+        mock_content = mock.AsyncMock()
+        Request = type("Request", (), {"field1": "value"})()
+        await validate_required_async(mock_content, Request, ["field1"])
+        mock_content.abort.assert_not_awaited()
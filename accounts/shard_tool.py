@@ -0,0 +1,204 @@
+"""Move accounts between shards when the shard map changes.
+
+Adding a shard while the services keep running on the current map:
+
+    python -m accounts.shard_tool plan current.json --add c=sqlite:///c.db --out new.json
+    python -m accounts.shard_tool copy current.json new.json
+    python -m accounts.shard_tool copy current.json new.json --since 2026-10-18T12:00:00
+    # deploy new.json to every service, then
+    python -m accounts.shard_tool cleanup new.json
+
+``copy`` upserts every account whose bucket moves onto its new shard, together
+with the forwards the new layout needs; repeat it with ``--since`` (the start
+of the previous pass) to catch up with writes, and deletes recorded in the
+outbox, made meanwhile. ``cleanup`` deletes what a shard no longer owns.
+"""
+
+import argparse
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from accounts.db import SessionFactory, get_session_factory
+from accounts.models import outbox
+from accounts.models.outbox import AccountOutboxEvent
+from accounts.models.users import AccountForward, User
+from accounts.repository import _chunks
+from accounts.sharding import ShardMap, bucket_for_email, bucket_for_id
+
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+def plan(current: ShardMap, add: Optional[Dict[str, dict]] = None, remove: Optional[List[str]] = None) -> ShardMap:
+    shards = {name: config for name, config in current.shards.items() if name not in (remove or [])}
+    shards.update(add or {})
+    return current.rebalanced(shards)
+
+
+def _scan(session_factory: SessionFactory, model, key, since: Optional[datetime] = None, page_size: int = 1000):
+    """Every row of ``model`` in pages ordered by ``key``, optionally only those written since ``since``."""
+    after = None
+    while True:
+        stmt = select(model).order_by(key).limit(page_size)
+        if after is not None:
+            stmt = stmt.where(key > after)
+        if since is not None:
+            stmt = stmt.where(model.updated_at >= since)
+        with session_factory() as session:
+            page = session.scalars(stmt).all()
+            session.expunge_all()
+        if not page:
+            return
+        yield page
+        after = getattr(page[-1], key.key)
+
+
+def _upsert(session: Session, model, key, rows: List[dict]) -> None:
+    """Insert rows whose key is new, update the rest by primary key."""
+    existing = set()
+    for chunk in _chunks([row[key.key] for row in rows]):
+        existing.update(session.scalars(select(key).where(key.in_(chunk))))
+    new = [row for row in rows if row[key.key] not in existing]
+    if new:
+        session.execute(insert(model), new)
+    old = [row for row in rows if row[key.key] in existing]
+    if old:
+        session.execute(update(model), old)
+
+
+def copy_accounts(
+    current: ShardMap,
+    new: ShardMap,
+    factories: Dict[str, SessionFactory],
+    since: Optional[datetime] = None,
+    page_size: int = 1000,
+) -> Dict[str, int]:
+    """Upsert the accounts and forwards ``new`` places on another shard than ``current``; returns counts."""
+    counts = {"accounts": 0, "forwards": 0, "deleted": 0}
+    for source in sorted(set(current.assignments)):
+        for page in _scan(factories[source], User, User.id, since=since, page_size=page_size):
+            accounts: Dict[str, List[dict]] = {}
+            forwards: Dict[str, List[dict]] = {}
+            for account in page:
+                bucket = bucket_for_email(account.email)
+                target = new.shard_for_bucket(bucket)
+                if target != source:
+                    accounts.setdefault(target, []).append({key: getattr(account, key) for key in _USER_COLUMNS})
+                if bucket != bucket_for_id(account.id):
+                    forwards.setdefault(new.shard_for_bucket(bucket_for_id(account.id)), []).append(
+                        {"account_id": account.id, "bucket": bucket}
+                    )
+            for target, rows in accounts.items():
+                with factories[target]() as session:
+                    _upsert(session, User, User.id, rows)
+                    session.commit()
+                counts["accounts"] += len(rows)
+            for target, rows in forwards.items():
+                with factories[target]() as session:
+                    _upsert(session, AccountForward, AccountForward.account_id, rows)
+                    session.commit()
+                counts["forwards"] += len(rows)
+        if since is not None:
+            counts["deleted"] += _replay_deletes(source, new, factories, since)
+    return counts
+
+
+def _replay_deletes(source: str, new: ShardMap, factories: Dict[str, SessionFactory], since: datetime) -> int:
+    """Delete accounts removed on ``source`` since ``since`` from the shard ``new`` moves them to."""
+    with factories[source]() as session:
+        events = session.execute(
+            select(AccountOutboxEvent.account_id, AccountOutboxEvent.email).where(
+                AccountOutboxEvent.event_type == outbox.DELETED, AccountOutboxEvent.created_at >= since
+            )
+        ).all()
+    deleted = 0
+    for event in events:
+        target = new.shard_for_email(event.email)
+        if target != source:
+            with factories[target]() as session:
+                deleted += session.execute(delete(User).where(User.id == event.account_id)).rowcount
+                session.commit()
+    return deleted
+
+
+def _delete_stale(session_factory: SessionFactory, model, key, owned, page_size: int) -> int:
+    stale = [
+        getattr(row, key.key)
+        for page in _scan(session_factory, model, key, page_size=page_size)
+        for row in page
+        if not owned(row)
+    ]
+    with session_factory() as session:
+        for chunk in _chunks(stale):
+            session.execute(delete(model).where(key.in_(chunk)))
+        session.commit()
+    return len(stale)
+
+
+def cleanup(new: ShardMap, factories: Dict[str, SessionFactory], page_size: int = 1000) -> Dict[str, int]:
+    """Delete the accounts and forwards each shard holds but ``new`` places elsewhere."""
+    counts = {"accounts": 0, "forwards": 0}
+    for name in sorted(set(new.assignments)):
+        counts["accounts"] += _delete_stale(
+            factories[name], User, User.id, lambda row: new.shard_for_email(row.email) == name, page_size
+        )
+        counts["forwards"] += _delete_stale(
+            factories[name],
+            AccountForward,
+            AccountForward.account_id,
+            lambda row: new.shard_for_bucket(bucket_for_id(row.account_id)) == name,
+            page_size,
+        )
+    return counts
+
+
+def _factories(*maps: ShardMap) -> Dict[str, SessionFactory]:
+    urls = {name: shard_map.url(name) for shard_map in maps for name in set(shard_map.assignments)}
+    return {name: get_session_factory(bind=create_engine(url)) for name, url in urls.items()}
+
+
+def _shard_configs(specs: List[str]) -> Dict[str, dict]:
+    configs = {}
+    for spec in specs:
+        name, _, url = spec.partition("=")
+        if not name or not url:
+            raise argparse.ArgumentTypeError(f"Expected NAME=URL, got {spec!r}")
+        configs[name] = {"url": url}
+    return configs
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Rebalance accounts across shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_cmd = commands.add_parser("plan", help="Write a rebalanced shard map")
+    plan_cmd.add_argument("current")
+    plan_cmd.add_argument("--add", action="append", default=[], metavar="NAME=URL", help="Shard to add")
+    plan_cmd.add_argument("--remove", action="append", default=[], metavar="NAME", help="Shard to drain")
+    plan_cmd.add_argument("--out", required=True)
+    copy_cmd = commands.add_parser("copy", help="Copy moving accounts to their new shards")
+    copy_cmd.add_argument("current")
+    copy_cmd.add_argument("new")
+    copy_cmd.add_argument("--since", type=datetime.fromisoformat, help="Only accounts written since (catch-up)")
+    cleanup_cmd = commands.add_parser("cleanup", help="Delete accounts a shard no longer owns")
+    cleanup_cmd.add_argument("new")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        current = ShardMap.load(args.current)
+        new = plan(current, add=_shard_configs(args.add), remove=args.remove)
+        new.save(args.out)
+        result = {f"{source}->{target}": count for (source, target), count in sorted(current.moves(new).items())}
+    elif args.command == "copy":
+        current, new = ShardMap.load(args.current), ShardMap.load(args.new)
+        result = copy_accounts(current, new, _factories(current, new), since=args.since)
+    else:
+        new = ShardMap.load(args.new)
+        result = cleanup(new, _factories(new))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from accounts import shard_tool, sharding
+from accounts.sharding_test import ShardedDatabases, email_on
+
+
+class ShardToolTest(unittest.TestCase):
+    def setUp(self):
+        self.db = ShardedDatabases(self, ["a", "b", "c"])
+        self.current = sharding.ShardMap.even({name: {"url": self.db.urls[name]} for name in "ab"})
+        self.repo = sharding.ShardedAccountRepository(self.current, self.db.factories)
+        self.addCleanup(self.repo.close)
+
+    def test_add_shard_copy_catch_up_and_cleanup(self):
+        accounts = [self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw") for i in range(40)]
+        moved = self.repo.update_account_fields(accounts[0].id, email=email_on(self.current, "b", prefix="moved"))
+        new = shard_tool.plan(self.current, add={"c": {"url": self.db.urls["c"]}})
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+
+        first = shard_tool.copy_accounts(self.current, new, self.db.factories)
+        # Written while the copy ran: a signup and a delete in buckets that move to c.
+        late = self.repo.create_account(email_on(new, "c", prefix="late"), "Late", "Signup", "pw")
+        gone = next(a for a in accounts[1:] if new.shard_for_email(a.email) == "c")
+        self.repo.delete_account(gone.id)
+        catch_up = shard_tool.copy_accounts(self.current, new, self.db.factories, since=since)
+        shard_tool.cleanup(new, self.db.factories)
+
+        self.assertEqual(sum(self.current.moves(new).values()), 1365)
+        self.assertGreater(first["accounts"], 0)
+        self.assertEqual(catch_up["deleted"], 1)
+        repo = sharding.ShardedAccountRepository(new, self.db.factories)
+        self.addCleanup(repo.close)
+        expected = {a.id: a.email for a in accounts if a.id != gone.id}
+        expected.update({moved.id: moved.email, late.id: late.email})
+        found = repo.get_accounts_by_ids(list(expected) + [gone.id])
+        self.assertEqual({account_id: account.email for account_id, account in found.items()}, expected)
+        for name in "abc":
+            self.assertTrue(all(new.shard_for_email(e) == name for e in self.db.emails_on(name)))
+        self.assertEqual(sum(len(self.db.emails_on(name)) for name in "abc"), len(expected))
+
+    def test_plan_drains_removed_shard(self):
+        drained = shard_tool.plan(self.current, remove=["b"])
+        self.assertEqual(set(drained.assignments), {"a"})
+        self.assertEqual(self.current.moves(drained), {("b", "a"): 2048})
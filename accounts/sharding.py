@@ -0,0 +1,435 @@
+import hashlib
+import heapq
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import structlog
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from accounts.cache import AccountCache
+from accounts.db import SessionFactory, create_pooled_engine, get_db_url, get_session_factory
+from accounts.models import outbox
+from accounts.models.users import AccountForward, User
+from accounts.repository import (
+    AccountNotFoundError,
+    AccountRepository,
+    DatabaseError,
+    DuplicateEmailError,
+    changes_cutoff,
+    check_updatable,
+    is_duplicate_email,
+    outbox_insert,
+)
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Sharded ids pack, from the top: milliseconds since ID_EPOCH_MS (41 bits, ~69 years),
+# the bucket (12 bits) and a per-millisecond sequence (10 bits) into 63 bits.
+BUCKET_BITS = 12
+SEQUENCE_BITS = 10
+NUM_BUCKETS = 1 << BUCKET_BITS
+ID_EPOCH_MS = 1767225600000  # 2026-01-01T00:00:00Z
+
+
+def bucket_for_email(email: str) -> int:
+    """Stable bucket of an email in any case; the same on every host and Python version."""
+    digest = hashlib.blake2b(email.lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % NUM_BUCKETS
+
+
+def bucket_for_id(account_id: int) -> int:
+    """The bucket a sharded id was created in (its email's bucket at the time)."""
+    return (account_id >> SEQUENCE_BITS) & (NUM_BUCKETS - 1)
+
+
+class IdGenerator:
+    """Time-ordered 63-bit ids that encode the bucket they were created in.
+
+    The sequence restarts at a random value every millisecond so processes
+    creating accounts in the same bucket at the same moment rarely collide; a
+    collision fails the INSERT on the primary key like any other write error.
+    """
+
+    def __init__(self, clock=time.time, rng=random.randrange):
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self, bucket: int) -> int:
+        with self._lock:
+            ms = max(int(self._clock() * 1000) - ID_EPOCH_MS, self._last_ms)
+            if ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    # Sequence exhausted for this millisecond; borrow the next one.
+                    ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = self._rng(1 << (SEQUENCE_BITS - 1))
+            self._last_ms = ms
+            return (ms << (BUCKET_BITS + SEQUENCE_BITS)) | (bucket << SEQUENCE_BITS) | self._sequence
+
+
+class ShardMap:
+    """Assignment of every bucket to a named shard, plus how to connect to each shard.
+
+    Serialized as JSON::
+
+        {"shards": {"a": {"url": "sqlite:///a.db"}, "b": {"host": "db-b", "database": "accounts"}},
+         "buckets": [[0, 2047, "a"], [2048, 4095, "b"]]}
+
+    A shard is either a full ``url`` or overrides (host, port, database, ...) of the
+    primary's DB_* settings, so credentials stay out of the file.
+    """
+
+    def __init__(self, shards: Dict[str, dict], assignments: Sequence[str]):
+        if len(assignments) != NUM_BUCKETS:
+            raise ValueError(f"Shard map must assign all {NUM_BUCKETS} buckets, got {len(assignments)}")
+        unknown = set(assignments) - set(shards)
+        if unknown:
+            raise ValueError(f"Buckets assigned to unknown shards: {', '.join(sorted(unknown))}")
+        self.shards = dict(shards)
+        self.assignments = list(assignments)
+
+    @classmethod
+    def even(cls, shards: Dict[str, dict]) -> "ShardMap":
+        """Contiguous, equally sized bucket ranges in shard name order."""
+        names = sorted(shards)
+        return cls(shards, [names[bucket * len(names) // NUM_BUCKETS] for bucket in range(NUM_BUCKETS)])
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ShardMap":
+        assignments: List[Optional[str]] = [None] * NUM_BUCKETS
+        for start, end, name in data["buckets"]:
+            assignments[start : end + 1] = [name] * (end + 1 - start)
+        if None in assignments:
+            raise ValueError(f"Bucket {assignments.index(None)} is not assigned to a shard")
+        return cls(data["shards"], assignments)
+
+    @classmethod
+    def load(cls, path: str) -> "ShardMap":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> dict:
+        ranges = []
+        for bucket, name in enumerate(self.assignments):
+            if ranges and ranges[-1][2] == name:
+                ranges[-1][1] = bucket
+            else:
+                ranges.append([bucket, bucket, name])
+        return {"shards": self.shards, "buckets": ranges}
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def shard_for_bucket(self, bucket: int) -> str:
+        return self.assignments[bucket]
+
+    def shard_for_email(self, email: str) -> str:
+        return self.assignments[bucket_for_email(email)]
+
+    def url(self, name: str):
+        config = dict(self.shards[name])
+        if "url" in config:
+            return make_url(config["url"])
+        return get_db_url().set(**config)
+
+    def rebalanced(self, shards: Dict[str, dict]) -> "ShardMap":
+        """A map over ``shards`` with equal bucket counts that moves as few buckets as possible."""
+        names = sorted(shards)
+        quota = {name: NUM_BUCKETS // len(names) + (i < NUM_BUCKETS % len(names)) for i, name in enumerate(names)}
+        assignments: List[Optional[str]] = [None] * NUM_BUCKETS
+        for bucket, name in enumerate(self.assignments):
+            if quota.get(name, 0) > 0:
+                assignments[bucket] = name
+                quota[name] -= 1
+        receivers = iter([name for name in names for _ in range(quota[name])])
+        for bucket, name in enumerate(assignments):
+            if name is None:
+                assignments[bucket] = next(receivers)
+        return ShardMap(shards, assignments)
+
+    def moves(self, other: "ShardMap") -> Dict[Tuple[str, str], int]:
+        """Bucket counts moving between (source, target) shards going from this map to ``other``."""
+        counts: Dict[Tuple[str, str], int] = {}
+        for source, target in zip(self.assignments, other.assignments):
+            if source != target:
+                counts[(source, target)] = counts.get((source, target), 0) + 1
+        return counts
+
+
+def _pages(rows: Iterable[T], page_size: int) -> Iterator[List[T]]:
+    rows = iter(rows)
+    while page := list(islice(rows, page_size)):
+        yield page
+
+
+def _rows(pages: Iterable[List[T]]) -> Iterator[T]:
+    for page in pages:
+        yield from page
+
+
+class ShardedAccountRepository:
+    """AccountRepository over N shards, each an AccountRepository of its own.
+
+    An account lives on the shard its email's bucket maps to, so signups and
+    GetAccount touch one shard. Ids encode the bucket the account was created
+    in; an account whose email later hashes elsewhere is moved to the new
+    shard and an ``account_forwards`` row on its id's shard points to it.
+    Batch lookups and listings scatter to every shard in parallel and merge.
+    """
+
+    def __init__(
+        self,
+        shard_map: ShardMap,
+        session_factories: Dict[str, SessionFactory],
+        cache: Optional[AccountCache] = None,
+        ids: Optional[IdGenerator] = None,
+    ):
+        missing = set(shard_map.assignments) - set(session_factories)
+        if missing:
+            raise ValueError(f"No session factory for shards: {', '.join(sorted(missing))}")
+        self.shard_map = shard_map
+        self.session_factories = dict(session_factories)
+        self.shards = {name: AccountRepository(factory, cache=cache) for name, factory in session_factories.items()}
+        self.cache = cache
+        self.ids = ids or IdGenerator()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _repo(self, bucket: int) -> AccountRepository:
+        return self.shards[self.shard_map.shard_for_bucket(bucket)]
+
+    def _scatter(self, calls: Dict[str, Callable[[AccountRepository], T]]) -> Dict[str, T]:
+        """Run ``calls[shard](repository)`` on every listed shard in parallel."""
+        if len(calls) == 1:
+            ((name, call),) = calls.items()
+            return {name: call(self.shards[name])}
+        futures = {name: self._executor.submit(call, self.shards[name]) for name, call in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _group(self, keys: Iterable, bucket_of: Callable[[object], int]) -> Dict[str, list]:
+        groups: Dict[str, list] = {}
+        for key in dict.fromkeys(keys):
+            groups.setdefault(self.shard_map.shard_for_bucket(bucket_of(key)), []).append(key)
+        return groups
+
+    def _forwards(self, account_ids: Iterable[int]) -> Dict[int, int]:
+        """Current bucket of every given account that has moved away from the bucket in its id."""
+        found = {}
+        for name, ids in self._group(account_ids, bucket_for_id).items():
+            try:
+                with self.session_factories[name]() as session:
+                    rows = session.execute(
+                        select(AccountForward.account_id, AccountForward.bucket).where(
+                            AccountForward.account_id.in_(ids)
+                        )
+                    )
+                    found.update(rows.tuples().all())
+            except SQLAlchemyError as exc:
+                logger.error("Database error while reading forwards", error=str(exc), shard=name)
+                raise DatabaseError("Database error") from exc
+        return found
+
+    def _locate(self, account_id: int) -> int:
+        """Bucket of the shard holding the account."""
+        return self._forwards([account_id]).get(account_id, bucket_for_id(account_id))
+
+    def _set_forward(self, account_id: int, bucket: int) -> None:
+        home = bucket_for_id(account_id)
+        try:
+            with self._repo(home).session_factory() as session:
+                session.execute(delete(AccountForward).where(AccountForward.account_id == account_id))
+                if bucket != home:
+                    session.execute(insert(AccountForward).values(account_id=account_id, bucket=bucket))
+                session.commit()
+        except SQLAlchemyError as exc:
+            logger.error("Failed to update forward", error=str(exc), account_id=account_id)
+            raise DatabaseError("Database error during update") from exc
+
+    def create_account(self, email: str, first_name: str, last_name: str, hashed_password: str) -> User:
+        bucket = bucket_for_email(email)
+        return self._repo(bucket).create_account(
+            email, first_name, last_name, hashed_password, account_id=self.ids.next_id(bucket)
+        )
+
+    def get_account_by_email(self, email: str):
+        return self._repo(bucket_for_email(email)).get_account_by_email(email)
+
+    def update_account(self, id, email, first_name, last_name, hashed_password) -> User:
+        return self.update_account_fields(
+            id, email=email, first_name=first_name, last_name=last_name, hashed_password=hashed_password
+        )
+
+    def update_account_fields(self, account_id: int, **changes: str) -> User:
+        check_updatable(changes)
+        bucket = self._locate(account_id)
+        new_bucket = bucket_for_email(changes["email"]) if "email" in changes else bucket
+        if self.shard_map.shard_for_bucket(new_bucket) == self.shard_map.shard_for_bucket(bucket):
+            account = self._repo(bucket).update_account_fields(account_id, **changes)
+        else:
+            account = self._move(account_id, bucket, new_bucket, changes)
+        if new_bucket != bucket:
+            self._set_forward(account_id, new_bucket)
+        return account
+
+    def _move(self, account_id: int, bucket: int, new_bucket: int, changes: Dict[str, str]) -> User:
+        """Copy the account with ``changes`` applied to the new bucket's shard, then delete the original.
+
+        Not atomic across shards: a failure after the copy leaves the account on
+        both; ``shard_tool cleanup`` removes the copy on the shard that does not own its email.
+        """
+        source, target = self._repo(bucket), self._repo(new_bucket)
+        with source.session_factory() as session:
+            account = session.get(User, account_id)
+            if account is None:
+                logger.error("Account not found for update", account_id=account_id)
+                raise AccountNotFoundError("Account not found")
+            values = {column.key: getattr(account, column.key) for column in User.__table__.columns}
+        previous_email = values["email"]
+        values.update(changes, updated_at=func.now())
+        try:
+            with target.session_factory() as session:
+                session.execute(insert(User).values(**values))
+                session.execute(outbox_insert(outbox.UPDATED, account_id, values["email"], previous_email))
+                account = session.get(User, account_id)
+                session.expunge(account)
+                session.commit()
+        except IntegrityError as exc:
+            if is_duplicate_email(exc):
+                logger.warning("User already exists", email=values["email"])
+                raise DuplicateEmailError("Email already exists") from exc
+            logger.error("Failed to move account", error=str(exc), account_id=account_id)
+            raise DatabaseError("Database error during update") from exc
+        except SQLAlchemyError as exc:
+            logger.error("Failed to move account", error=str(exc), account_id=account_id)
+            raise DatabaseError("Database error during update") from exc
+        try:
+            with source.session_factory() as session:
+                session.execute(delete(User).where(User.id == account_id))
+                session.commit()
+        except SQLAlchemyError as exc:
+            logger.error("Failed to remove moved account", error=str(exc), account_id=account_id)
+            raise DatabaseError("Database error during update") from exc
+        target._written(previous_email, account.email, account_ids=[account_id])
+        logger.info("Account moved between shards", account_id=account_id, bucket=new_bucket)
+        return account
+
+    def delete_account(self, account_id: int) -> bool:
+        bucket = self._locate(account_id)
+        self._repo(bucket).delete_account(account_id)
+        if bucket != bucket_for_id(account_id):
+            self._set_forward(account_id, bucket_for_id(account_id))
+        return True
+
+    def get_accounts_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        groups = self._group(emails, bucket_for_email)
+        found = {}
+        for accounts in self._scatter(
+            {name: lambda repo, chunk=chunk: repo.get_accounts_by_emails(chunk) for name, chunk in groups.items()}
+        ).values():
+            found.update(accounts)
+        return found
+
+    def get_accounts_by_ids(self, account_ids: Iterable[int]) -> Dict[int, User]:
+        account_ids = list(dict.fromkeys(account_ids))
+        found = self._get_by_ids(self._group(account_ids, bucket_for_id))
+        missing = [account_id for account_id in account_ids if account_id not in found]
+        if missing:
+            moved = self._forwards(missing)
+            found.update(self._get_by_ids(self._group(moved, moved.get)))
+        return found
+
+    def _get_by_ids(self, groups: Dict[str, List[int]]) -> Dict[int, User]:
+        found = {}
+        for accounts in self._scatter(
+            {name: lambda repo, chunk=chunk: repo.get_accounts_by_ids(chunk) for name, chunk in groups.items()}
+        ).values():
+            found.update(accounts)
+        return found
+
+    def create_accounts(self, accounts: Sequence[dict]) -> List[Union[User, DuplicateEmailError]]:
+        groups: Dict[str, List[int]] = {}
+        rows = []
+        for i, account in enumerate(accounts):
+            bucket = bucket_for_email(account["email"])
+            rows.append({**account, "id": self.ids.next_id(bucket)})
+            groups.setdefault(self.shard_map.shard_for_bucket(bucket), []).append(i)
+        results: List[Union[User, DuplicateEmailError, None]] = [None] * len(accounts)
+        created = self._scatter(
+            {
+                name: lambda repo, indexes=indexes: repo.create_accounts([rows[i] for i in indexes])
+                for name, indexes in groups.items()
+            }
+        )
+        for name, indexes in groups.items():
+            for i, result in zip(indexes, created[name]):
+                results[i] = result
+        return results
+
+    def iter_accounts(
+        self,
+        is_active: Optional[bool] = None,
+        is_verified: Optional[bool] = None,
+        after_id: int = 0,
+        page_size: int = 500,
+        limit: Optional[int] = None,
+    ) -> Iterator[list]:
+        """Pages of accounts from every shard, merged by id."""
+        rows = heapq.merge(
+            *(
+                _rows(repo.iter_accounts(is_active, is_verified, after_id=after_id, page_size=page_size, limit=limit))
+                for repo in self.shards.values()
+            ),
+            key=attrgetter("id"),
+        )
+        yield from _pages(rows if limit is None else islice(rows, limit), page_size)
+
+    def iter_changed_since(
+        self, since, after_id: int = 0, page_size: int = 500, until: Optional[datetime] = None
+    ) -> Iterator[list]:
+        """Pages of changed accounts from every shard, merged by (updated_at, id)."""
+        until = until or changes_cutoff()
+        rows = heapq.merge(
+            *(
+                _rows(repo.iter_changed_since(since, after_id=after_id, page_size=page_size, until=until))
+                for repo in self.shards.values()
+            ),
+            key=attrgetter("updated_at", "id"),
+        )
+        yield from _pages(rows, page_size)
+
+
+def sharded_repository_from_env(
+    max_workers: Optional[int] = None, cache: Optional[AccountCache] = None
+) -> Optional[ShardedAccountRepository]:
+    """A ShardedAccountRepository over the ACCOUNTS_SHARD_MAP file, or None when it is not set."""
+    path = os.getenv("ACCOUNTS_SHARD_MAP")
+    if not path:
+        return None
+    shard_map = ShardMap.load(path)
+    factories = {
+        name: get_session_factory(
+            bind=create_pooled_engine(shard_map.url(name), max_workers=max_workers, name=f"shard-{name}")
+        )
+        for name in sorted(set(shard_map.assignments))
+    }
+    return ShardedAccountRepository(shard_map, factories, cache=cache)
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from accounts import repository, sharding
+from accounts.models import base, users
+
+
+class ShardedDatabases:
+    """N SQLite files and a ShardMap over them."""
+
+    def __init__(self, testcase: unittest.TestCase, names):
+        tmpdir = tempfile.TemporaryDirectory()
+        testcase.addCleanup(tmpdir.cleanup)
+        self.urls = {name: "sqlite:///" + os.path.join(tmpdir.name, f"{name}.db") for name in names}
+        self.engines = {}
+        for name, url in self.urls.items():
+            self.engines[name] = create_engine(url)
+            base.Base.metadata.create_all(self.engines[name])
+            testcase.addCleanup(self.engines[name].dispose)
+        self.factories = {name: sessionmaker(bind=engine) for name, engine in self.engines.items()}
+        self.map = sharding.ShardMap.even({name: {"url": url} for name, url in self.urls.items()})
+
+    def emails_on(self, name):
+        with self.factories[name]() as session:
+            return list(session.scalars(select(users.User.email)))
+
+
+def email_on(shard_map: sharding.ShardMap, name: str, prefix: str = "user") -> str:
+    """An email that ``shard_map`` places on shard ``name``."""
+    emails = (f"{prefix}{i}@example.com" for i in range(1000))
+    return next(email for email in emails if shard_map.shard_for_email(email) == name)
+
+
+class BucketTest(unittest.TestCase):
+    def test_bucket_for_email_is_stable_and_case_insensitive(self):
+        self.assertEqual(sharding.bucket_for_email("user@example.com"), 1096)
+        self.assertEqual(sharding.bucket_for_email("USER@Example.com"), 1096)
+
+    def test_ids_encode_bucket_and_millisecond(self):
+        ticks = iter([0.0, 0.0, 0.0005, 0.001])
+        ids = sharding.IdGenerator(clock=lambda: sharding.ID_EPOCH_MS / 1000 + next(ticks), rng=lambda n: 1022)
+        generated = [ids.next_id(bucket) for bucket in (7, 4095, 7, 0)]
+
+        self.assertEqual([sharding.bucket_for_id(i) for i in generated], [7, 4095, 7, 0])
+        # The sequence overflowed after 1023 and borrowed the next millisecond.
+        self.assertEqual([i >> 22 for i in generated], [0, 0, 1, 1])
+        self.assertEqual(len(set(generated)), 4)
+
+    def test_shard_map_round_trip_and_rebalance(self):
+        shards = {name: {"url": f"sqlite:///{name}.db"} for name in ("a", "b")}
+        shard_map = sharding.ShardMap.even(shards)
+        self.assertEqual(shard_map.to_dict()["buckets"], [[0, 2047, "a"], [2048, 4095, "b"]])
+        self.assertEqual(sharding.ShardMap.from_dict(shard_map.to_dict()).assignments, shard_map.assignments)
+
+        grown = shard_map.rebalanced({**shards, "c": {"url": "sqlite:///c.db"}})
+
+        self.assertEqual(sorted(grown.assignments.count(name) for name in "abc"), [1365, 1365, 1366])
+        self.assertEqual(sum(shard_map.moves(grown).values()), grown.assignments.count("c"))
+        with self.assertRaises(ValueError):
+            sharding.ShardMap(shards, ["a"] * 10)
+
+
+class ShardedAccountRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.db = ShardedDatabases(self, ["a", "b", "c"])
+        self.repo = sharding.ShardedAccountRepository(self.db.map, self.db.factories)
+        self.addCleanup(self.repo.close)
+
+    def test_accounts_live_on_their_email_shard(self):
+        emails = [f"user{i}@example.com" for i in range(30)]
+        created = [self.repo.create_account(email, "First", "Last", "pw") for email in emails]
+
+        for name in "abc":
+            self.assertEqual(
+                sorted(self.db.emails_on(name)),
+                sorted(e for e in emails if self.db.map.shard_for_email(e) == name),
+            )
+        self.assertEqual(self.repo.get_account_by_email("USER3@example.com").id, created[3].id)
+        self.assertEqual(set(self.repo.get_accounts_by_ids([a.id for a in created] + [1])), {a.id for a in created})
+        self.assertEqual(len(self.repo.get_accounts_by_emails(emails + ["missing@example.com"])), 30)
+
+    def test_list_merges_shards_by_id(self):
+        created = [self.repo.create_account(f"user{i}@example.com", "First", "Last", "pw") for i in range(20)]
+        ids = sorted(a.id for a in created)
+
+        pages = list(self.repo.iter_accounts(page_size=6))
+        limited = [row.id for page in self.repo.iter_accounts(after_id=ids[4], page_size=3, limit=7) for row in page]
+
+        self.assertEqual([len(page) for page in pages], [6, 6, 6, 2])
+        self.assertEqual([row.id for page in pages for row in page], ids)
+        self.assertEqual(limited, ids[5:12])
+
+    def test_batch_create_routes_each_account_and_keeps_order(self):
+        self.repo.create_account("user1@example.com", "Taken", "User", "pw")
+        rows = [
+            {"email": f"user{i}@example.com", "first_name": "F", "last_name": "L", "hashed_password": "pw"}
+            for i in range(6)
+        ]
+
+        results = self.repo.create_accounts(rows)
+
+        self.assertIsInstance(results[1], repository.DuplicateEmailError)
+        created = [result.email for i, result in enumerate(results) if i != 1]
+        self.assertEqual(created, [rows[i]["email"] for i in (0, 2, 3, 4, 5)])
+        for result in results[2:]:
+            self.assertEqual(sharding.bucket_for_id(result.id), sharding.bucket_for_email(result.email))
+
+    def test_email_change_moves_account_and_forwards_its_id(self):
+        old, new = email_on(self.db.map, "a"), email_on(self.db.map, "b")
+        account = self.repo.create_account(old, "First", "Last", "pw")
+
+        updated = self.repo.update_account_fields(account.id, email=new)
+
+        self.assertEqual((updated.id, updated.email, updated.first_name), (account.id, new, "First"))
+        self.assertEqual(self.db.emails_on("a"), [])
+        self.assertEqual(self.db.emails_on("b"), [new])
+        self.assertIsNone(self.repo.get_account_by_email(old))
+        self.assertEqual(self.repo.get_accounts_by_ids([account.id])[account.id].email, new)
+        self.assertEqual(self.repo.update_account_fields(account.id, first_name="Moved").first_name, "Moved")
+
+        self.assertTrue(self.repo.delete_account(account.id))
+        self.assertEqual(self.repo.get_accounts_by_ids([account.id]), {})
+        with self.db.factories["a"]() as session:
+            self.assertIsNone(session.get(users.AccountForward, account.id))
+
+    def test_email_change_to_taken_email_is_rejected(self):
+        taken = self.repo.create_account(email_on(self.db.map, "b"), "Taken", "User", "pw")
+        account = self.repo.create_account(email_on(self.db.map, "a"), "First", "Last", "pw")
+
+        with self.assertRaises(repository.DuplicateEmailError):
+            self.repo.update_account_fields(account.id, email=taken.email.upper())
+        self.assertEqual(self.repo.get_accounts_by_ids([account.id])[account.id].email, account.email)
@@ -3,20 +3,29 @@ import time
 import structlog
 import jwt
 
+from accounts import metrics
+from accounts.cache import LRUCache
+
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-only-super-secret-key")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRES_SECONDS = 3600 * 48  # 48 hours
+# A cached token is reissued once this fraction of its lifetime has elapsed.
+JWT_REFRESH_FRACTION = float(os.getenv("JWT_REFRESH_FRACTION", "0.5"))
+JWT_TOKEN_CACHE_SIZE = int(os.getenv("JWT_TOKEN_CACHE_SIZE", "10000"))
 BASE_DIR = os.getenv("CERTS_DIR", "/home/oleg/projects/python/jabbas_pizza/certs")
 
 logger = structlog.get_logger()
 
+# Per process: the account repository invalidates tokens only in the worker that made the write.
+_token_cache = LRUCache("tokens", JWT_TOKEN_CACHE_SIZE, JWT_EXPIRES_SECONDS * JWT_REFRESH_FRACTION)
+
 
 def _read_binary_file(path: str) -> bytes:
     with open(path, "rb") as file:
         return file.read()
 
 
-def generate_token(email, first_name, last_name) -> str:
+def _encode_token(email, first_name, last_name) -> str:
     payload = {
         "email": email,
         "first_name": first_name,
@@ -26,6 +35,23 @@ def generate_token(email, first_name, last_name) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+def generate_token(email, first_name, last_name) -> str:
+    claims = (email, first_name, last_name)
+    cached = _token_cache.get(email)
+    if cached is not None and cached[0] == claims:
+        metrics.CACHE_LOOKUPS.labels(cache="tokens", result="hit").inc()
+        return cached[1]
+    metrics.CACHE_LOOKUPS.labels(cache="tokens", result="miss").inc()
+    token = _encode_token(email, first_name, last_name)
+    _token_cache.set(email, (claims, token))
+    return token
+
+
+def invalidate_token(*emails) -> None:
+    for email in emails:
+        _token_cache.delete(email)
+
+
 def load_credentials():
     cert_file = os.path.join(BASE_DIR, "accounts.crt")
     key_file = os.path.join(BASE_DIR, "accounts.key")
@@ -0,0 +1,36 @@
+"""Tokens per second for generate_token with and without the token cache.
+
+python -m accounts.utils.creds_utils_bench --accounts 1000 --iterations 100000
+"""
+
+import argparse
+import time
+
+from accounts.utils import creds_utils
+
+
+def _run(accounts: int, iterations: int, mint) -> float:
+    identities = [(f"user{i}@example.com", "First", f"Last{i}") for i in range(accounts)]
+    start = time.perf_counter()
+    for i in range(iterations):
+        mint(*identities[i % accounts])
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JWT issuance")
+    parser.add_argument("--accounts", type=int, default=1000, help="Distinct identities cycled through")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    uncached = _run(args.accounts, args.iterations, creds_utils._encode_token)
+    creds_utils._token_cache.clear()
+    cached = _run(args.accounts, args.iterations, creds_utils.generate_token)
+    print(f"{'mode':<10} {'tokens/s':>12}")
+    print(f"{'uncached':<10} {uncached:>12.0f}")
+    print(f"{'cached':<10} {cached:>12.0f}")
+    print(f"speedup    {cached / uncached:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,3 +34,43 @@ class UtilsTest(unittest.TestCase):
         self.assertEqual(decoded["email"], "mail@mail.com")
         self.assertEqual(decoded["first_name"], "First")
         self.assertEqual(decoded["last_name"], "Last")
+
+
+class TokenCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = mock.Mock(return_value=0.0)
+        cache_patch = mock.patch.object(
+            utils,
+            "_token_cache",
+            utils.LRUCache("tokens", 10, utils.JWT_EXPIRES_SECONDS * utils.JWT_REFRESH_FRACTION, clock=self.clock),
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+        encode_patch = mock.patch.object(utils, "_encode_token", wraps=utils._encode_token)
+        self.mock_encode = encode_patch.start()
+        self.addCleanup(encode_patch.stop)
+
+    def test_generate_token_reuses_fresh_token(self):
+        first = utils.generate_token("mail@mail.com", "First", "Last")
+        second = utils.generate_token("mail@mail.com", "First", "Last")
+        self.assertEqual(first, second)
+        self.mock_encode.assert_called_once()
+
+    def test_generate_token_reissued_after_refresh_fraction(self):
+        utils.generate_token("mail@mail.com", "First", "Last")
+        self.clock.return_value = utils.JWT_EXPIRES_SECONDS * utils.JWT_REFRESH_FRACTION
+        utils.generate_token("mail@mail.com", "First", "Last")
+        self.assertEqual(self.mock_encode.call_count, 2)
+
+    def test_generate_token_reissued_when_claims_change(self):
+        utils.generate_token("mail@mail.com", "First", "Last")
+        token = utils.generate_token("mail@mail.com", "Renamed", "Last")
+        decoded = jwt.decode(token, utils.JWT_SECRET, algorithms=[utils.JWT_ALGORITHM])
+        self.assertEqual(decoded["first_name"], "Renamed")
+        self.assertEqual(self.mock_encode.call_count, 2)
+
+    def test_invalidate_token_rotates(self):
+        utils.generate_token("mail@mail.com", "First", "Last")
+        utils.invalidate_token("mail@mail.com")
+        utils.generate_token("mail@mail.com", "First", "Last")
+        self.assertEqual(self.mock_encode.call_count, 2)
@@ -0,0 +1,191 @@
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO
+
+from google.protobuf import json_format
+from google.protobuf.message import Message
+
+from accounts import metrics
+
+REDACTED = "[REDACTED]"
+DEFAULT_REDACT_FIELDS = ("hashed_password", "token")
+
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    """Parse "GetAccount=0.01,CreateAccount=1" into {method name: rate}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+class LogSampler:
+    """Decides per call whether a method's request/response pair is logged.
+    Rates are keyed by the bare method name ("GetAccount") or the full gRPC path
+    ("/accounts.AccountService/GetAccount"); anything else uses default_rate.
+    """
+
+    def __init__(self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None, rng=random.random):
+        self.default_rate = default_rate
+        self.rates = dict(rates or {})
+        self._rng = rng
+
+    def rate(self, method: str) -> float:
+        if method in self.rates:
+            return self.rates[method]
+        return self.rates.get(method.rsplit("/", 1)[-1], self.default_rate)
+
+    def sampled(self, method: str) -> bool:
+        rate = self.rate(method)
+        return rate >= 1 or (rate > 0 and self._rng() < rate)
+
+
+def sampler_from_env() -> LogSampler:
+    return LogSampler(
+        default_rate=float(os.getenv("ACCOUNTS_LOG_SAMPLE_RATE", "1.0")),
+        rates=_parse_rates(os.getenv("ACCOUNTS_LOG_SAMPLE_RATES", "")),
+    )
+
+
+class MessageFormatter:
+    """Turns protobuf messages in an event dict into plain dicts with secrets
+    redacted and long strings and repeated fields truncated."""
+
+    def __init__(
+        self,
+        redact_fields: Iterable[str] = DEFAULT_REDACT_FIELDS,
+        max_length: int = 256,
+        max_items: int = 20,
+    ):
+        self.redact_fields = frozenset(redact_fields)
+        self.max_length = max_length
+        self.max_items = max_items
+
+    def format(self, message: Message) -> Dict[str, Any]:
+        return self._clean(json_format.MessageToDict(message, preserving_proto_field_name=True))
+
+    def _clean(self, value):
+        if isinstance(value, dict):
+            return {k: REDACTED if k in self.redact_fields else self._clean(v) for k, v in value.items()}
+        if isinstance(value, list):
+            items = [self._clean(v) for v in value[: self.max_items]]
+            if len(value) > self.max_items:
+                items.append(f"... {len(value) - self.max_items} more")
+            return items
+        if isinstance(value, str) and len(value) > self.max_length:
+            return f"{value[: self.max_length]}... ({len(value)} chars)"
+        return value
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in event_dict.items():
+            if isinstance(value, Message):
+                event_dict[key] = self.format(value)
+        return event_dict
+
+
+def formatter_from_env() -> MessageFormatter:
+    fields = os.getenv("ACCOUNTS_LOG_REDACT_FIELDS")
+    return MessageFormatter(
+        redact_fields=DEFAULT_REDACT_FIELDS if fields is None else [f.strip() for f in fields.split(",") if f.strip()],
+        max_length=int(os.getenv("ACCOUNTS_LOG_MAX_FIELD_LENGTH", "256")),
+        max_items=int(os.getenv("ACCOUNTS_LOG_MAX_ITEMS", "20")),
+    )
+
+
+class _QueueLogger:
+    """structlog logger that hands the event dict to a QueueLogSink instead of writing it."""
+
+    def __init__(self, sink: "QueueLogSink"):
+        self._sink = sink
+
+    def msg(self, **event_dict) -> None:
+        self._sink.put(event_dict)
+
+    debug = info = warning = warn = error = critical = exception = fatal = failure = err = msg
+
+
+class QueueLogSink:
+    """Bounded queue of structlog event dicts rendered and written by a background thread.
+    The final structlog processor must return the event dict unrendered; the sink
+    runs `processors` (message formatting, JSON rendering) on its own thread.
+    When the queue is full new records are dropped and counted rather than
+    blocking the caller.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        processors: Iterable[Callable],
+        file: TextIO = None,
+        max_queue: int = 10000,
+    ):
+        self.processors = list(processors)
+        self.file = file or sys.stdout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def logger_factory(self, *args) -> _QueueLogger:
+        return _QueueLogger(self)
+
+    def put(self, event_dict: Dict[str, Any]) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            event_dict = self._queue.get()
+            try:
+                if event_dict is self._STOP:
+                    return
+                self._write(event_dict)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, event_dict: Dict[str, Any]) -> None:
+        try:
+            line = event_dict
+            for processor in self.processors:
+                line = processor(None, event_dict.get("level", "info"), line)
+            self.file.write(f"{line}\n")
+            if self._queue.empty():
+                self.file.flush()
+        except Exception as exc:  # a broken record must not kill the sink thread
+            sys.stderr.write(f"Failed to write log record: {exc!r}\n")
+
+    def flush(self) -> None:
+        """Block until every record queued so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+
+def queue_sink_from_env(renderer: Callable, file: TextIO = None) -> QueueLogSink:
+    return QueueLogSink(
+        processors=[formatter_from_env(), renderer],
+        file=file,
+        max_queue=int(os.getenv("ACCOUNTS_LOG_QUEUE_SIZE", "10000")),
+    )
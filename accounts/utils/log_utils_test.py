@@ -0,0 +1,83 @@
+import io
+import json
+import threading
+import unittest
+
+import structlog
+from codegen.accounts import service_pb2
+
+from accounts.utils import log_utils
+
+
+class LogSamplerTest(unittest.TestCase):
+    def test_rate_by_method_name_or_full_path(self):
+        sampler = log_utils.LogSampler(
+            default_rate=0.5,
+            rates=log_utils._parse_rates("GetAccount=0, /accounts.AccountService/CreateAccount=1"),
+        )
+        self.assertEqual(sampler.rate("/accounts.AccountService/GetAccount"), 0)
+        self.assertEqual(sampler.rate("/accounts.AccountService/CreateAccount"), 1)
+        self.assertEqual(sampler.rate("/accounts.AccountService/DeleteAccount"), 0.5)
+
+    def test_sampled(self):
+        sampler = log_utils.LogSampler(rates={"GetAccount": 0.1}, rng=iter([0.05, 0.5]).__next__)
+        self.assertTrue(sampler.sampled("/accounts.AccountService/GetAccount"))
+        self.assertFalse(sampler.sampled("/accounts.AccountService/GetAccount"))
+        self.assertTrue(sampler.sampled("/accounts.AccountService/CreateAccount"))
+
+
+class MessageFormatterTest(unittest.TestCase):
+    def test_redacts_and_truncates(self):
+        formatter = log_utils.MessageFormatter(max_length=8, max_items=2)
+        request = service_pb2.BatchCreateAccountsRequest(
+            accounts=[
+                service_pb2.CreateAccountRequest(email=f"user{i}@example.com", hashed_password="secret")
+                for i in range(3)
+            ]
+        )
+
+        event = formatter(None, "info", {"event": "gRPC request", "request": request})
+
+        accounts = event["request"]["accounts"]
+        self.assertEqual(accounts[0], {"email": "user0@ex... (17 chars)", "hashed_password": log_utils.REDACTED})
+        self.assertEqual(accounts[2], "... 1 more")
+        self.assertEqual(event["event"], "gRPC request")
+
+
+class QueueLogSinkTest(unittest.TestCase):
+    def test_renders_on_background_thread(self):
+        out = io.StringIO()
+        threads = []
+
+        def renderer(logger, name, event_dict):
+            threads.append(threading.current_thread())
+            return json.dumps(event_dict)
+
+        sink = log_utils.QueueLogSink([log_utils.MessageFormatter(), renderer], file=out)
+        logger = structlog.wrap_logger(sink.logger_factory(), processors=[structlog.processors.add_log_level])
+        logger.info("gRPC response", response=service_pb2.CreateAccountResponse(token="jwt"))
+        sink.close()
+
+        record = json.loads(out.getvalue())
+        self.assertEqual(record["response"], {"token": log_utils.REDACTED})
+        self.assertEqual(record["level"], "info")
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_drops_and_counts_when_full(self):
+        out = io.StringIO()
+        blocked = threading.Event()
+
+        def renderer(logger, name, event_dict):
+            blocked.wait()
+            return event_dict["event"]
+
+        sink = log_utils.QueueLogSink([renderer], file=out, max_queue=1)
+        before = log_utils.metrics.LOG_RECORDS_DROPPED._value.get()
+        for i in range(5):
+            sink.put({"event": str(i)})
+        blocked.set()
+        sink.close()
+
+        self.assertGreaterEqual(sink.dropped, 3)
+        self.assertEqual(log_utils.metrics.LOG_RECORDS_DROPPED._value.get() - before, sink.dropped)
+        self.assertEqual(len(out.getvalue().splitlines()), 5 - sink.dropped)
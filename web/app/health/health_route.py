@@ -0,0 +1,28 @@
+import os
+
+import structlog
+from codegen.accounts import service_pb2_grpc
+from fastapi import APIRouter, Response
+
+from web.app.utils import grpc_client
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+READY_TIMEOUT = float(os.getenv("WEB_READY_TIMEOUT", "1"))
+
+accounts_client = grpc_client.AsyncGrpcClient("AccountService", service_pb2_grpc)
+
+
+@router.get("/api/ready")
+async def ready(response: Response):
+    """Readiness probe: 200 once the AccountService channel is connected, 503 otherwise. Makes no RPC."""
+    response.headers["Cache-Control"] = "no-store"
+    try:
+        status = await accounts_client.ready(timeout=READY_TIMEOUT)
+    except FileNotFoundError as e:
+        status = {"ready": False, "error": str(e)}
+    if not status["ready"]:
+        logger.warning("Not ready", **status)
+        response.status_code = 503
+    return status
@@ -0,0 +1,30 @@
+from unittest import mock
+
+from web.app import base
+from web.app.health import health_route
+
+
+class ReadyRouteTest(base.WebBaseTest):
+    def test_ready_when_channel_connected(self):
+        status = {"ready": True, "channels": ["READY"]}
+        with mock.patch.object(health_route.accounts_client, "ready", mock.AsyncMock(return_value=status)):
+            response = self.client.get("/api/ready")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), status)
+
+    def test_not_ready_when_channel_down(self):
+        status = {"ready": False, "channels": ["TRANSIENT_FAILURE"]}
+        with mock.patch.object(health_route.accounts_client, "ready", mock.AsyncMock(return_value=status)):
+            response = self.client.get("/api/ready")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), status)
+
+    def test_not_ready_without_certificate(self):
+        missing = mock.AsyncMock(side_effect=FileNotFoundError("Certificate file not found: server.crt"))
+        with mock.patch.object(health_route.accounts_client, "ready", missing):
+            response = self.client.get("/api/ready")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()["ready"])
@@ -1,11 +1,13 @@
 import argparse
 import logging
+from contextlib import asynccontextmanager
 
 import structlog
 import uvicorn
 from fastapi import FastAPI
 
 from web.app.routes import register_routes
+from web.app.utils import grpc_client
 
 
 def log_config():
@@ -25,8 +27,15 @@ def log_config():
     )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    grpc_client.close_all()
+    await grpc_client.aclose_all()
+
+
 def create_app():
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     register_routes(app)
     return app
 
@@ -1,5 +1,7 @@
+from web.app.health import health_route
 from web.app.home import home_route
 
 
 def register_routes(app):
     app.include_router(home_route.router, prefix="", tags=["home"])
+    app.include_router(health_route.router, prefix="", tags=["health"])
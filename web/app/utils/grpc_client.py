@@ -1,20 +1,31 @@
+import abc
+import asyncio
+import itertools
 import os
+import threading
 import types
+import weakref
 
 import grpc
 import structlog
 
 logger = structlog.get_logger()
 
+_clients: "weakref.WeakSet[GrpcClient]" = weakref.WeakSet()
+_async_clients: "weakref.WeakSet[AsyncGrpcClient]" = weakref.WeakSet()
+
+
+def keepalive_options() -> list:
+    return [
+        ("grpc.keepalive_time_ms", int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "60000"))),
+        ("grpc.keepalive_timeout_ms", int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "20000"))),
+        ("grpc.keepalive_permit_without_calls", 0),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
 
-class GrpcClient:
-    """gRPC client utility.
-    Provides a generic gRPC client class to call methods on a specified service.
-    from accounts import service_pb2, service_pb2_grpc
-    client = GrpcClient(pb2_grpc_module=service_pb2_grpc)
-    req = service_pb2.CreateAccountRequest(...)
-    resp = client.call("CreateAccount", req)
-    """
+
+class _BaseGrpcClient(abc.ABC):
+    """Service/method resolution and credentials shared by the sync and async clients."""
 
     def __init__(
         self,
@@ -22,25 +33,44 @@ class GrpcClient:
         pb2_grpc_module: types.ModuleType,
         addr: str = None,
         cert_path: str = None,
+        pool_size: int = None,
     ):
         self.service_name = service_name
         self.addr = addr or os.getenv("GRPC_ADDR", "localhost:50051")
         self.cert_path = cert_path or os.getenv(
             "GRPC_CERT_PATH", os.path.join(os.path.dirname(__file__), "..", "certs", "server.crt")
         )
+        self.pool_size = max(1, pool_size or int(os.getenv("GRPC_CHANNEL_POOL_SIZE", "1")))
         if isinstance(pb2_grpc_module, types.ModuleType):
             self.pb2_grpc_module = pb2_grpc_module
         else:
             logger.error("Failed to import grpc_module", module=pb2_grpc_module)
             raise ValueError(f"Failed to import grpc_module: {pb2_grpc_module}")
+        self._credentials = None
+        self._channels = []
+        self._stubs = []
+        self._next = None
+        self._lock = threading.Lock()
+
+    def _load_credentials(self):
+        if self._credentials is None:
+            if not os.path.exists(self.cert_path):
+                logger.error("Certificate file not found", path=self.cert_path)
+                raise FileNotFoundError(f"Certificate file not found: {self.cert_path}")
+            with open(self.cert_path, "rb") as f:
+                self._credentials = grpc.ssl_channel_credentials(root_certificates=f.read())
+        return self._credentials
+
+    def _channel_options(self) -> list:
+        options = keepalive_options()
+        if self.pool_size > 1:
+            # Without a local subchannel pool every channel would share one connection.
+            options.append(("grpc.use_local_subchannel_pool", 1))
+        return options
 
+    @abc.abstractmethod
     def _channel(self):
-        if not os.path.exists(self.cert_path):
-            logger.error("Certificate file not found", path=self.cert_path)
-            raise FileNotFoundError(f"Certificate file not found: {self.cert_path}")
-        with open(self.cert_path, "rb") as f:
-            credentials = grpc.ssl_channel_credentials(root_certificates=f.read())
-        return grpc.secure_channel(self.addr, credentials)
+        """A new sync or aio channel to ``self.addr``."""
 
     def _stub(self, channel):
         cls = getattr(self.pb2_grpc_module, f"{self.service_name}Stub", None)
@@ -49,23 +79,146 @@ class GrpcClient:
             raise ValueError(f"Unknown service: {self.service_name}")
         return cls(channel)
 
+    def _open(self):
+        # Called with self._lock held.
+        if not self._stubs:
+            for _ in range(self.pool_size):
+                channel = self._channel()
+                self._channels.append(channel)
+                self._stubs.append(self._stub(channel))
+            self._next = itertools.cycle(self._stubs)
+
+    def _next_stub(self):
+        with self._lock:
+            self._open()
+            return next(self._next)
+
+    def _open_channels(self) -> list:
+        with self._lock:
+            self._open()
+            return list(self._channels)
+
+    def _rpc(self, method: str):
+        rpc = getattr(self._next_stub(), method, None)
+        if rpc is None:
+            raise ValueError(f"Unknown method {method} on {self.service_name}")
+        return rpc
+
+    def _call_failed(self, method: str, e: grpc.RpcError) -> RuntimeError:
+        code, detail = e.code(), e.details()
+        logger.error(
+            "gRPC call failed",
+            service=self.service_name,
+            method=method,
+            code=code,
+            detail=detail,
+        )
+        return RuntimeError(f"gRPC call {self.service_name}.{method} failed: {e.code().name} - {e.details()}")
+
+    def _take_channels(self) -> list:
+        with self._lock:
+            channels, self._channels, self._stubs, self._next = self._channels, [], [], None
+        return channels
+
+
+class GrpcClient(_BaseGrpcClient):
+    """gRPC client utility.
+    Provides a generic gRPC client class to call methods on a specified service.
+    Channels are opened on first use and reused for every call until close();
+    with pool_size > 1 calls are spread round-robin across independent channels.
+    from accounts import service_pb2, service_pb2_grpc
+    client = GrpcClient(pb2_grpc_module=service_pb2_grpc)
+    req = service_pb2.CreateAccountRequest(...)
+    resp = client.call("CreateAccount", req)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _clients.add(self)
+
+    def _channel(self):
+        return grpc.secure_channel(self.addr, self._load_credentials(), options=self._channel_options())
+
     def call(self, method: str, request):
-        with self._channel() as channel:
-            stub = self._stub(channel)
-            rpc = getattr(stub, method, None)
-            if rpc is None:
-                raise ValueError(f"Unknown method {method} on {self.service_name}")
-            try:
-                return rpc(request)
-            except grpc.RpcError as e:
-                code, detail = e.code(), e.details()
-                logger.error(
-                    "gRPC call failed",
-                    service=self.service_name,
-                    method=method,
-                    code=code,
-                    detail=detail,
-                )
-                raise RuntimeError(
-                    f"gRPC call {self.service_name}.{method} failed: {e.code().name} - {e.details()}"
-                ) from e
+        rpc = self._rpc(method)
+        try:
+            return rpc(request)
+        except grpc.RpcError as e:
+            raise self._call_failed(method, e) from e
+
+    def close(self):
+        for channel in self._take_channels():
+            channel.close()
+
+
+class AsyncGrpcClient(_BaseGrpcClient):
+    """asyncio gRPC client on grpc.aio channels, for use from FastAPI handlers.
+    Channels are bound to the event loop that makes the first call.
+    client = AsyncGrpcClient("AccountService", service_pb2_grpc, timeout=2.0)
+    resp = await client.call("GetAccount", req, http_request=request)
+    Passing the FastAPI request cancels the RPC when the HTTP client disconnects.
+    """
+
+    def __init__(self, *args, timeout: float = None, disconnect_poll_interval: float = 0.1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+        self.disconnect_poll_interval = disconnect_poll_interval
+        _async_clients.add(self)
+
+    def _channel(self):
+        return grpc.aio.secure_channel(self.addr, self._load_credentials(), options=self._channel_options())
+
+    async def call(self, method: str, request, timeout: float = None, http_request=None):
+        rpc = self._rpc(method)
+        call = rpc(request, timeout=timeout if timeout is not None else self.timeout)
+        try:
+            if http_request is None:
+                return await call
+            return await self._until_disconnected(call, http_request)
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except grpc.aio.AioRpcError as e:
+            raise self._call_failed(method, e) from e
+
+    async def _until_disconnected(self, call, http_request):
+        response = asyncio.ensure_future(call)
+        while True:
+            done, _ = await asyncio.wait({response}, timeout=self.disconnect_poll_interval)
+            if done:
+                return response.result()
+            if await http_request.is_disconnected():
+                logger.info("HTTP client disconnected, cancelling gRPC call", service=self.service_name)
+                response.cancel()
+                raise asyncio.CancelledError()
+
+    async def ready(self, timeout: float = 1.0) -> dict:
+        """Whether every pooled channel is connected, waiting up to ``timeout`` seconds for them; no RPC is made.
+        Returns {"ready": bool, "channels": [connectivity state name, ...]}.
+        """
+        channels = self._open_channels()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(channel.channel_ready() for channel in channels)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        states = [channel.get_state() for channel in channels]
+        return {
+            "ready": all(state == grpc.ChannelConnectivity.READY for state in states),
+            "channels": [state.name for state in states],
+        }
+
+    async def close(self):
+        for channel in self._take_channels():
+            await channel.close()
+
+
+def close_all():
+    """Close the channels of every live GrpcClient; called on application shutdown."""
+    for client in list(_clients):
+        client.close()
+
+
+async def aclose_all():
+    """Close the channels of every live AsyncGrpcClient; called on application shutdown."""
+    for client in list(_async_clients):
+        await client.close()
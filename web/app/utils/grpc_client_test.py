@@ -1,7 +1,10 @@
+import asyncio
 import types
 import unittest
 from unittest import mock
 
+import grpc
+
 from web.app.utils import grpc_client
 
 fake_module_grpc = types.ModuleType("fake_pb2_grpc")
@@ -60,3 +63,162 @@ class GrpcClientTest(unittest.TestCase):
         with self.assertRaises(FileNotFoundError) as context:
             client._channel()
         self.assertIn("Certificate file not found", str(context.exception))
+
+    @mock.patch("web.app.utils.grpc_client.grpc.secure_channel")
+    @mock.patch("web.app.utils.grpc_client.os.path.exists", return_value=True)
+    @mock.patch("web.app.utils.grpc_client.open", new_callable=mock.mock_open, read_data=b"cert-data")
+    def test_call_reuses_channel_and_credentials(self, mock_open, mock_path_exists, mock_secure_channel):
+        mock_stub_instance = mock.Mock()
+        stub_cls = mock.Mock(return_value=mock_stub_instance)
+        setattr(fake_module_grpc, "TestServiceStub", stub_cls)
+        client = grpc_client.GrpcClient(
+            service_name="TestService",
+            pb2_grpc_module=fake_module_grpc,
+            cert_path="/path/to/cert",
+        )
+
+        for _ in range(3):
+            client.call("TestMethod", mock.Mock())
+
+        mock_open.assert_called_once_with("/path/to/cert", "rb")
+        mock_secure_channel.assert_called_once()
+        stub_cls.assert_called_once()
+        self.assertEqual(mock_stub_instance.TestMethod.call_count, 3)
+
+    @mock.patch("web.app.utils.grpc_client.grpc.secure_channel")
+    @mock.patch("web.app.utils.grpc_client.os.path.exists", return_value=True)
+    @mock.patch("web.app.utils.grpc_client.open", new_callable=mock.mock_open, read_data=b"cert-data")
+    def test_call_round_robins_across_channel_pool(self, mock_open, mock_path_exists, mock_secure_channel):
+        stubs = [mock.Mock(), mock.Mock()]
+        setattr(fake_module_grpc, "TestServiceStub", mock.Mock(side_effect=stubs))
+        client = grpc_client.GrpcClient(
+            service_name="TestService",
+            pb2_grpc_module=fake_module_grpc,
+            cert_path="/path/to/cert",
+            pool_size=2,
+        )
+
+        for _ in range(4):
+            client.call("TestMethod", mock.Mock())
+
+        self.assertEqual(mock_secure_channel.call_count, 2)
+        self.assertIn(("grpc.use_local_subchannel_pool", 1), mock_secure_channel.call_args.kwargs["options"])
+        self.assertEqual([stub.TestMethod.call_count for stub in stubs], [2, 2])
+
+    @mock.patch("web.app.utils.grpc_client.grpc.secure_channel")
+    @mock.patch("web.app.utils.grpc_client.os.path.exists", return_value=True)
+    @mock.patch("web.app.utils.grpc_client.open", new_callable=mock.mock_open, read_data=b"cert-data")
+    def test_close_all_closes_channels(self, mock_open, mock_path_exists, mock_secure_channel):
+        setattr(fake_module_grpc, "TestServiceStub", mock.Mock())
+        client = grpc_client.GrpcClient(
+            service_name="TestService",
+            pb2_grpc_module=fake_module_grpc,
+            cert_path="/path/to/cert",
+        )
+        client.call("TestMethod", mock.Mock())
+
+        grpc_client.close_all()
+
+        mock_secure_channel.return_value.close.assert_called_once()
+        client.call("TestMethod", mock.Mock())
+        self.assertEqual(mock_secure_channel.call_count, 2)
+
+
+@mock.patch("web.app.utils.grpc_client.grpc.aio.secure_channel")
+@mock.patch("web.app.utils.grpc_client.os.path.exists", return_value=True)
+@mock.patch("web.app.utils.grpc_client.open", new_callable=mock.mock_open, read_data=b"cert-data")
+class AsyncGrpcClientTest(unittest.IsolatedAsyncioTestCase):
+    def _client(self, rpc, **kwargs):
+        stub = mock.Mock()
+        stub.TestMethod = rpc
+        setattr(fake_module_grpc, "TestServiceStub", mock.Mock(return_value=stub))
+        return grpc_client.AsyncGrpcClient(
+            service_name="TestService",
+            pb2_grpc_module=fake_module_grpc,
+            cert_path="/path/to/cert",
+            **kwargs,
+        )
+
+    def _resolved(self, value):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        return future
+
+    async def test_call_successful_with_deadlines(self, mock_open, mock_path_exists, mock_secure_channel):
+        rpc = mock.Mock(side_effect=lambda request, timeout: self._resolved("response-data"))
+        client = self._client(rpc, timeout=2.0)
+        request = mock.Mock()
+
+        self.assertEqual(await client.call("TestMethod", request), "response-data")
+        await client.call("TestMethod", request, timeout=0.5)
+
+        self.assertEqual(rpc.call_args_list, [mock.call(request, timeout=2.0), mock.call(request, timeout=0.5)])
+        mock_secure_channel.assert_called_once()
+
+    async def test_call_cancelled_when_http_client_disconnects(self, mock_open, mock_path_exists, mock_secure_channel):
+        pending = asyncio.get_running_loop().create_future()
+        client = self._client(mock.Mock(return_value=pending), disconnect_poll_interval=0.01)
+        http_request = mock.Mock()
+        http_request.is_disconnected = mock.AsyncMock(side_effect=[False, True])
+
+        with self.assertRaises(asyncio.CancelledError):
+            await client.call("TestMethod", mock.Mock(), http_request=http_request)
+
+        self.assertTrue(pending.cancelled())
+
+    async def test_call_returns_before_disconnect(self, mock_open, mock_path_exists, mock_secure_channel):
+        client = self._client(mock.Mock(side_effect=lambda request, timeout: self._resolved("response-data")))
+        http_request = mock.Mock()
+        http_request.is_disconnected = mock.AsyncMock(return_value=False)
+
+        response = await client.call("TestMethod", mock.Mock(), http_request=http_request)
+
+        self.assertEqual(response, "response-data")
+
+    async def test_call_failure_raises_runtime_error(self, mock_open, mock_path_exists, mock_secure_channel):
+        failed = asyncio.get_running_loop().create_future()
+        failed.set_exception(
+            grpc.aio.AioRpcError(
+                grpc.StatusCode.DEADLINE_EXCEEDED,
+                grpc.aio.Metadata(),
+                grpc.aio.Metadata(),
+                details="Deadline Exceeded",
+            )
+        )
+        client = self._client(mock.Mock(return_value=failed))
+
+        with self.assertRaises(RuntimeError) as context:
+            await client.call("TestMethod", mock.Mock())
+        self.assertIn("DEADLINE_EXCEEDED", str(context.exception))
+
+    async def test_ready_when_every_channel_connects(self, mock_open, mock_path_exists, mock_secure_channel):
+        channels = [mock.Mock(channel_ready=mock.AsyncMock()), mock.Mock(channel_ready=mock.AsyncMock())]
+        for channel in channels:
+            channel.get_state.return_value = grpc.ChannelConnectivity.READY
+        mock_secure_channel.side_effect = channels
+        client = self._client(mock.Mock(), pool_size=2)
+
+        self.assertEqual(await client.ready(), {"ready": True, "channels": ["READY", "READY"]})
+        for channel in channels:
+            channel.channel_ready.assert_awaited_once()
+
+    async def test_not_ready_when_connect_times_out(self, mock_open, mock_path_exists, mock_secure_channel):
+        async def never_ready():
+            await asyncio.sleep(60)
+
+        mock_secure_channel.return_value.channel_ready = never_ready
+        mock_secure_channel.return_value.get_state.return_value = grpc.ChannelConnectivity.TRANSIENT_FAILURE
+        client = self._client(mock.Mock())
+
+        status = await client.ready(timeout=0.01)
+
+        self.assertEqual(status, {"ready": False, "channels": ["TRANSIENT_FAILURE"]})
+
+    async def test_aclose_all_closes_channels(self, mock_open, mock_path_exists, mock_secure_channel):
+        mock_secure_channel.return_value.close = mock.AsyncMock()
+        client = self._client(mock.Mock(side_effect=lambda request, timeout: self._resolved("response-data")))
+        await client.call("TestMethod", mock.Mock())
+
+        await grpc_client.aclose_all()
+
+        mock_secure_channel.return_value.close.assert_awaited_once()